@@ -1,54 +1,53 @@
 import os
-import requests
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
-load_dotenv()
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from catalog_mirror import fresh_mirror
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError
 
-SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
-SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
+load_dotenv()
 
-import time
+def audit_from_mirror(mirror):
+    """The same audit as SQL against the local catalog mirror"""
+    total_variants, correct_inventory = mirror.query("""
+        SELECT COUNT(*), COALESCE(SUM(COALESCE(inventory_quantity, 0) >= 50 AND inventory_management IS 'shopify'), 0)
+        FROM variants
+    """)[0]
+    # Print first 3 failures to give user an idea
+    for row in mirror.query("""
+        SELECT p.title, v.inventory_quantity, v.inventory_management
+        FROM variants v JOIN products p ON p.id = v.product_id
+        WHERE NOT (COALESCE(v.inventory_quantity, 0) >= 50 AND v.inventory_management IS 'shopify')
+        LIMIT 3
+    """):
+        reason = []
+        if (row['inventory_quantity'] or 0) < 50: reason.append(f"Qty: {row['inventory_quantity']}")
+        if row['inventory_management'] != 'shopify': reason.append(f"Tracking: {row['inventory_management']}")
+        print(f"\n   ⚠️ Issue ({', '.join(reason)}): {row['title']}")
+    return total_variants, correct_inventory, total_variants - correct_inventory
 
 def main():
     print("🔍 Auditing Inventory Levels...")
     
-    url = f"{BASE_URL}/products.json?limit=250&fields=id,title,variants"
     total_variants = 0
     correct_inventory = 0
     low_inventory = 0
     
-    page = 1
-    while url:
-        print(f"   Scanning page {page}...", end='\r', flush=True)
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-        except requests.exceptions.RequestException as e:
-            print(f"\n❌ Network Error: {e}")
-            time.sleep(5)
-            continue
-
-        if response.status_code == 429:
-            print("\n   ⚠️ Rate limit hit, sleeping 2s...")
-            time.sleep(2)
-            continue
-            
-        if response.status_code != 200:
-            print(f"❌ Error: {response.text}")
-            break
-            
-        data = response.json()
-        products = data.get('products', [])
-        
-        if not products:
-            break
-            
-        for product in products:
+    mirror = fresh_mirror()
+    if mirror:
+        print(f"   Using catalog mirror (synced {mirror.synced_at:%Y-%m-%d %H:%M} UTC)")
+        total_variants, correct_inventory, low_inventory = audit_from_mirror(mirror)
+        report(total_variants, correct_inventory, low_inventory)
+        return
+    
+    # One bulk export instead of a page-by-page scan; products stream in as the file downloads
+    try:
+        for product in export_products():
             for variant in product['variants']:
                 total_variants += 1
                 qty = variant.get('inventory_quantity', 0)
@@ -65,18 +64,14 @@ def main():
                         if qty < 50: reason.append(f"Qty: {qty}")
                         if tracking != 'shopify': reason.append(f"Tracking: {tracking}")
                         print(f"\n   ⚠️ Issue ({', '.join(reason)}): {product['title']}")
-        
-        # Pagination
-        link = response.headers.get('Link')
-        url = None
-        if link:
-            links = link.split(',')
-            for l in links:
-                if 'rel="next"' in l:
-                    url = l.split(';')[0].strip('<> ')
-            page += 1
-            time.sleep(0.5) # Be nice to API
+            print(f"   Scanned {total_variants} variants...", end='\r', flush=True)
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error: {e}")
+        return
     
+    report(total_variants, correct_inventory, low_inventory)
+
+def report(total_variants, correct_inventory, low_inventory):
     print("\n\n📊 Audit Results:")
     print(f"   Total Variants Scanned: {total_variants}")
     print(f"   ✅ Variants with 50+ Stock: {correct_inventory}")
@@ -1,63 +1,38 @@
 import sys
 import os
 from pathlib import Path
-import json
-import time
 import csv
-import requests
 from dotenv import load_dotenv
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
+from walmart_item import WalmartItem
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError
 
 load_dotenv()
 
+# SKUs per get_items_by_ids call; progress and the CSV are updated after each
+AUDIT_CHUNK_SIZE = int(os.getenv('AUDIT_CHUNK_SIZE', 500))
+
 # Shopify Configuration
 SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
 SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("❌ Error: Shopify credentials not found in .env file.")
     sys.exit(1)
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
-
 def get_all_shopify_products():
-    print("📥 Fetching all products from Shopify...")
-    products = []
-    url = f"{BASE_URL}/products.json?limit=250"
-    
-    while url:
-        try:
-            response = requests.get(url, headers=HEADERS)
-            if response.status_code == 200:
-                data = response.json()
-                batch = data.get('products', [])
-                products.extend(batch)
-                print(f"   Fetched {len(batch)} products... (Total: {len(products)})")
-                
-                # Pagination
-                link_header = response.headers.get('Link')
-                url = None
-                if link_header:
-                    links = link_header.split(', ')
-                    for link in links:
-                        if 'rel="next"' in link:
-                            url = link[link.find('<')+1 : link.find('>')]
-            else:
-                print(f"❌ Error fetching Shopify products: {response.status_code} - {response.text}")
-                break
-        except Exception as e:
-            print(f"❌ Exception: {e}")
-            break
-            
+    print("📥 Fetching all products from Shopify (bulk export)...")
+    try:
+        products = list(export_products())
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error fetching Shopify products: {e}")
+        return []
+    print(f"   Fetched {len(products)} products")
     return products
 
 def calculate_target_price(walmart_price):
@@ -72,7 +47,7 @@ def calculate_target_price(walmart_price):
     return round(target_price, 2)
 
 def audit_inventory():
-    client = WalmartAPIClient()
+    client = get_client()
     shopify_products = get_all_shopify_products()
     
     if not shopify_products:
@@ -98,105 +73,101 @@ def audit_inventory():
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
         
-        # Process in batches of 20 to respect Walmart API
-        batch_size = 20
-        for i in range(0, len(shopify_products), batch_size):
-            batch = shopify_products[i:i+batch_size]
-            
-            # Map SKU to Shopify Product for easy lookup
-            sku_map = {}
-            ids_to_fetch = []
-            
-            for p in batch:
-                variants = p.get('variants', [])
-                if variants:
-                    # Assuming first variant holds the main SKU
-                    sku = variants[0].get('sku')
-                    if sku and sku.isdigit(): # Basic validation that SKU looks like a Walmart ID
-                        ids_to_fetch.append(sku)
-                        sku_map[sku] = p
-                    else:
-                        # Log invalid SKU immediately
-                        writer.writerow({
-                            'Shopify_ID': p['id'],
-                            'Title': p['title'],
-                            'SKU': sku,
-                            'Walmart_Status': 'Invalid SKU Format',
-                            'Action_Needed': 'Check SKU'
-                        })
-                        audit_results['invalid_sku'] += 1
+        # Map SKU to Shopify Product for easy lookup
+        sku_map = {}
+        ids_to_fetch = []
+        
+        for p in shopify_products:
+            variants = p.get('variants', [])
+            if variants:
+                # Assuming first variant holds the main SKU
+                sku = variants[0].get('sku')
+                if sku and sku.isdigit(): # Basic validation that SKU looks like a Walmart ID
+                    ids_to_fetch.append(sku)
+                    sku_map[sku] = p
+                else:
+                    # Log invalid SKU immediately
+                    writer.writerow({
+                        'Shopify_ID': p['id'],
+                        'Title': p['title'],
+                        'SKU': sku,
+                        'Walmart_Status': 'Invalid SKU Format',
+                        'Action_Needed': 'Check SKU'
+                    })
+                    audit_results['invalid_sku'] += 1
 
-            if not ids_to_fetch:
+        # Fetch from Walmart in chunks (the client batches and parallelizes the lookups
+        # within each chunk), writing each chunk's rows before fetching the next
+        for i in range(0, len(ids_to_fetch), AUDIT_CHUNK_SIZE):
+            chunk = ids_to_fetch[i:i + AUDIT_CHUNK_SIZE]
+            walmart_items = {}
+            try:
+                response = client.get_items_by_ids(ids=chunk)
+            except Exception as e:
+                print(f"\nError processing batch: {e}")
                 continue
+            if response['success']:
+                # The audit only reads price/stock/seller/GTIN, so skip the raw payload
+                for item in response['data'].get('items', []):
+                    walmart_items[str(item['itemId'])] = WalmartItem(item, keep_raw=False)
+            else:
+                print(f"\nError fetching Walmart items: {response.get('error')}")
+            if response.get('errors'):
+                print(f"\n   ⚠️ {len(response['errors'])} Walmart batch(es) failed; their SKUs are reported as not found")
+            
+            # Process each product in the chunk
+            for sku in chunk:
+                product = sku_map[sku]
+                w_item = walmart_items.get(sku)
                 
-            # Fetch from Walmart
-            try:
-                response = client.get_items_by_ids(ids=ids_to_fetch)
-                walmart_items = {}
-                if response['success']:
-                    items_data = response['data'].get('items', [])
-                    for item in items_data:
-                        walmart_items[str(item['itemId'])] = item
+                row = {
+                    'Shopify_ID': product['id'],
+                    'Title': product['title'],
+                    'SKU': sku,
+                    'Current_Price': product['variants'][0]['price']
+                }
                 
-                # Process each product in the batch
-                for sku in ids_to_fetch:
-                    product = sku_map[sku]
-                    w_item = walmart_items.get(sku)
-                    
-                    row = {
-                        'Shopify_ID': product['id'],
-                        'Title': product['title'],
-                        'SKU': sku,
-                        'Current_Price': product['variants'][0]['price']
-                    }
-                    
-                    if not w_item:
-                        row['Walmart_Status'] = 'Not Found in Walmart API'
-                        row['Action_Needed'] = 'Archive/Delete'
-                        audit_results['invalid_sku'] += 1
+                if not w_item:
+                    row['Walmart_Status'] = 'Not Found in Walmart API'
+                    row['Action_Needed'] = 'Archive/Delete'
+                    audit_results['invalid_sku'] += 1
+                else:
+                    # Analyze Walmart Data
+                    price = w_item.sale_price
+                    stock = w_item.stock
+                    seller = w_item.seller_info
+                    marketplace = w_item.marketplace
+                    gtin = w_item.gtin_or_upc
+                
+                    row['Cost'] = price
+                    row['Stock'] = stock
+                    row['Seller'] = seller or ('Walmart' if not marketplace else 'Unknown')
+                    row['GTIN_Found'] = 'Yes' if gtin else 'No'
+                
+                    # Determine Status
+                    if not w_item.sold_by_walmart:
+                        row['Walmart_Status'] = 'Third Party'
+                        row['Action_Needed'] = 'Archive (3rd Party)'
+                        audit_results['third_party'] += 1
+                    elif stock != 'Available':
+                        row['Walmart_Status'] = 'Out of Stock'
+                        row['Action_Needed'] = 'Pause (OOS)'
+                        audit_results['out_of_stock'] += 1
+                    elif not gtin:
+                        row['Walmart_Status'] = 'Missing GTIN'
+                        row['Action_Needed'] = 'Review (No GTIN)'
+                        audit_results['missing_gtin'] += 1
                     else:
-                        # Analyze Walmart Data
-                        price = w_item.get('salePrice')
-                        stock = w_item.get('stock')
-                        seller = w_item.get('sellerInfo')
-                        marketplace = w_item.get('marketplace')
-                        gtin = w_item.get('upc') or w_item.get('gtin')
-                        
-                        row['Cost'] = price
-                        row['Stock'] = stock
-                        row['Seller'] = seller or ('Walmart' if not marketplace else 'Unknown')
-                        row['GTIN_Found'] = 'Yes' if gtin else 'No'
-                        
-                        # Determine Status
-                        is_walmart = (marketplace is False) or (seller and "walmart" in seller.lower())
-                        
-                        if not is_walmart:
-                            row['Walmart_Status'] = 'Third Party'
-                            row['Action_Needed'] = 'Archive (3rd Party)'
-                            audit_results['third_party'] += 1
-                        elif stock != 'Available':
-                            row['Walmart_Status'] = 'Out of Stock'
-                            row['Action_Needed'] = 'Pause (OOS)'
-                            audit_results['out_of_stock'] += 1
-                        elif not gtin:
-                            row['Walmart_Status'] = 'Missing GTIN'
-                            row['Action_Needed'] = 'Review (No GTIN)'
-                            audit_results['missing_gtin'] += 1
-                        else:
-                            row['Walmart_Status'] = 'Valid'
-                            row['Target_Price'] = calculate_target_price(price)
-                            row['Action_Needed'] = 'Update Price & Sync'
-                            audit_results['valid_walmart'] += 1
-                            
-                    writer.writerow(row)
-                    audit_results['total'] += 1
+                        row['Walmart_Status'] = 'Valid'
+                        row['Target_Price'] = calculate_target_price(price)
+                        row['Action_Needed'] = 'Update Price & Sync'
+                        audit_results['valid_walmart'] += 1
                     
-            except Exception as e:
-                print(f"Error processing batch: {e}")
+                writer.writerow(row)
+                audit_results['total'] += 1
             
-            # Rate limiting delay
-            time.sleep(1)
-            print(f"   Processed {min(i+batch_size, len(shopify_products))}/{len(shopify_products)} products...", end='\r')
+            csvfile.flush()
+            print(f"   Processed {min(i + AUDIT_CHUNK_SIZE, len(ids_to_fetch))}/{len(ids_to_fetch)} SKUs...", end='\r')
 
     print("\n\n📊 Audit Complete!")
     print(f"Total Products Audited: {audit_results['total']}")
@@ -1,10 +1,10 @@
 import os
 import sys
 import json
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 def check_grocery():
-    client = WalmartAPIClient()
+    client = get_client()
     
     print("🔍 Searching for 'Great Value' (Walmart Grocery) items...")
     
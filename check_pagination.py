@@ -1,9 +1,9 @@
 import os
 import sys
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 def check_pagination():
-    client = WalmartAPIClient()
+    client = get_client()
     print("Fetching first page...")
     result = client.get_products(count=25, category='3944') # Electronics
     
@@ -1,10 +1,10 @@
 import os
 import sys
 import json
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 def check_item():
-    client = WalmartAPIClient()
+    client = get_client()
     
     print("Fetching general products to find Same Day eligible items...")
     # Fetch a batch of products
@@ -1,34 +1,22 @@
 import os
-import ssl
-import certifi
-import shopify
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from catalog_mirror import fresh_mirror
+from shopify_bulk import export_products
+
 load_dotenv()
 
 SHOPIFY_STORE_URL = os.getenv("SHOPIFY_STORE_URL")
 SHOPIFY_ACCESS_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN")
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     raise SystemExit("Error: Shopify credentials missing.")
 
-# Fix SSL Context for Shopify API
-ssl_context = ssl.create_default_context(cafile=certifi.where())
-import urllib.request
-original_urlopen = urllib.request.urlopen
-
-def patched_urlopen(url, data=None, timeout=None, *, cafile=None, capath=None, cadefault=False, context=None):
-    return original_urlopen(url, data, timeout, context=ssl_context)
-urllib.request.urlopen = patched_urlopen
-
-session = shopify.Session(SHOPIFY_STORE_URL, API_VERSION, SHOPIFY_ACCESS_TOKEN)
-shopify.ShopifyResource.activate_session(session)
-
-# Iterate through products and aggregate inventory across variants
-page_size = 250
-since_id = None
-
 products_with_stock = 0
 products_without_stock = 0
 variants_in_stock = 0
@@ -37,29 +25,35 @@ variants_out_stock = 0
 def has_stock(product):
     # Sum all variant inventory_quantity (Shopify-managed)
     total = 0
-    for v in product.variants:
-        qty = getattr(v, 'inventory_quantity', None)
+    for v in product['variants']:
+        qty = v.get('inventory_quantity')
         if qty is None:
             continue
         total += int(qty)
     return total > 0, total
 
-while True:
-    kwargs = {'limit': page_size}
-    if since_id is not None:
-        kwargs['since_id'] = since_id
-    products = shopify.Product.find(**kwargs)
-    if not products:
-        break
-
-    for p in products:
+mirror = fresh_mirror()
+if mirror:
+    # Same aggregation as SQL against the local catalog mirror
+    products_with_stock, products_without_stock = mirror.query("""
+        SELECT COALESCE(SUM(total > 0), 0), COALESCE(SUM(total <= 0), 0)
+        FROM (SELECT p.id, COALESCE(SUM(v.inventory_quantity), 0) AS total
+              FROM products p LEFT JOIN variants v ON v.product_id = p.id GROUP BY p.id)
+    """)[0]
+    variants_in_stock, variants_out_stock = mirror.query("""
+        SELECT COALESCE(SUM(inventory_quantity > 0), 0), COALESCE(SUM(inventory_quantity <= 0), 0)
+        FROM variants WHERE inventory_quantity IS NOT NULL
+    """)[0]
+else:
+    # Live read: one bulk export instead of paging products.json
+    for p in export_products():
         in_stock, total = has_stock(p)
         if in_stock:
             products_with_stock += 1
         else:
             products_without_stock += 1
-        for v in p.variants:
-            qty = getattr(v, 'inventory_quantity', None)
+        for v in p['variants']:
+            qty = v.get('inventory_quantity')
             if qty is None:
                 continue
             if int(qty) > 0:
@@ -67,9 +61,6 @@ while True:
             else:
                 variants_out_stock += 1
 
-    # Advance pagination using the last product ID
-    since_id = products[-1].id
-
 print("Shopify Inventory Summary:")
 print(f"  Products with stock: {products_with_stock}")
 print(f"  Products without stock: {products_without_stock}")
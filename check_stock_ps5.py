@@ -6,10 +6,10 @@ import json
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     # Item ID from the user's URL
     item_id = "17816601985"
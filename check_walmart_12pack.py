@@ -7,12 +7,12 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     item_id = "25710670"
     print(f"Checking details for Walmart-sold Item ID: {item_id}")
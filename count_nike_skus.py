@@ -1,51 +1,53 @@
 import os
-import requests
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from catalog_mirror import fresh_mirror
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError
+
 # Load environment variables
 load_dotenv()
 
 SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
 SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("❌ Error: Missing Shopify credentials in .env file")
     exit(1)
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
-
 def get_all_products():
-    """Fetch all products using pagination"""
-    products = []
-    url = f"{BASE_URL}/products.json?limit=250&fields=id,title,vendor,tags,variants"
-    
+    """Fetch all products with one bulk export (see src/shopify_bulk.py)"""
     print("📥 Fetching all products...")
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code != 200:
-            print(f"❌ Error fetching products: {response.text}")
-            break
-            
-        data = response.json()
-        products.extend(data.get('products', []))
-        
-        # Handle pagination
-        link = response.headers.get('Link')
-        url = None
-        if link:
-            links = link.split(',')
-            for l in links:
-                if 'rel="next"' in l:
-                    url = l.split(';')[0].strip('<> ')
-    
-    return products
+    try:
+        return list(export_products())
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error fetching products: {e}")
+        return []
+
+def count_from_mirror(mirror):
+    """Same match as the live scan, as one query against the local catalog mirror"""
+    row = mirror.query("""
+        SELECT COUNT(DISTINCT p.id), COUNT(v.id)
+        FROM products p LEFT JOIN variants v ON v.product_id = p.id
+        WHERE LOWER(p.title) LIKE '%nike%' OR LOWER(p.vendor) LIKE '%nike%' OR LOWER(p.tags) LIKE '%nike%'
+    """)[0]
+    return row[0], row[1]
 
 def main():
+    mirror = fresh_mirror()
+    if mirror:
+        print(f"🗄️  Using catalog mirror (synced {mirror.synced_at:%Y-%m-%d %H:%M} UTC)")
+        nike_products_count, nike_skus_count = count_from_mirror(mirror)
+        print("\n📊 Nike Inventory Summary:")
+        print(f"   - Total Nike Products: {nike_products_count}")
+        print(f"   - Total Nike SKUs (Variants): {nike_skus_count}")
+        return
+    
     print(f"🔌 Connecting to {SHOPIFY_STORE_URL}...")
     
     all_products = get_all_products()
@@ -1,34 +1,33 @@
 import os
-import ssl
-import certifi
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-import shopify
 
-load_dotenv()
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from catalog_mirror import fresh_mirror
+from shopify_client import get_shopify_client
 
-# Fix SSL Context for Shopify API
-ssl_context = ssl.create_default_context(cafile=certifi.where())
-import urllib.request
-original_urlopen = urllib.request.urlopen
-def patched_urlopen(url, data=None, timeout=None, *, cafile=None, capath=None, cadefault=False, context=None):
-    return original_urlopen(url, data, timeout, context=ssl_context)
-urllib.request.urlopen = patched_urlopen
+load_dotenv()
 
 # Configuration
 SHOPIFY_STORE_URL = os.getenv("SHOPIFY_STORE_URL")
 SHOPIFY_ACCESS_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN")
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("Error: Shopify credentials missing.")
     exit(1)
 
-# Initialize Shopify
-session = shopify.Session(SHOPIFY_STORE_URL, API_VERSION, SHOPIFY_ACCESS_TOKEN)
-shopify.ShopifyResource.activate_session(session)
-
-try:
-    count = shopify.Product.count()
-    print(f"Total products in store: {count}")
-except Exception as e:
-    print(f"Error counting products: {e}")
+# Local catalog mirror (src/catalog_mirror.py); live count when it can't be synced
+mirror = fresh_mirror()
+if mirror:
+    count = mirror.scalar("SELECT COUNT(*) FROM products")
+    print(f"Total products in store: {count} (mirror synced {mirror.synced_at:%Y-%m-%d %H:%M} UTC)")
+else:
+    try:
+        response = get_shopify_client().get("products/count.json")
+        response.raise_for_status()
+        print(f"Total products in store: {response.json()['count']}")
+    except Exception as e:
+        print(f"Error counting products: {e}")
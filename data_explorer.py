@@ -13,7 +13,7 @@ from pprint import pprint
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def analyze_product_data():
     """Analyze and display the structure of product data returned by Walmart API"""
@@ -22,7 +22,7 @@ def analyze_product_data():
     
     try:
         # Create API client
-        client = WalmartAPIClient()
+        client = get_client()
         
         print("📡 Fetching sample products to analyze data structure...")
         
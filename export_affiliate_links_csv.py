@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from dotenv import load_dotenv
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 load_dotenv()
 
@@ -24,7 +24,7 @@ def main():
     query = sys.argv[1] if len(sys.argv) > 1 else "ps5"
     outfile = sys.argv[2] if len(sys.argv) > 2 else "affiliate_links.csv"
 
-    client = WalmartAPIClient()
+    client = get_client()
     res = client.search(query, numItems=50)
 
     if not res.get('success'):
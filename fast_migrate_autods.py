@@ -1,15 +1,21 @@
 import os
-import requests
-import time
+import sys
+from pathlib import Path
 import concurrent.futures
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError, get_shopify_client
+from inventory_writer import InventoryWriter
+
 # Load environment variables
 load_dotenv()
 
 SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
 SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
 AUTODS_HANDLE = "autods-prod-wwbybglb"
 AUTODS_LOCATION_ID = 80020111495
 
@@ -17,44 +23,21 @@ if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("❌ Error: Missing Shopify credentials in .env file")
     exit(1)
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
+shopify_client = get_shopify_client()
 
 def get_all_products():
-    """Fetch all products using pagination"""
-    products = []
-    url = f"{BASE_URL}/products.json?limit=250&fields=id,title,variants"
-    
+    """Fetch all products with one bulk export (see src/shopify_bulk.py)"""
     print("📥 Fetching all products...")
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code != 200:
-            print(f"❌ Error fetching products: {response.text}")
-            break
-            
-        data = response.json()
-        products.extend(data.get('products', []))
-        
-        # Handle pagination
-        link = response.headers.get('Link')
-        url = None
-        if link:
-            links = link.split(',')
-            for l in links:
-                if 'rel="next"' in l:
-                    url = l.split(';')[0].strip('<> ')
-    
-    return products
+    try:
+        return list(export_products())
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error fetching products: {e}")
+        return []
 
 def process_variant(variant):
+    """Move a variant to AutoDS; its stock is set afterwards in batches"""
     variant_id = variant['id']
-    inventory_item_id = variant['inventory_item_id']
     
-    # 1. Update Fulfillment Service
-    url = f"{BASE_URL}/variants/{variant_id}.json"
     payload = {
         "variant": {
             "id": variant_id,
@@ -64,26 +47,11 @@ def process_variant(variant):
     }
     
     try:
-        response = requests.put(url, headers=HEADERS, json=payload, timeout=10)
+        response = shopify_client.put(f"variants/{variant_id}.json", json=payload)
         if response.status_code != 200:
             return f"❌ Variant {variant_id} update failed: {response.status_code}"
     except Exception as e:
         return f"❌ Variant {variant_id} error: {str(e)}"
-
-    # 2. Set Inventory
-    url = f"{BASE_URL}/inventory_levels/set.json"
-    payload = {
-        "location_id": AUTODS_LOCATION_ID,
-        "inventory_item_id": inventory_item_id,
-        "available": 50
-    }
-    
-    try:
-        response = requests.post(url, headers=HEADERS, json=payload, timeout=10)
-        if response.status_code != 200:
-            return f"❌ Inventory {inventory_item_id} failed: {response.status_code}"
-    except Exception as e:
-        return f"❌ Inventory {inventory_item_id} error: {str(e)}"
         
     return None # Success
 
@@ -97,11 +65,13 @@ def main():
         all_variants.extend(p['variants'])
         
     print(f"🚀 Starting Fast Migration for {len(all_variants)} variants...")
-    print("   Using 10 concurrent threads...")
+    print("   Using 10 concurrent threads for variant updates, batched inventory writes...")
     
     count = 0
     errors = 0
+    moved = []
     
+    # 1. Update Fulfillment Service (threads share the store's REST call-limit bucket)
     with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
         futures = {executor.submit(process_variant, v): v for v in all_variants}
         
@@ -111,10 +81,21 @@ def main():
             if result:
                 print(result)
                 errors += 1
+            else:
+                moved.append(futures[future])
             
             if count % 100 == 0:
                 print(f"   Processed {count}/{len(all_variants)} (Errors: {errors})")
 
+    # 2. Set Inventory: 250 items per inventorySetQuantities mutation
+    print(f"📦 Setting stock to 50 at AutoDS for {len(moved)} variants...")
+    result = InventoryWriter.from_env(shopify_client).set_quantities(
+        (v['inventory_item_id'], AUTODS_LOCATION_ID, 50) for v in moved
+    )
+    for (inventory_item_id, _), message in result['failures'].items():
+        print(f"❌ Inventory {inventory_item_id} failed: {message}")
+    print(f"   Stock set for {result['updated']} variants (Errors: {len(result['failures'])})")
+
     print("\n✅ Migration Complete!")
 
 if __name__ == "__main__":
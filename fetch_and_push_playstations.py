@@ -8,7 +8,7 @@ import re
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def clean_html(raw_html):
     if not raw_html:
@@ -25,7 +25,7 @@ def generate_handle(title):
     return handle[:255]
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     # Search queries to cover "all playstations"
     queries = [
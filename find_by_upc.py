@@ -4,7 +4,7 @@ from pathlib import Path
 import json
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def main():
     if len(sys.argv) < 2:
@@ -14,7 +14,7 @@ def main():
     brand = sys.argv[2] if len(sys.argv) > 2 else None
     postal = sys.argv[3] if len(sys.argv) > 3 else None
 
-    api = WalmartAPIClient()
+    api = get_client()
 
     # Try brand-restricted search first (up to 400 items)
     result = api.get_products(count=400, brand=brand) if brand else api.get_products(count=100)
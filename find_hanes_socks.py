@@ -8,12 +8,12 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     query = "Hanes Men's Over the Calf Tube Socks 6-Pack White Enforced Toe Fresh IQ sz 6-12"
     print(f"🔍 Searching Walmart for: '{query}'")
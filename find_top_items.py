@@ -1,10 +1,10 @@
 import os
 import sys
 import json
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 def find_top_items():
-    client = WalmartAPIClient()
+    client = get_client()
     
     print("🔍 Searching for top-rated Same Day eligible items...")
     
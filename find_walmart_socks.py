@@ -7,12 +7,12 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     query = "Hanes Over the Calf"
     print(f"🔍 Searching for: '{query}'...")
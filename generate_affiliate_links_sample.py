@@ -7,7 +7,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from dotenv import load_dotenv
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 load_dotenv()
 
@@ -22,7 +22,7 @@ Defaults to query="ps5" if not provided.
 
 def main():
     query = sys.argv[1] if len(sys.argv) > 1 else "ps5"
-    client = WalmartAPIClient()
+    client = get_client()
 
     print(f"Searching Walmart for: {query}")
     res = client.search(query, numItems=25)
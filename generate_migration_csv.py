@@ -1,54 +1,29 @@
 import os
-import requests
+import sys
 import csv
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError
+
 load_dotenv()
 
 SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
 SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
 AUTODS_HANDLE = "autods-prod-wwbybglb"
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
-
-import time
-
 def get_all_products():
-    products = []
-    url = f"{BASE_URL}/products.json?limit=250&fields=handle,title,variants,tags"
+    """Fetch all products with one bulk export (see src/shopify_bulk.py)"""
     print("📥 Fetching products for CSV generation...")
-    
-    page = 1
-    while url:
-        print(f"   Fetching page {page}...")
-        response = requests.get(url, headers=HEADERS)
-        
-        if response.status_code == 429:
-            print("   ⚠️ Rate limit hit, sleeping 2s...")
-            time.sleep(2)
-            continue
-            
-        if response.status_code != 200:
-            print(f"❌ Error: {response.text}")
-            break
-        
-        data = response.json()
-        products.extend(data.get('products', []))
-        
-        link = response.headers.get('Link')
-        url = None
-        if link:
-            links = link.split(',')
-            for l in links:
-                if 'rel="next"' in l:
-                    url = l.split(';')[0].strip('<> ')
-            page += 1
-    return products
+    try:
+        return list(export_products())
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error fetching products: {e}")
+        return []
 
 def main():
     products = get_all_products()
@@ -1,9 +1,7 @@
 import os
 import sys
 import csv
-import time
-import urllib.parse
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 # Shopify CSV Headers
 SHOPIFY_HEADERS = [
@@ -105,7 +103,7 @@ def map_to_shopify(item):
     }
 
 def fetch_and_export(target_count=5000):
-    client = WalmartAPIClient()
+    client = get_client()
     all_items = []
     
     # Categories to cycle through to get variety
@@ -124,69 +122,24 @@ def fetch_and_export(target_count=5000):
         for category in categories:
             print(f"\n📂 Processing Category ID: {category}")
             category_count = 0
-            next_cursor = None
             
-            while category_count < items_per_category:
-                # Determine batch size
-                batch_size = min(100, items_per_category - category_count)
+            # Streams items page by page, following nextPage/lastDoc cursors and
+            # prefetching the next page while we write the current one
+            cursor = client.iter_products(category=category, max_items=items_per_category)
+            for item in cursor:
+                row = map_to_shopify(item)
+                writer.writerow(row)
+                category_count += 1
+                total_exported += 1
                 
-                # Prepare params
-                params = {'count': batch_size, 'category': category}
-                if next_cursor:
-                    params['lastDoc'] = next_cursor
-                
-                try:
-                    print(f"   • Fetching batch (Target: {category_count}/{items_per_category})...")
-                    # We use get_products but pass lastDoc if we have it
-                    # Note: get_products signature is (count, category, brand, special_offer, **kwargs)
-                    # So we pass lastDoc as a kwarg
-                    
-                    if next_cursor:
-                        result = client.get_products(count=batch_size, category=category, lastDoc=next_cursor)
-                    else:
-                        result = client.get_products(count=batch_size, category=category)
-                    
-                    if not result['success']:
-                        print(f"   ❌ Error: {result.get('error')}")
-                        break
-                        
-                    items = result['data']['items']
-                    if not items:
-                        print("   ⚠️  No more items in this category.")
-                        break
-                        
-                    # Process and write items
-                    for item in items:
-                        row = map_to_shopify(item)
-                        writer.writerow(row)
-                        
-                    count_in_batch = len(items)
-                    category_count += count_in_batch
-                    total_exported += count_in_batch
-                    
-                    print(f"   ✅ Exported {count_in_batch} items. Total: {total_exported}")
-                    
-                    # Get next page cursor
-                    next_page_url = result['metadata'].get('next_page')
-                    if next_page_url:
-                        # Extract lastDoc from URL
-                        parsed = urllib.parse.urlparse(next_page_url)
-                        qs = urllib.parse.parse_qs(parsed.query)
-                        if 'lastDoc' in qs:
-                            next_cursor = qs['lastDoc'][0]
-                        else:
-                            print("   ⚠️  No lastDoc found in next_page URL. Stopping category.")
-                            break
-                    else:
-                        print("   ⚠️  No next_page returned. Stopping category.")
-                        break
-                        
-                    # Be nice to the API
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"   ❌ Exception: {e}")
-                    break
+                if category_count % 100 == 0:
+                    print(f"   ✅ Exported {category_count}/{items_per_category} items. Total: {total_exported}")
+            
+            if cursor.error:
+                print(f"   ❌ Error: {cursor.error}")
+            elif cursor.exhausted:
+                print("   ⚠️  No more items in this category.")
+            print(f"   📄 {category_count} items from {cursor.pages_fetched} pages")
                     
     print(f"\n🎉 Export Complete! {total_exported} items written to 'walmart_products_export.csv'")
 
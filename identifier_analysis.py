@@ -9,14 +9,14 @@ from pathlib import Path
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def analyze_product_identifiers():
     """Analyze UPC, GTIN and other product identifiers"""
     print("🔍 WALMART API PRODUCT IDENTIFIERS ANALYSIS")
     print("=" * 60)
     
-    client = WalmartAPIClient()
+    client = get_client()
     
     # Get a larger sample to analyze identifier patterns
     result = client.get_products(count=25)
@@ -18,6 +18,10 @@ import shopify
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+from shopify_bulk import ShopifyBulkImporter, product_input
+from shopify_client import get_shopify_client
+from product_index import ProductIndex
+
 load_dotenv()
 
 # Fix SSL Context for Shopify API
@@ -122,6 +126,33 @@ def _pick_sku_graph_price(p: dict) -> str | None:
     return _coerce_price(p.get("jenni_price")) or _coerce_price(p.get("price"))
 
 
+# One GTIN/SKU index per scoping tag, loaded on the first upsert lookup of the run.
+_gtin_indexes: dict[str, ProductIndex] = {}
+
+
+def _gtin_index(jenni_tag: str) -> ProductIndex:
+    """The run's index of `jenni_tag` products (from the catalog mirror or a bulk export).
+
+    Raises when the index can't be loaded: upserting against an empty index would
+    create a duplicate of every product already in the store.
+    """
+    if jenni_tag not in _gtin_indexes:
+        try:
+            _gtin_indexes[jenni_tag] = ProductIndex.load(jenni_tag)
+        except Exception as e:
+            print(f"❌ Could not build the GTIN index ({e}); aborting instead of creating duplicates "
+                  "(set JENNI_UPSERT=false to run create-only on purpose)")
+            raise
+        print(f"[jenni] GTIN index ready: {len(_gtin_indexes[jenni_tag])} sku/barcode keys")
+    return _gtin_indexes[jenni_tag]
+
+
+def _index_created_product(*, product_id, variant_id, gtin: str) -> None:
+    """Add a product created this run to the loaded indexes so later items upsert it."""
+    for index in _gtin_indexes.values():
+        index.add(product_id, variant_id, sku=gtin, barcode=gtin)
+
+
 def _find_shopify_product_by_gtin(*, gtin: str, jenni_tag: str) -> shopify.Product | None:
     """Lookup existing Shopify product by GTIN (variant sku or barcode), scoped to Jenni-tagged products.
 
@@ -130,46 +161,20 @@ def _find_shopify_product_by_gtin(*, gtin: str, jenni_tag: str) -> shopify.Produ
     - variant.barcode == gtin
     - legacy variant.sku == f"JN_{gtin}" (older imports)
 
-    This is intentionally **scoped** so we don't have to scan the whole store.
-    We use the REST Admin API because it supports `?tag=` filtering.
+    Matching is an O(1) hit in the run's GTIN index (see src/product_index.py); only a
+    match costs an API call, to load the product for the update.
     """
     gtin = (gtin or "").strip()
     if not gtin:
         return None
 
-    url = f"{_shopify_rest_base_url()}/products.json"
-    params = {"limit": 250, "fields": "id,tags,variants" , "tag": jenni_tag}
-    legacy_sku = f"JN_{gtin}"
-
-    while True:
-        try:
-            r = requests.get(url, headers=_shopify_rest_headers(), params=params, timeout=15)
-        except Exception:
-            return None
-        if r.status_code != 200:
-            return None
-        data = r.json() or {}
-        for p in data.get("products", []) or []:
-            for v in p.get("variants", []) or []:
-                sku = str(v.get("sku") or "").strip()
-                barcode = str(v.get("barcode") or "").strip()
-                if sku in {gtin, legacy_sku} or barcode == gtin:
-                    try:
-                        return shopify.Product.find(p["id"])
-                    except Exception:
-                        return None
-
-        link = r.headers.get("Link")
-        next_url = None
-        if link:
-            for part in link.split(","):
-                if 'rel="next"' in part:
-                    next_url = part.split(";")[0].strip("<> ")
-                    break
-        if not next_url:
-            return None
-        url = next_url
-        params = None  # already encoded in next_url
+    match = _gtin_index(jenni_tag).lookup(gtin)
+    if match is None:
+        return None
+    try:
+        return shopify.Product.find(match[0])
+    except Exception:
+        return None
 
 
 # Backwards-compatible alias (older call sites used _find_shopify_product_by_sku)
@@ -177,6 +182,32 @@ def _find_shopify_product_by_sku(*, product_id: str, jenni_tag: str) -> shopify.
     return _find_shopify_product_by_gtin(gtin=product_id, jenni_tag=jenni_tag)
 
 
+def _flush_jenni_bulk(bulk_queue: list) -> int:
+    """Create queued products with one staged bulk mutation; returns how many were rejected."""
+    if not bulk_queue:
+        return 0
+    print(f"[jenni] bulk importing {len(bulk_queue)} product(s)...")
+    try:
+        results = ShopifyBulkImporter.from_env().import_products(list(bulk_queue))
+    except Exception as e:
+        print(f"❌ Bulk import failed: {e}")
+        failed = len(bulk_queue)
+    else:
+        failed = 0
+        for gtin, result in results.items():
+            if not result["product_id"]:
+                failed += 1
+                print(f"❌ Failed to create Jenni product sku={gtin}: {'; '.join(result['errors'])}")
+        for key, graphql_input in bulk_queue:
+            created = results.get(key) or {}
+            sku = ((graphql_input.get("variants") or [{}])[0]).get("sku")
+            if created.get("product_id") and sku:
+                _index_created_product(product_id=created["product_id"], variant_id=created["variant_id"], gtin=sku)
+        print(f"[jenni] bulk import created {len(results) - failed}/{len(results)} product(s)")
+    bulk_queue.clear()
+    return failed
+
+
 def _require_env(name: str) -> str:
     val = os.getenv(name)
     if not val:
@@ -732,7 +763,21 @@ def iter_products(base_url: str, *, category: str | None, limit: int, max_items:
         offset += limit
 
 
-def create_jenni_product(*, p: dict, tags: str, product_type: str, vendor: str, inventory: int, dry_run: bool) -> bool:
+def create_jenni_product(
+    *,
+    p: dict,
+    tags: str,
+    product_type: str,
+    vendor: str,
+    inventory: int,
+    dry_run: bool,
+    bulk_queue: list | None = None,
+) -> bool:
+    """Create (or upsert) one Jenni product.
+
+    With `bulk_queue`, new products are not saved here: their ProductInput is appended
+    as (gtin, input) for the next staged bulk mutation (see _flush_jenni_bulk).
+    """
     title = (p.get("title") or "").strip()
     if not title:
         return False
@@ -858,67 +903,49 @@ def create_jenni_product(*, p: dict, tags: str, product_type: str, vendor: str,
         return False
 
     # Create new
-    product = shopify.Product()
-    product.title = title
-    product.body_html = body_html
-    product.vendor = vendor
-    product.product_type = normalized_category or product_type
-    product.tags = tags
-    product.status = "active"
-
-    if images:
-        product.images = [{"src": u} for u in images]
-
-    variant = shopify.Variant()
-    # Shopify requires a price; use SKU Graph price when available.
-    variant.price = sku_graph_price or "0.00"
-    if gtin:
-        variant.sku = gtin
-        variant.barcode = gtin
-    variant.inventory_management = "shopify"
-    variant.inventory_policy = "deny"
-    variant.inventory_quantity = int(inventory)
-    product.variants = [variant]
-
-    metafields = []
-    if product_id:
-        metafields.append(
+    payload: dict = {
+        "title": title,
+        "body_html": body_html,
+        "vendor": vendor,
+        "product_type": normalized_category or product_type,
+        "tags": tags,
+        "status": "active",
+        # Shopify requires a price; use SKU Graph price when available.
+        "variants": [
             {
-                "namespace": "jenni",
-                "key": "product_id",
-                "value": product_id,
-                "type": "single_line_text_field",
+                "price": sku_graph_price or "0.00",
+                "inventory_management": "shopify",
+                "inventory_policy": "deny",
+                "inventory_quantity": int(inventory),
             }
-        )
+        ],
+    }
     if gtin:
-        metafields.append(
-            {
-                "namespace": "jenni",
-                "key": "gtin",
-                "value": gtin,
-                "type": "single_line_text_field",
-            }
-        )
-    if source_url:
-        metafields.append(
-            {
-                "namespace": "jenni",
-                "key": "product_url",
-                "value": source_url,
-                "type": "single_line_text_field",
-            }
-        )
-    if category:
-        metafields.append(
-            {
-                "namespace": "jenni",
-                "key": "category",
-                "value": category,
-                "type": "single_line_text_field",
-            }
-        )
+        payload["variants"][0].update(sku=gtin, barcode=gtin)
+    if images:
+        payload["images"] = [{"src": u} for u in images]
+
+    metafields = []
+    for key, value in (("product_id", product_id), ("gtin", gtin), ("product_url", source_url), ("category", category)):
+        if value:
+            metafields.append(
+                {
+                    "namespace": "jenni",
+                    "key": key,
+                    "value": value,
+                    "type": "single_line_text_field",
+                }
+            )
     if metafields:
-        product.metafields = metafields
+        payload["metafields"] = metafields
+
+    if bulk_queue is not None:
+        # Stock goes to the store's primary location, as the REST create does
+        bulk_queue.append((gtin or product_id or title, product_input(payload, location_id=get_shopify_client().primary_location_id())))
+        return True
+
+    product = shopify.Product(payload)
+    variant = product.variants[0]
 
     if _shopify_save_with_backoff(
         product,
@@ -928,6 +955,8 @@ def create_jenni_product(*, p: dict, tags: str, product_type: str, vendor: str,
         description=f"create sku={variant.sku}",
     ):
         print(f"✅ Imported Jenni: {title[:60]}... sku={variant.sku} barcode={variant.barcode} inv={inventory}")
+        if gtin:
+            _index_created_product(product_id=product.id, variant_id=product.variants[0].id, gtin=gtin)
         return True
 
     print(f"❌ Failed to save Jenni product: {title[:60]}...")
@@ -978,6 +1007,11 @@ def main() -> int:
         product_type_default = os.getenv("JENNI_PRODUCT_TYPE", "Jenni")
         tags = os.getenv("JENNI_TAGS", "Source:JenniSKUGraph, Jenni-SKU-Graph")
 
+        # JENNI_BULK: queue new products and create them in staged bulk mutations
+        # (upserts of existing products still save one at a time).
+        bulk_queue: list | None = [] if _bool_env("JENNI_BULK") and not dry_run else None
+        bulk_batch = int(os.getenv("SHOPIFY_BULK_IMPORT_BATCH", "1000"))
+
     # Initialize Shopify session
         session = shopify.Session(SHOPIFY_STORE_URL, SHOPIFY_API_VERSION, SHOPIFY_ACCESS_TOKEN)
         shopify.ShopifyResource.activate_session(session)
@@ -1079,9 +1113,13 @@ def main() -> int:
                     vendor=vendor,
                     inventory=inventory,
                     dry_run=dry_run,
+                    bulk_queue=bulk_queue,
                 ):
                     imported += 1
                     last_heartbeat_s = time.time()
+                if bulk_queue and len(bulk_queue) >= bulk_batch:
+                    # Queued products were counted as imported; take back the ones Shopify rejected
+                    imported -= _flush_jenni_bulk(bulk_queue)
 
             processed += 1
             # Periodically checkpoint progress so the run can resume.
@@ -1140,10 +1178,16 @@ def main() -> int:
                         vendor=vendor,
                         inventory=inventory,
                         dry_run=dry_run,
+                        bulk_queue=bulk_queue,
                     ):
                         imported += 1
+                    if bulk_queue and len(bulk_queue) >= bulk_batch:
+                        imported -= _flush_jenni_bulk(bulk_queue)
                     time.sleep(0.25)
 
+        if bulk_queue:
+            imported -= _flush_jenni_bulk(bulk_queue)
+
         print(f"\nDone. Imported {imported} Jenni product(s). Dry run: {dry_run}")
         return 0
 
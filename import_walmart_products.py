@@ -11,7 +11,7 @@ import shopify
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
@@ -37,7 +37,7 @@ session = shopify.Session(SHOPIFY_STORE_URL, API_VERSION, SHOPIFY_ACCESS_TOKEN)
 shopify.ShopifyResource.activate_session(session)
 
 # Initialize Walmart
-walmart_client = WalmartAPIClient()
+walmart_client = get_client()
 
 def calculate_price(cost):
     """
@@ -2,56 +2,55 @@ import sys
 import os
 from pathlib import Path
 import time
-import json
-import ssl
-import certifi
 from dotenv import load_dotenv
-import shopify
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
+from walmart_item import WalmartItem
+from circuit_breaker import CircuitBreaker
+from parked_work import ParkedWork
+from shopify_client import get_shopify_client
+from shopify_bulk import ShopifyBulkImporter, product_input
 
 load_dotenv()
 
-# Fix SSL Context for Shopify API
-ssl_context = ssl.create_default_context(cafile=certifi.where())
-import urllib.request
-original_urlopen = urllib.request.urlopen
-def patched_urlopen(url, data=None, timeout=None, *, cafile=None, capath=None, cadefault=False, context=None):
-    return original_urlopen(url, data, timeout, context=ssl_context)
-urllib.request.urlopen = patched_urlopen
-
 # Configuration
 SHOPIFY_STORE_URL = os.getenv("SHOPIFY_STORE_URL")
 SHOPIFY_ACCESS_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN")
-API_VERSION = "2024-01"
 AUTODS_LOCATION_ID = 80020111495  # AutoDS prod-wwbybglb
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("Error: Shopify credentials missing.")
     exit(1)
 
-# Initialize Shopify
-session = shopify.Session(SHOPIFY_STORE_URL, API_VERSION, SHOPIFY_ACCESS_TOKEN)
-shopify.ShopifyResource.activate_session(session)
+# Initialize Shopify: every worker on the host shares the store's call-limit budget
+shopify_client = get_shopify_client()
 
 # Initialize Walmart
-walmart_client = WalmartAPIClient()
+walmart_client = get_client()
+
+# Host-wide breaker shared with the other import workers: when Shopify starts
+# throttling, every worker parks its saves instead of retrying on its own
+shopify_circuit = CircuitBreaker.from_env('shopify')
 
 def get_autods_fulfillment_service():
     try:
-        services = shopify.FulfillmentService.find()
-        for s in services:
-            if s.location_id == AUTODS_LOCATION_ID:
-                print(f"✅ Found AutoDS Fulfillment Service: {s.handle}")
-                return s.handle
+        response = shopify_client.get("fulfillment_services.json", params={"scope": "all"})
+        for s in response.json().get("fulfillment_services", []):
+            if s.get("location_id") == AUTODS_LOCATION_ID:
+                print(f"✅ Found AutoDS Fulfillment Service: {s['handle']}")
+                return s
     except Exception as e:
         print(f"⚠️ Error finding fulfillment service: {e}")
     return None
 
-AUTODS_HANDLE = get_autods_fulfillment_service()
+AUTODS_SERVICE = get_autods_fulfillment_service()
+AUTODS_HANDLE = AUTODS_SERVICE['handle'] if AUTODS_SERVICE else None
+
+# Products queued per bulk mutation in --bulk mode
+BULK_BATCH_SIZE = int(os.getenv("SHOPIFY_BULK_IMPORT_BATCH", 1000))
 
 # --- WAVE 3: EXPANSION KEYWORDS ---
 # Focusing on Vacuums, Sporting Goods, and Household Items
@@ -91,50 +90,32 @@ def fetch_and_sort_items(query, category_name, max_items=500):
     """
     print(f"\n🔍 Deep Search for '{query}' (Target: Top {max_items} items)...")
     
-    all_candidates = []
-    items_per_page = 25
+    # Page offsets are known up front, so the client requests them concurrently
+    # (under the shared rate limit), stops at the first empty page and de-duplicates
+    response = walmart_client.search_pages(query, max_items=max_items)
+    if response.get('circuit_open') and not response['success']:
+        # Walmart is shedding load; the caller parks this search for later
+        return None
+    # Keep compact items only; the full dicts are dropped with the response
+    all_candidates = [WalmartItem(item) for item in response['data']['items']] if response['success'] else []
+    if response.get('error'):
+        print(f"   ⚠️ Error fetching page {response['pages_fetched'] + 1}: {response['error']}")
     
-    for page in range(0, 20): # 0 to 19
-        start_index = (page * items_per_page) + 1
-        if start_index > max_items:
-            break
-            
-        try:
-            response = walmart_client.search(query, numItems=items_per_page, start=start_index)
-            
-            if not response['success']:
-                break
-                
-            items = response['data'].get('items', [])
-            if not items:
-                break
-                
-            all_candidates.extend(items)
-            time.sleep(0.2)
-            
-        except Exception as e:
-            print(f"   ⚠️ Error fetching page {page+1}: {e}")
-            break
-            
     print(f"   📊 Analyzed {len(all_candidates)} raw items.")
     
     # --- FILTERING ---
     valid_items = []
     for item in all_candidates:
         # 1. Filter: Sold by Walmart (First Party)
-        marketplace = item.get('marketplace')
-        seller_info = item.get('sellerInfo', '')
-        is_walmart = (marketplace is False) or ("walmart" in seller_info.lower())
-        
-        if not is_walmart:
+        if not item.sold_by_walmart:
             continue
             
         # 2. Filter: In Stock
-        if item.get('stock') != 'Available':
+        if item.stock != 'Available':
             continue
             
         # 3. Filter: Has Price
-        if not item.get('salePrice'):
+        if not item.sale_price:
             continue
             
         valid_items.append(item)
@@ -142,19 +123,134 @@ def fetch_and_sort_items(query, category_name, max_items=500):
     print(f"   ✅ Found {len(valid_items)} valid 'Sold by Walmart' items.")
     
     # --- SORTING ---
-    for item in valid_items:
-        if 'numReviews' not in item:
-            item['numReviews'] = 0
-        else:
-            item['numReviews'] = int(item['numReviews'])
-            
-    sorted_items = sorted(valid_items, key=lambda x: x['numReviews'], reverse=True)
+    sorted_items = sorted(valid_items, key=lambda x: x.num_reviews, reverse=True)
     return sorted_items
 
-def import_wave3(target_category=None):
+def build_product(item, category, keyword):
+    """REST products.json payload for a Walmart item"""
+    walmart_id = str(item.item_id)
+    title = item.name
+    description = item.description
+    cost = item.sale_price
+    images = item.image_urls
+    affiliate_link = walmart_client.generate_affiliate_link(item)
+    
+    # Apply markup formula to cover fees
+    target_price = calculate_price(cost)
+    
+    variant = {
+        "price": target_price,
+        "sku": walmart_id,
+        "inventory_management": "shopify",
+        "inventory_policy": "deny",
+        "inventory_quantity": 50  # Set to 50 for all warehouses/locations
+    }
+    # If we found the AutoDS handle, use it directly
+    if AUTODS_HANDLE:
+        variant["fulfillment_service"] = AUTODS_HANDLE
+        variant["inventory_management"] = AUTODS_HANDLE
+    
+    product = {
+        "title": title,
+        # Description only, no visible affiliate link in body
+        "body_html": description,
+        "vendor": "Walmart",
+        "product_type": category,
+        "tags": f"Best-Seller, {category}, Sold-by-Walmart, {keyword}, Wave3",
+        "status": "active",
+        "variants": [variant]
+    }
+    if images:
+        product["images"] = [{"src": url} for url in images]
+    # Store the affiliate URL in metafields for downstream use
+    if affiliate_link:
+        product["metafields"] = [
+            {
+                "namespace": "walmart",
+                "key": "affiliate_url",
+                "value": affiliate_link,
+                "type": "single_line_text_field"
+            }
+        ]
+    return product
+
+def import_item(item, category, keyword):
+    """Create one Shopify product for a Walmart item; returns True if it was saved"""
+    imported = False
+    title = item.name
+    reviews = item.num_reviews
+    
+    # Paced by the store's shared call-limit bucket; 429s are retried by the client
+    response = shopify_client.post("products.json", json={"product": build_product(item, category, keyword)})
+    
+    if response.status_code == 201:
+        print(f"      ✅ Imported: {title[:40]}... (Reviews: {reviews})")
+        imported = True
+        
+        # --- UPDATE INVENTORY (Fallback if not set by fulfillment service) ---
+        if not AUTODS_HANDLE:
+            try:
+                inventory_item_id = response.json()["product"]["variants"][0]["inventory_item_id"]
+                
+                # Connect & Set AutoDS
+                shopify_client.post("inventory_levels/connect.json", json={
+                    "location_id": AUTODS_LOCATION_ID, "inventory_item_id": inventory_item_id
+                })
+                shopify_client.post("inventory_levels/set.json", json={
+                    "location_id": AUTODS_LOCATION_ID, "inventory_item_id": inventory_item_id, "available": 50
+                })
+                
+                # Disconnect others
+                levels = shopify_client.get("inventory_levels.json", params={"inventory_item_ids": inventory_item_id})
+                for level in levels.json().get("inventory_levels", []):
+                    if level["location_id"] != AUTODS_LOCATION_ID:
+                        shopify_client.delete("inventory_levels.json", params={
+                            "inventory_item_id": inventory_item_id, "location_id": level["location_id"]
+                        })
+            except Exception as inv_err:
+                print(f"         ⚠️ Failed to update AutoDS inventory: {inv_err}")
+
+    else:
+        print(f"      ❌ Failed to save {title[:30]}... ({response.status_code}: {response.text[:200]})")
+
+    return imported
+
+def bulk_import(pending):
+    """
+    Create queued (item, category, keyword) products with one staged bulk mutation
+    instead of a REST call each. Stock goes straight to the AutoDS location.
+    Returns the number created.
+    """
+    if not pending:
+        return 0
+    service_id = AUTODS_SERVICE['id'] if AUTODS_SERVICE else None
+    inputs = [
+        (str(item.item_id), product_input(build_product(item, category, keyword), AUTODS_LOCATION_ID, service_id))
+        for item, category, keyword in pending
+    ]
+    print(f"\n   📦 Bulk importing {len(inputs)} products...")
+    try:
+        results = ShopifyBulkImporter.from_env(shopify_client).import_products(inputs)
+    except Exception as e:
+        print(f"   ❌ Bulk import failed: {e}")
+        return 0
+    
+    created = 0
+    for walmart_id, result in results.items():
+        if result['product_id']:
+            created += 1
+        else:
+            print(f"      ❌ {walmart_id}: {'; '.join(result['errors'])}")
+    print(f"   ✅ Bulk import created {created}/{len(inputs)} products")
+    return created
+
+def import_wave3(target_category=None, bulk=False):
     print("🚀 Starting Wave 3: 'Expansion' (Vacuums, Sports, Household)...")
     
     total_imported = 0
+    # Searches refused by the Walmart circuit and items refused or throttled by Shopify
+    parked = ParkedWork.from_env(fetch_and_sort_items, import_item, walmart_client.circuit, shopify_circuit)
+    bulk_pending = []          # --bulk: items waiting for the next bulk mutation
     
     for category, keywords in EXPANSION_KEYWORDS.items():
         if target_category and category != target_category:
@@ -165,6 +261,10 @@ def import_wave3(target_category=None):
         
         for keyword in keywords:
             top_items = fetch_and_sort_items(keyword, category)
+            if top_items is None:
+                print(f"   ⏸️ Walmart circuit open; parking '{keyword}' for later")
+                parked.park_search(category, keyword)
+                continue
             
             if not top_items:
                 print(f"   ⚠️ No valid items found for '{keyword}'")
@@ -172,107 +272,22 @@ def import_wave3(target_category=None):
                 
             print(f"   🏆 Importing Top {len(top_items)} Best Sellers for '{keyword}'...")
             
+            if bulk:
+                bulk_pending.extend((item, category, keyword) for item in top_items)
+                if len(bulk_pending) >= BULK_BATCH_SIZE:
+                    total_imported += bulk_import(bulk_pending)
+                    bulk_pending = []
+                continue
+            
             for item in top_items:
-                try:
-                    walmart_id = str(item['itemId'])
-                    title = item.get('name')
-                    description = item.get('longDescription') or item.get('shortDescription') or ""
-                    cost = item.get('salePrice')
-                    images = item.get('imageEntities', [])
-                    reviews = item.get('numReviews')
-                    affiliate_link = walmart_client.generate_affiliate_link(item)
-                    
-                    target_price = calculate_price(cost)
-                    
-                    # Create in Shopify
-                    product = shopify.Product()
-                    product.title = title
-                    # Description only, no visible affiliate link in body
-                    product.body_html = description
-                    product.vendor = "Walmart"
-                    product.product_type = category
-                    product.tags = f"Best-Seller, {category}, Sold-by-Walmart, {keyword}, Wave3"
-                    product.status = "active"
-                    
-                    if images:
-                        product.images = [{"src": img.get('largeImage')} for img in images if img.get('largeImage')]
-                    elif item.get('largeImage'):
-                         product.images = [{"src": item.get('largeImage')}]
-
-                    variant = shopify.Variant()
-                    variant.price = target_price
-                    variant.sku = walmart_id
-                    variant.inventory_management = "shopify"
-                    
-                    # If we found the AutoDS handle, use it directly
-                    if AUTODS_HANDLE:
-                        variant.fulfillment_service = AUTODS_HANDLE
-                        variant.inventory_management = AUTODS_HANDLE
-                    
-                    variant.inventory_policy = "deny"
-                    variant.inventory_quantity = 50 
-                    
-                    if affiliate_link:
-                        product.metafields = [
-                            {
-                                "namespace": "walmart",
-                                "key": "affiliate_url",
-                                "value": affiliate_link,
-                                "type": "single_line_text_field"
-                            }
-                        ]
-                    
-                    product.variants = [variant]
-                    
-                    if product.save():
-                        print(f"      ✅ Imported: {title[:40]}... (Reviews: {reviews})")
-                        total_imported += 1
-                        
-                        # --- UPDATE INVENTORY (Fallback if not set by fulfillment service) ---
-                        if not AUTODS_HANDLE:
-                            try:
-                                # Reload product to get variant ID and inventory_item_id
-                                product.reload()
-                                variant = product.variants[0]
-                                inventory_item_id = variant.inventory_item_id
-                                
-                                # 1. Connect AutoDS Location
-                                shopify.InventoryLevel.connect(
-                                    location_id=AUTODS_LOCATION_ID,
-                                    inventory_item_id=inventory_item_id
-                                )
-                                
-                                # 2. Set AutoDS Inventory to 50
-                                shopify.InventoryLevel.set(
-                                    location_id=AUTODS_LOCATION_ID,
-                                    inventory_item_id=inventory_item_id,
-                                    available=50
-                                )
-                                
-                                # 3. Disconnect Default Location
-                                levels = shopify.InventoryLevel.find(inventory_item_ids=inventory_item_id)
-                                for level in levels:
-                                    if level.location_id != AUTODS_LOCATION_ID:
-                                        shopify.InventoryLevel.delete(
-                                            inventory_item_id=inventory_item_id,
-                                            location_id=level.location_id
-                                        )
-                                
-                            except Exception as inv_err:
-                                print(f"         ⚠️ Failed to update AutoDS inventory: {inv_err}")
-                            
-                    else:
-                        print(f"      ❌ Failed to save {title[:30]}...")
-                        
-                    # Rate limit Shopify (Increased to 10s to avoid 429 errors with parallel workers)
-                    time.sleep(10)
-                    
-                except Exception as e:
-                    if "429" in str(e):
-                        print(f"      ⚠️ Rate limit hit. Sleeping for 30s...")
-                        time.sleep(30)
-                    else:
-                        print(f"      ❌ Error importing item: {e}")
+                # Parked instead of sent while the Shopify circuit is open
+                total_imported += parked.import_item(item, category, keyword)
+    
+    total_imported += bulk_import(bulk_pending)
+    
+    if parked:
+        print(f"\n⏸️ Resuming parked work: {len(parked.keywords)} searches, {len(parked.items)} imports")
+        total_imported += parked.resume()
                     
     print(f"\n✨ Wave 3 Complete! Total Expansion Items Imported: {total_imported}")
 
@@ -280,6 +295,8 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Import Walmart Wave 3 Expansion")
     parser.add_argument("--category", type=str, help="Specific category to import")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Create products with staged bulk mutations instead of one REST call each")
     args = parser.parse_args()
     
-    import_wave3(target_category=args.category)
+    import_wave3(target_category=args.category, bulk=args.bulk)
@@ -18,7 +18,7 @@ from typing import Dict, List, Optional
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 class MicroWarehouseSystem:
     """
@@ -26,7 +26,7 @@ class MicroWarehouseSystem:
     """
     
     def __init__(self):
-        self.walmart_api = WalmartAPIClient()
+        self.walmart_api = get_client()
         self.inventory_db = {}  # In real implementation, use proper database
         self.profit_targets = {
             'minimum_roi': 0.30,  # 30% ROI minimum
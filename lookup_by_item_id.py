@@ -5,7 +5,7 @@ from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def main():
     if len(sys.argv) < 2:
@@ -18,7 +18,7 @@ def main():
         sys.exit(1)
     postal = sys.argv[2] if len(sys.argv) > 2 else None
 
-    api = WalmartAPIClient()
+    api = get_client()
     resp = api.get_items_by_ids([item_id], postal_code=postal)
     if not resp.get('success'):
         print("Error:", resp.get('error'))
@@ -68,7 +68,7 @@ def main():
     
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Test Walmart API batch sizes')
-    parser.add_argument('--mode', choices=['standard', 'limits', 'category'], 
+    parser.add_argument('--mode', choices=['standard', 'limits', 'category', 'pagination'], 
                        default='standard', help='Testing mode')
     parser.add_argument('--category', type=str, help='Category ID to test with')
     parser.add_argument('--iterations', type=int, default=1, 
@@ -77,6 +77,10 @@ def main():
                        help='Custom batch sizes (comma-separated)')
     parser.add_argument('--no-charts', action='store_true', 
                        help='Skip chart generation')
+    parser.add_argument('--page-size', type=int, default=100,
+                       help='Items per page for pagination mode')
+    parser.add_argument('--max-pages', type=int, default=10,
+                       help='Pages to crawl in pagination mode')
     
     args = parser.parse_args()
     
@@ -112,6 +116,14 @@ def main():
             print("🔍 Testing maximum API limits...")
             tester.test_maximum_limits()
             
+        elif args.mode == 'pagination':
+            print("📄 Testing paginated crawl throughput...")
+            tester.run_pagination_test(
+                category=args.category,
+                page_size=args.page_size,
+                max_pages=args.max_pages
+            )
+            
         elif args.mode == 'category':
             categories = config.get_test_categories()
             if not categories:
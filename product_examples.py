@@ -9,14 +9,14 @@ from pathlib import Path
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def show_product_examples():
     """Show examples of different product types"""
     print("🛍️  WALMART PRODUCT EXAMPLES")
     print("=" * 50)
     
-    client = WalmartAPIClient()
+    client = get_client()
     
     # Get several products to show variety
     result = client.get_products(count=10)
@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
@@ -102,7 +102,7 @@ def create_shopify_product(item):
         return False
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     queries = [
         "PlayStation 5 Console",
@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def main():
     print("🧪 Quick Walmart API Test")
@@ -28,7 +28,7 @@ def main():
     
     try:
         # Create API client
-        client = WalmartAPIClient()
+        client = get_client()
         
         print("🔍 Testing API connection with 5 items...")
         
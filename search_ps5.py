@@ -6,10 +6,10 @@ import json
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     # Try searching with 'keyword' parameter which is common for affiliate APIs
     print("Searching for 'PlayStation 5 Disc Console Slim with NBA 2K26'...")
@@ -81,18 +81,16 @@ def main():
         if item_ids:
             print(f"Fetching details for {len(item_ids)} items to check seller and stock...")
             
-            # Batch requests in chunks of 20
-            chunk_size = 20
+            # The client batches the IDs in chunks of 20 and fetches them concurrently
             all_detailed_items = []
+            details_response = client.get_items_by_ids(ids=item_ids)
             
-            for i in range(0, len(item_ids), chunk_size):
-                chunk = item_ids[i:i + chunk_size]
-                details_response = client.get_items_by_ids(ids=chunk)
-                
-                if details_response['success']:
-                    all_detailed_items.extend(details_response['data'].get('items', []))
-                else:
-                    print(f"Failed to get details for batch {i}: {details_response.get('error')}")
+            if details_response['success']:
+                all_detailed_items.extend(details_response['data'].get('items', []))
+            else:
+                print(f"Failed to get details: {details_response.get('error')}")
+            for error in details_response.get('errors', []):
+                print(f"Failed to get details for a batch: {error}")
 
             walmart_sold_count = 0
             
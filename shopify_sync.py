@@ -2,7 +2,9 @@ import requests
 import json
 import time
 import os
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
+from src.shopify_bulk import BulkOperationError, export_products
+from src.shopify_client import ShopifyAPIError
 
 # ------------------------------------------------------------------------------
 # CONFIGURATION
@@ -20,7 +22,7 @@ class ShopifySyncBot:
         if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
             raise ValueError("❌ Missing Shopify credentials in .env file!")
             
-        self.walmart = WalmartAPIClient()
+        self.walmart = get_client()
         self.base_url = f"https://{SHOPIFY_STORE_URL}/admin/api/{SHOPIFY_API_VERSION}"
         self.headers = {
             "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
@@ -30,32 +32,13 @@ class ShopifySyncBot:
     def get_all_shopify_products(self):
         """Fetch all products from Shopify that are tagged 'Source:Walmart'"""
         print("📥 Fetching products from Shopify...")
-        products = []
-        url = f"{self.base_url}/products.json?limit=250&fields=id,title,variants,tags"
-        
-        while url:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                print(f"Error fetching Shopify products: {response.text}")
-                break
-                
-            data = response.json()
-            batch = data.get('products', [])
-            
-            # Filter for Walmart products
-            for p in batch:
-                if "Source:Walmart" in p.get('tags', ''):
-                    products.append(p)
-            
-            # Pagination
-            link = response.headers.get('Link')
-            url = None
-            if link:
-                # Parse the 'next' link from headers
-                links = link.split(',')
-                for l in links:
-                    if 'rel="next"' in l:
-                        url = l.split(';')[0].strip('<> ')
+        # One bulk export filtered server-side by tag, instead of paging the whole catalog
+        try:
+            products = [p for p in export_products("tag:'Source:Walmart'")
+                        if "Source:Walmart" in p.get('tags', '')]
+        except (BulkOperationError, ShopifyAPIError) as e:
+            print(f"❌ Error fetching products: {e}")
+            return []
         
         print(f"✅ Found {len(products)} Walmart-sourced products in Shopify.")
         return products
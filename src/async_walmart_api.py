@@ -0,0 +1,560 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from functools import partial
+from typing import Dict, Optional, List, Any, Tuple
+
+import aiohttp
+
+try:
+    from .rate_limiter import parse_retry_after
+    from .circuit_breaker import CircuitOpenError
+    from .credential_pool import WalmartCredential
+    from .response_cache import ResponseCache
+    from .single_flight import AsyncSingleFlight
+    from . import json_codec
+    from .walmart_api import WalmartAPIClient, get_client
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from rate_limiter import parse_retry_after
+    from circuit_breaker import CircuitOpenError
+    from credential_pool import WalmartCredential
+    from response_cache import ResponseCache
+    from single_flight import AsyncSingleFlight
+    import json_codec
+    from walmart_api import WalmartAPIClient, get_client
+
+
+class AsyncWalmartAPIClient:
+    """
+    asyncio counterpart to WalmartAPIClient.
+    Reuses the sync client's signing and parameter building, bounds in-flight
+    requests with a semaphore and returns the same result-dict shapes so callers
+    can migrate one at a time. The sync client's blocking steps (RSA signing,
+    flock'd limiter/circuit files, the SQLite response cache) run in the loop's
+    default executor so they never stall other coroutines.
+    """
+
+    def __init__(self,
+                 max_concurrency: Optional[int] = None,
+                 client: Optional[WalmartAPIClient] = None):
+        # The sync client owns credentials, header signing and param building
+        self.client = client or get_client()
+        self.logger = self.client.logger
+        self.max_concurrency = max_concurrency or int(os.getenv('ASYNC_MAX_CONCURRENCY', 50))
+
+        # Created lazily so they bind to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Concurrent identical requests share one network call
+        self.single_flight = AsyncSingleFlight()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying aiohttp session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        # Bound to this event loop; the next loop that uses the client makes its own
+        self._semaphore = None
+
+    @staticmethod
+    async def _blocking(fn, *args, **kwargs):
+        """Run a blocking sync-client call in the default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(fn, *args, **kwargs))
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.client.timeout)
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _pace(self) -> WalmartCredential:
+        """Reserve the least-loaded credential and wait for its shared rate limiter"""
+        reservation = asyncio.get_running_loop().run_in_executor(None, self.client.credentials.reserve)
+        try:
+            credential, wait = await asyncio.shield(reservation)
+        except asyncio.CancelledError:
+            # The reservation still lands in the executor; hand it back once it does
+            reservation.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or self.client.credentials.cancel(f.result()[0])
+            )
+            raise
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.client.credentials.cancel(credential)
+                raise
+        return credential
+
+    async def _fetch(self,
+                     url: str,
+                     params: Dict[str, Any],
+                     credential: Optional[WalmartCredential] = None) -> Tuple[int, bytes, float, Dict[str, str], Dict[str, str]]:
+        """
+        Issue one signed GET under the concurrency limit, paced by the least-loaded
+        credential's shared rate limiter (or with `credential` when the caller
+        already reserved one).
+
+        Returns:
+            (status code, raw body, elapsed seconds, headers sent, response headers)
+        """
+        session = self._get_session()
+        query = {k: str(v) for k, v in params.items() if v is not None}
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            if credential is not None:
+                self.client.credentials.cancel(credential)
+            raise
+        try:
+            if credential is None:
+                credential = await self._pace()
+            status, retry_after = None, None
+            try:
+                if self.client.circuit:
+                    await self._blocking(self.client.circuit.check)
+                headers = await self._blocking(self.client._get_headers, credential)
+                timeout = self.client._timeout_for(url)
+                if self.client.hedge_budget:
+                    self.client.hedge_budget.on_request()
+                start_time = time.time()
+                try:
+                    async with session.get(url, headers=headers, params=query,
+                                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        body = await response.read()
+                        elapsed = time.time() - start_time
+                except asyncio.TimeoutError:
+                    await self._blocking(self.client._observe_response, url, None, timeout)
+                    raise
+                except aiohttp.ClientError:
+                    await self._blocking(self.client._observe_response, url, None, None)
+                    raise
+                status = response.status
+                if status == 429:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except (CircuitOpenError, asyncio.CancelledError):
+                # Never sent, or a hedge loser: the outcome says nothing about the credential
+                self.client.credentials.cancel(credential)
+                raise
+            except Exception:
+                await self._blocking(self.client._release_credential, credential, None, None)
+                raise
+            await self._blocking(self.client._release_credential, credential, status, retry_after)
+        finally:
+            self._semaphore.release()
+        await self._blocking(self.client._observe_response, url, status, elapsed, len(body), params)
+        return status, body, elapsed, headers, dict(response.headers)
+
+    async def _fetch_hedged(self, url: str, params: Dict[str, Any]) -> Tuple[int, bytes, float, Dict[str, str], Dict[str, str]]:
+        """
+        Async mirror of WalmartAPIClient._send_hedged: after the endpoint's p95
+        latency, race a duplicate request (within the hedge budget) and cancel the loser.
+        """
+        budget = self.client.hedge_budget
+        delay = self.client.latency.percentile(self.client._endpoint_for(url), 95) if budget else None
+        if delay is None:
+            return await self._fetch(url, params)
+
+        # Pace the primary here so time spent queueing on the limiter does not trigger hedges
+        credential = await self._pace()
+        primary = asyncio.ensure_future(self._fetch(url, params, credential))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not budget.try_take():
+                return await primary
+
+            self.client._bump('hedged_requests')
+            hedge = asyncio.ensure_future(self._fetch(url, params))
+            tasks.add(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.client._bump('hedge_wins')
+                        return task.result()
+            # Both attempts failed; surface the primary's error to the caller's retry loop
+            return primary.result()
+        finally:
+            # Cancel the losing request (or both, if the caller was cancelled)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _coalesce(self, key: str, fetch):
+        """Await fetch() once for concurrent callers with the same request key"""
+        result, shared = await self.single_flight.do(key, fetch)
+        if shared:
+            self.client._bump('coalesced_requests')
+        return result
+
+    async def _wait_after_throttle(self, response_headers: Dict[str, str], attempt: int) -> float:
+        """Async mirror of WalmartAPIClient._wait_after_throttle"""
+        pool = self.client.credentials
+        if len(pool) > 1 and not pool.all_sidelined():
+            # The throttled credential is sidelined; the retry goes to another one
+            return 0.0
+        wait_time = parse_retry_after(response_headers.get('Retry-After'))
+        if wait_time is None:
+            wait_time = 2 ** attempt
+        if self.client.rate_limiter:
+            await self._blocking(self.client.rate_limiter.penalize, wait_time)
+        else:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    async def _fetch_item_batches(self,
+                                  fetch_batch,
+                                  kind: str,
+                                  values: List[Any],
+                                  key_fields: Tuple[str, ...],
+                                  postal_code: Optional[str],
+                                  extra_params: Optional[Dict[str, Any]],
+                                  use_cache: bool,
+                                  static_only: bool) -> Dict[str, Any]:
+        """
+        Serve what we can from the response cache, fetch the rest in endpoint-sized
+        batches concurrently and merge everything in input order.
+        """
+        start_time = time.time()
+        cached_items, to_fetch = await self._blocking(
+            self.client._lookup_cached_items, kind, values, postal_code, extra_params, use_cache, static_only
+        )
+
+        def _fetch(batch: List[Any]):
+            key = ResponseCache.make_key(
+                f'{self.client.items_by_ids_url}#{kind}',
+                dict(extra_params or {}, values=','.join(str(v) for v in batch), postalCode=postal_code)
+            )
+            return self._coalesce(key, lambda: fetch_batch(batch))
+
+        results: List[Dict[str, Any]] = []
+        if to_fetch:
+            results = list(await asyncio.gather(*(_fetch(batch) for batch in self.client._chunk(to_fetch, self.client.batch_tuner.size('ids')))))
+            await self._blocking(self.client._store_items, kind, key_fields, results, postal_code, extra_params)
+
+        if cached_items:
+            results.append({'success': True, 'data': {'items': cached_items}})
+        merged = self.client._merge_item_batches(values, results, key_fields, time.time() - start_time)
+        merged['cache_hits'] = len(values) - len(to_fetch)
+        if any(r.get('circuit_open') for r in results):
+            merged['circuit_open'] = True
+        return merged
+
+    async def get_items_by_ids(self,
+                               ids: List[int],
+                               postal_code: Optional[str] = None,
+                               extra_params: Optional[Dict[str, Any]] = None,
+                               use_cache: bool = True,
+                               static_only: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve product details by Walmart item IDs, any number at a time.
+        See WalmartAPIClient.get_items_by_ids for arguments and result shape.
+        """
+        if not ids:
+            return {
+                'success': False,
+                'error': 'No item IDs provided'
+            }
+
+        return await self._fetch_item_batches(
+            lambda batch: self._fetch_items_by_ids_batch(batch, postal_code, extra_params),
+            'item', ids, ('itemId',), postal_code, extra_params, use_cache, static_only
+        )
+
+    async def _fetch_items_by_ids_batch(self,
+                                        ids: List[int],
+                                        postal_code: Optional[str] = None,
+                                        extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch a single batch (at most MAX_ITEMS_PER_REQUEST) of item IDs"""
+        params = self.client._build_items_params('ids', ids, postal_code, extra_params)
+        max_retries = self.client.max_retries
+
+        start_time = time.time()
+        for attempt in range(max_retries):
+            try:
+                self.logger.debug(f"Fetching {len(ids)} items by IDs (attempt {attempt + 1})")
+                status, body, _, _, response_headers = await self._fetch_hedged(self.client.items_by_ids_url, params)
+                response_time = time.time() - start_time
+
+                if status == 200:
+                    return {
+                        'success': True,
+                        'data': {
+                            'items': self.client._normalize_items(json_codec.loads(body))
+                        },
+                        'response_time': response_time
+                    }
+
+                error_text = body.decode('utf-8', errors='replace')
+                self.logger.error(f"API error: {status} - {error_text[:300]}")
+                if status == 429 and attempt < max_retries - 1:
+                    await self._wait_after_throttle(response_headers, attempt)
+                    continue
+                if status >= 500 and attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                return {
+                    'success': False,
+                    'error': f"Status {status}: {error_text}"
+                }
+            except CircuitOpenError as e:
+                return self.client._circuit_open_result(e)
+            except Exception as e:
+                self.logger.error(f"Request failed: {str(e)}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+
+    async def get_items_by_upc(self,
+                               upcs: List[str],
+                               postal_code: Optional[str] = None,
+                               extra_params: Optional[Dict[str, Any]] = None,
+                               use_cache: bool = True,
+                               static_only: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve product details by UPC/GTIN codes, any number at a time.
+        Tries the learned parameter form first; see WalmartAPIClient.get_items_by_upc.
+        """
+        if not upcs:
+            return {'success': False, 'error': 'No UPCs provided'}
+
+        return await self._fetch_item_batches(
+            lambda batch: self._fetch_items_by_upc_batch(batch, postal_code, extra_params),
+            'upc', upcs, ('upc', 'gtin'), postal_code, extra_params, use_cache, static_only
+        )
+
+    async def _fetch_items_by_upc_batch(self,
+                                        upcs: List[str],
+                                        postal_code: Optional[str] = None,
+                                        extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch a single batch (at most MAX_ITEMS_PER_REQUEST) of UPC/GTIN codes"""
+        async def _request_with(param_name: str) -> Dict[str, Any]:
+            params = self.client._build_items_params(param_name, upcs, postal_code, extra_params)
+            try:
+                self.logger.debug(f"Fetching {len(upcs)} items by {param_name} (batch)")
+                status, body, rt, _, _ = await self._fetch_hedged(self.client.items_by_ids_url, params)
+                if status == 200:
+                    items = self.client._normalize_items(json_codec.loads(body))
+                    return {'success': True, 'data': {'items': items}, 'response_time': rt}
+                return {'success': False, 'error': f"Status {status}: {body.decode('utf-8', errors='replace')}"}
+            except CircuitOpenError as e:
+                return self.client._circuit_open_result(e)
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        res: Dict[str, Any] = {}
+        for param_name in await self._blocking(self.client._upc_param_order):
+            res = await _request_with(param_name)
+            if res.get('success'):
+                await self._blocking(self.client._learn_upc_param, param_name)
+                return res
+            if res.get('circuit_open'):
+                return res
+            self.logger.info(f"'{param_name}' param failed; trying the other form")
+            self.client._bump('upc_param_fallbacks')
+        return res
+
+    async def get_products(self,
+                           count: Optional[int] = None,
+                           category: Optional[str] = None,
+                           brand: Optional[str] = None,
+                           special_offer: Optional[str] = None,
+                           use_cache: bool = True,
+                           static_only: bool = False,
+                           **kwargs) -> Dict[str, Any]:
+        """
+        Retrieve products from the paginated items endpoint.
+        See WalmartAPIClient.get_products for arguments and result shape.
+        """
+        if count is None:
+            count = self.client.batch_tuner.size('products')
+        params = self.client._build_params(
+            count=count,
+            category=category,
+            brand=brand,
+            specialOffer=special_offer,
+            **kwargs
+        )
+
+        cache_key = ResponseCache.make_key(self.client.base_url, params)
+        cached = await self._blocking(self.client._lookup_cached_page, cache_key, use_cache, static_only)
+        if cached is not None:
+            metadata = self.client._products_metadata(cached, 0.0, 0, count, 200, {}, params)
+            metadata['cache_hit'] = True
+            return {
+                'data': cached,
+                'metadata': metadata,
+                'success': True,
+                'error': None
+            }
+
+        return await self._coalesce(cache_key, lambda: self._fetch_products_page(count, params, cache_key))
+
+    async def _fetch_products_page(self, count: int, params: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """Network half of get_products: request one page with retries and cache it"""
+        max_retries = self.client.max_retries
+        start_time = time.time()
+        for attempt in range(max_retries):
+            try:
+                self.logger.debug(f"Making API request (attempt {attempt + 1}) with count={count}")
+                status, body, _, headers, response_headers = await self._fetch(self.client.base_url, params)
+                response_time = time.time() - start_time
+
+                if status == 200:
+                    data = json_codec.loads(body)
+                    metadata = self.client._products_metadata(
+                        data, response_time, len(body), count, status, headers, params
+                    )
+                    self.logger.debug(f"Successfully retrieved {len(data.get('items', []))} items")
+                    if self.client.response_cache:
+                        await self._blocking(self.client.response_cache.put, cache_key, data)
+                    return {
+                        'data': data,
+                        'metadata': metadata,
+                        'success': True,
+                        'error': None
+                    }
+
+                error_text = body.decode('utf-8', errors='replace')
+                self.logger.warning(f"API returned status code: {status}")
+                self.logger.warning(f"Response content: {error_text[:500]}")
+
+                if status == 429:  # Rate limited
+                    wait_time = await self._wait_after_throttle(response_headers, attempt)
+                    self.logger.info(f"Rate limited. Waiting {wait_time}s before retry...")
+                    continue
+
+                return {
+                    'data': None,
+                    'metadata': {
+                        'request_time': datetime.now().isoformat(),
+                        'response_time_seconds': time.time() - start_time,
+                        'requested_count': count,
+                        'status_code': status,
+                        'error_response': error_text
+                    },
+                    'success': False,
+                    'error': f"HTTP {status}: {error_text}"
+                }
+
+            except CircuitOpenError as e:
+                return self.client._circuit_open_result(e)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.logger.error(f"Request exception on attempt {attempt + 1}: {str(e)}")
+                if attempt == max_retries - 1:
+                    return {
+                        'data': None,
+                        'metadata': {
+                            'request_time': datetime.now().isoformat(),
+                            'requested_count': count,
+                            'error': str(e)
+                        },
+                        'success': False,
+                        'error': f"Request failed after {max_retries} attempts: {str(e)}"
+                    }
+                await asyncio.sleep(2 ** attempt)
+
+            await asyncio.sleep(self.client.delay)
+
+        return {
+            'data': None,
+            'metadata': {
+                'request_time': datetime.now().isoformat(),
+                'requested_count': count
+            },
+            'success': False,
+            'error': f"Failed after {max_retries} attempts"
+        }
+
+    async def search(self, query: str, use_cache: bool = True, static_only: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Search for products using the Search API
+        """
+        params = self.client._build_search_params(query, **kwargs)
+
+        cache_key = ResponseCache.make_key(self.client.search_url, params)
+        cached = await self._blocking(self.client._lookup_cached_page, cache_key, use_cache, static_only)
+        if cached is not None:
+            return {
+                'success': True,
+                'data': cached,
+                'cache_hit': True
+            }
+
+        return await self._coalesce(cache_key, lambda: self._fetch_search_page(query, params, cache_key))
+
+    async def _fetch_search_page(self, query: str, params: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """Network half of search: request one page and cache it"""
+        try:
+            self.logger.debug(f"Searching for: {query}")
+            status, body, _, _, _ = await self._fetch_hedged(self.client.search_url, params)
+            if status == 200:
+                data = json_codec.loads(body)
+                if self.client.response_cache:
+                    await self._blocking(self.client.response_cache.put, cache_key, data)
+                return {
+                    'success': True,
+                    'data': data
+                }
+            return {
+                'success': False,
+                'error': f"Status {status}: {body.decode('utf-8', errors='replace')}"
+            }
+        except CircuitOpenError as e:
+            return self.client._circuit_open_result(e)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    async def search_pages(self,
+                           query: str,
+                           max_items: int = 500,
+                           concurrency: Optional[int] = None,
+                           page_size: Optional[int] = None,
+                           **kwargs) -> Dict[str, Any]:
+        """
+        Deep search with concurrent page offsets.
+        See WalmartAPIClient.search_pages for arguments and result shape.
+        """
+        page_size = page_size or self.client.batch_tuner.size('search')
+        offsets = self.client._search_offsets(max_items, page_size)
+        workers = max(1, concurrency or self.client.search_page_concurrency)
+
+        pages: List[Dict[str, Any]] = []
+        for i in range(0, len(offsets), workers):
+            wave = await asyncio.gather(*(
+                self.search(query, numItems=page_size, start=start, **kwargs)
+                for start in offsets[i:i + workers]
+            ))
+            pages.extend(wave)
+            if any(not p.get('success') or not p['data'].get('items') for p in wave):
+                break
+
+        result = self.client._merge_search_pages(pages)
+        if result['success']:
+            result['data']['items'] = result['data']['items'][:max_items]
+        if any(p.get('circuit_open') for p in pages):
+            result['circuit_open'] = True
+        return result
@@ -8,7 +8,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
-from walmart_api import WalmartAPIClient
+try:
+    from .walmart_api import get_client
+    from .batch_tuner import save_profile, profile_path
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from walmart_api import get_client
+    from batch_tuner import save_profile, profile_path
 
 class BatchTester:
     """
@@ -16,7 +21,7 @@ class BatchTester:
     """
     
     def __init__(self, results_dir: str = "results"):
-        self.api_client = WalmartAPIClient()
+        self.api_client = get_client()
         self.results_dir = Path(results_dir)
         self.results_dir.mkdir(exist_ok=True)
         
@@ -29,9 +34,11 @@ class BatchTester:
         print(f"\n🧪 Testing batch size: {count} items")
         
         start_time = time.time()
+        # Always hit the network: a cached page would report a meaningless response time
         result = self.api_client.get_products(
             count=count,
-            category=category
+            category=category,
+            use_cache=False
         )
         
         if result['success']:
@@ -182,6 +189,15 @@ class BatchTester:
             print(f"   Requested: {max_successful} items")
             print(f"   Actually Retrieved: {max_items} items")
             
+            # Seed the client's runtime batch tuner with what we measured
+            save_profile(
+                'products',
+                optimal=int(optimal['requested_count']),
+                max=int(max_successful),
+                latency_target=round(max(1.0, optimal['response_time'] * 2), 2)
+            )
+            print(f"\n💾 Tuning profile updated: {profile_path()}")
+            
             # Create visualizations
             self._create_visualizations(df)
     
@@ -245,6 +261,37 @@ class BatchTester:
         
         plt.show()
     
+    def run_pagination_test(self, category: str = None, page_size: int = 100, max_pages: int = 10):
+        """Crawl consecutive pages via nextPage cursors and report sustained throughput"""
+        print(f"\n📄 Testing paginated crawl: {max_pages} pages of {page_size} items")
+        
+        start_time = time.time()
+        cursor = self.api_client.iter_products(
+            category=category,
+            page_size=page_size,
+            max_items=page_size * max_pages,
+            use_cache=False
+        )
+        items = sum(1 for _ in cursor)
+        elapsed = time.time() - start_time
+        throughput = items / elapsed if elapsed > 0 else 0
+        
+        if cursor.error:
+            print(f"❌ Stopped after {cursor.pages_fetched} pages: {cursor.error}")
+        print(f"✅ {items} items from {cursor.pages_fetched} pages in {elapsed:.2f}s")
+        print(f"   Throughput: {throughput:.2f} items/second")
+        print(f"   Resume token: {cursor.resume_token}")
+        
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'page_size': page_size,
+            'pages_fetched': cursor.pages_fetched,
+            'items': items,
+            'elapsed_seconds': elapsed,
+            'throughput_items_per_second': throughput,
+            'error': cursor.error
+        }
+    
     def test_maximum_limits(self):
         """Test to find the absolute maximum batch size supported"""
         print("\n🔍 Testing Maximum Batch Size Limits")
@@ -268,6 +315,7 @@ class BatchTester:
         
         if max_working_size > 0:
             print(f"\n🎯 Maximum working batch size: {max_working_size} items")
+            save_profile('products', max=max_working_size)
         else:
             print(f"\n⚠️ Could not determine maximum batch size")
         
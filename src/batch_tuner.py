@@ -0,0 +1,155 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+try:
+    from .client_state import ClientState
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from client_state import ClientState
+
+# Per endpoint: (minimum, hard maximum or None, starting size without a profile).
+# 'products' is count on the paginated items endpoint, 'search' is numItems,
+# 'ids' is ids/upcs per items request. Without a measured max from the profile
+# the starting size is also the ceiling.
+ENDPOINT_LIMITS = {
+    'products': (1, None, 100),
+    'search': (1, 25, 25),
+    'ids': (1, 20, 20)
+}
+
+# Endpoints whose batch shrinks on a 429. Throttling is per request, so for the
+# fixed-size lookups a smaller batch only means more requests for the same items;
+# those shrink on errors and latency alone.
+THROTTLE_SHRINKS = {'products'}
+
+
+class AIMDTuner:
+    """
+    Additive-increase / multiplicative-decrease controller for one batch size.
+
+    Every successful response that arrives within latency_target grows the size
+    by `step`; an error or a slower response multiplies it by `decrease`. The
+    size therefore settles just under whatever the API currently tolerates and
+    backs off quickly when it starts throttling or slowing down.
+    """
+
+    def __init__(self,
+                 initial: int,
+                 minimum: int,
+                 maximum: int,
+                 latency_target: float,
+                 step: Optional[int] = None,
+                 decrease: float = 0.5):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.latency_target = latency_target
+        self.step = step or max(1, self.maximum // 20)
+        self.decrease = decrease
+        self._size = float(min(self.maximum, max(self.minimum, initial)))
+        self.initial = self.size
+        self._lock = threading.Lock()
+
+        # Exponentially weighted averages, for reporting
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+
+    @property
+    def size(self) -> int:
+        return int(self._size)
+
+    def record(self, success: bool, latency: Optional[float] = None):
+        """Feed one request outcome into the controller"""
+        with self._lock:
+            self.error_rate = 0.8 * self.error_rate + 0.2 * (0.0 if success else 1.0)
+            if success and latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            if not success or (latency is not None and latency > self.latency_target):
+                self._size = max(self.minimum, self._size * self.decrease)
+            else:
+                self._size = min(self.maximum, self._size + self.step)
+
+
+class BatchTuner:
+    """
+    Batch sizes for each Walmart endpoint, seeded from the tuning profile that
+    BatchTester writes and adapted at runtime with one AIMDTuner per endpoint.
+    Profile entries look like {'optimal': 100, 'max': 1000, 'latency_target': 4.0}.
+    """
+
+    def __init__(self, profile: ClientState, latency_target: float = 5.0, adaptive: bool = True):
+        self.profile = profile
+        self.adaptive = adaptive
+        self.tuners: Dict[str, AIMDTuner] = {}
+        for endpoint, (minimum, hard_max, default) in ENDPOINT_LIMITS.items():
+            measured = profile.get(endpoint) or {}
+            maximum = int(measured.get('max') or hard_max or default)
+            if hard_max is not None:
+                maximum = min(maximum, hard_max)
+            self.tuners[endpoint] = AIMDTuner(
+                initial=int(measured.get('optimal') or default),
+                minimum=minimum,
+                maximum=maximum,
+                latency_target=float(measured.get('latency_target') or latency_target)
+            )
+
+    @classmethod
+    def from_env(cls) -> 'BatchTuner':
+        """
+        Build from WALMART_TUNING_PROFILE (JSON written by BatchTester),
+        WALMART_TUNER_LATENCY_TARGET and WALMART_TUNER_ADAPTIVE
+        """
+        return cls(
+            profile=ClientState(profile_path()),
+            latency_target=float(os.getenv('WALMART_TUNER_LATENCY_TARGET', 5)),
+            adaptive=os.getenv('WALMART_TUNER_ADAPTIVE', 'true').lower() in ('1', 'true', 'yes')
+        )
+
+    def size(self, endpoint: str) -> int:
+        """Current batch size for an endpoint ('products', 'search' or 'ids')"""
+        return self.tuners[endpoint].size
+
+    def record(self, endpoint: str, success: bool, latency: Optional[float] = None, throttled: bool = False):
+        """
+        Feed one response into the endpoint's tuner. A throttled (429) response
+        is ignored for endpoints outside THROTTLE_SHRINKS.
+        """
+        if not self.adaptive or (throttled and endpoint not in THROTTLE_SHRINKS):
+            return
+        self.tuners[endpoint].record(success, latency)
+
+    def record_rejected(self, endpoint: str, size: Optional[int]):
+        """
+        Feed a 400 for a request of `size` items. Only a request larger than the
+        starting size counts as a failure: the tuner grew past what is known to
+        work, so the rejection is most likely the size itself.
+        """
+        if size is not None and size > self.tuners[endpoint].initial:
+            self.record(endpoint, False)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current size, latency and error rate per endpoint"""
+        return {
+            endpoint: {
+                'size': tuner.size,
+                'max': tuner.maximum,
+                'latency_ewma': tuner.latency_ewma,
+                'error_rate': round(tuner.error_rate, 3)
+            }
+            for endpoint, tuner in self.tuners.items()
+        }
+
+
+def profile_path() -> Optional[str]:
+    """Location of the tuning profile (empty WALMART_TUNING_PROFILE disables it)"""
+    return os.getenv('WALMART_TUNING_PROFILE', '.cache/walmart_tuning.json') or None
+
+
+def save_profile(endpoint: str, **values):
+    """Merge measured values (optimal, max, latency_target) into the tuning profile"""
+    profile = ClientState(profile_path())
+    entry = dict(profile.get(endpoint) or {})
+    entry.update({k: v for k, v in values.items() if v is not None})
+    entry['updated_at'] = datetime.now().isoformat()
+    profile.set(endpoint, entry)
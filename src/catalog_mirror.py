@@ -0,0 +1,515 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+try:
+    from .shopify_bulk import BulkOperationError, ShopifyBulkExporter, gid_to_id, rest_product
+    from .shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from shopify_bulk import BulkOperationError, ShopifyBulkExporter, gid_to_id, rest_product
+    from shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+
+logger = logging.getLogger(__name__)
+
+# The bulk seed's product read: the catalog fields of PRODUCTS_QUERY plus metafields
+MIRROR_PRODUCTS_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        handle
+        vendor
+        productType
+        status
+        tags
+        updatedAt
+        metafields {
+          edges {
+            node { id namespace key value type }
+          }
+        }
+        variants {
+          edges {
+            node {
+              id
+              title
+              sku
+              barcode
+              price
+              inventoryQuantity
+              inventoryManagement
+              inventoryPolicy
+              inventoryItem { id }
+              fulfillmentService { handle }
+              selectedOptions { value }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Bulk queries allow two levels of connections, so levels come from a second export
+MIRROR_INVENTORY_QUERY = """
+{
+  inventoryItems {
+    edges {
+      node {
+        id
+        sku
+        tracked
+        variant { id }
+        inventoryLevels {
+          edges {
+            node {
+              id
+              updatedAt
+              location { id }
+              quantities(names: ["available"]) { name quantity }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Metafields of products changed since the last sync (REST products.json doesn't carry them)
+PRODUCT_METAFIELDS_QUERY = """
+query($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on Product {
+      id
+      metafields(first: 25) { edges { node { namespace key value type } } }
+    }
+  }
+}
+"""
+
+# Products per metafields query: 20 x (1 + 25) points stays well under the 1000-point cap
+METAFIELD_BATCH_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    title TEXT, handle TEXT, vendor TEXT, product_type TEXT, status TEXT,
+    tags TEXT, updated_at TEXT);
+CREATE TABLE IF NOT EXISTS product_tags (
+    product_id INTEGER NOT NULL, tag TEXT NOT NULL,
+    PRIMARY KEY (product_id, tag));
+CREATE INDEX IF NOT EXISTS idx_product_tags_tag ON product_tags (tag);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    title TEXT, sku TEXT, barcode TEXT, price TEXT,
+    inventory_quantity INTEGER, inventory_management TEXT, inventory_policy TEXT,
+    inventory_item_id INTEGER, fulfillment_service TEXT,
+    option1 TEXT, option2 TEXT, option3 TEXT);
+CREATE INDEX IF NOT EXISTS idx_variants_product ON variants (product_id);
+CREATE INDEX IF NOT EXISTS idx_variants_sku ON variants (sku);
+CREATE INDEX IF NOT EXISTS idx_variants_barcode ON variants (barcode);
+CREATE INDEX IF NOT EXISTS idx_variants_item ON variants (inventory_item_id);
+CREATE TABLE IF NOT EXISTS inventory_items (
+    id INTEGER PRIMARY KEY,
+    variant_id INTEGER, sku TEXT, tracked INTEGER);
+CREATE TABLE IF NOT EXISTS inventory_levels (
+    inventory_item_id INTEGER NOT NULL, location_id INTEGER NOT NULL,
+    available INTEGER, updated_at TEXT,
+    PRIMARY KEY (inventory_item_id, location_id));
+CREATE TABLE IF NOT EXISTS metafields (
+    product_id INTEGER NOT NULL, namespace TEXT NOT NULL, key TEXT NOT NULL,
+    value TEXT, type TEXT,
+    PRIMARY KEY (product_id, namespace, key));
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY, name TEXT, active INTEGER);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_VARIANT_COLUMNS = ('id', 'product_id', 'title', 'sku', 'barcode', 'price', 'inventory_quantity',
+                    'inventory_management', 'inventory_policy', 'inventory_item_id', 'fulfillment_service',
+                    'option1', 'option2', 'option3')
+
+_PRODUCT_COLUMNS = ('id', 'title', 'handle', 'vendor', 'product_type', 'status', 'tags', 'updated_at')
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _split_tags(tags: Any) -> List[str]:
+    if isinstance(tags, list):
+        return [t for t in tags if t]
+    return [t.strip() for t in (tags or '').split(',') if t.strip()]
+
+
+class CatalogMirror:
+    """
+    Local SQLite copy of the Shopify catalog: products, tags, variants, inventory
+    items and levels, metafields and locations.
+
+    A full seed reads the store with two bulk exports. Later syncs are
+    incremental: products.json and inventory_levels.json with `updated_at_min`
+    set to the previous sync's start (less an overlap for clock skew), metafields
+    of the changed products through batched GraphQL, and a deletion check: a
+    products/count comparison every sync, plus a full id-set comparison when the
+    counts disagree or the last one is older than id_check_interval (a delete and
+    a create in the same window leave the counts equal). Reports then run as SQL
+    against the file instead of re-downloading the store, leaving the API budget
+    for writes. Like the Walmart response cache, the file is in WAL mode so
+    several processes can read it while one syncs.
+    """
+
+    def __init__(self,
+                 path: str,
+                 client: Optional[ShopifyAdminClient] = None,
+                 max_age: float = 3600,
+                 auto_sync: bool = True,
+                 overlap: float = 300,
+                 id_check_interval: float = 86400):
+        self.path = path
+        self._client = client
+        self.max_age = max_age
+        self.auto_sync = auto_sync
+        self.overlap = overlap
+        self.id_check_interval = id_check_interval
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    @classmethod
+    def from_env(cls, client: Optional[ShopifyAdminClient] = None) -> Optional['CatalogMirror']:
+        """Build the mirror from SHOPIFY_MIRROR_* env vars; None when disabled"""
+        if os.getenv('SHOPIFY_MIRROR_DISABLED', 'false').lower() in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            path=os.getenv('SHOPIFY_MIRROR_PATH', '.cache/shopify_catalog.sqlite3'),
+            client=client,
+            max_age=float(os.getenv('SHOPIFY_MIRROR_MAX_AGE', 3600)),
+            auto_sync=os.getenv('SHOPIFY_MIRROR_AUTO_SYNC', 'true').lower() in ('1', 'true', 'yes'),
+            id_check_interval=float(os.getenv('SHOPIFY_MIRROR_ID_CHECK_HOURS', 24)) * 3600
+        )
+
+    @property
+    def client(self) -> ShopifyAdminClient:
+        # Built on first use so read-only queries never need Shopify credentials
+        if self._client is None:
+            self._client = get_shopify_client()
+        return self._client
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # --- State ----------------------------------------------------------------
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self._connect().execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_state(self, conn: sqlite3.Connection, **values: str):
+        conn.executemany('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', list(values.items()))
+
+    @property
+    def synced_at(self) -> Optional[datetime]:
+        """When the last seed or sync finished (UTC), None if never seeded"""
+        value = self._get_state('synced_at')
+        return datetime.fromisoformat(value) if value else None
+
+    def is_stale(self) -> bool:
+        """True when never seeded or last synced more than max_age seconds ago"""
+        synced_at = self.synced_at
+        return synced_at is None or (_utc_now() - synced_at).total_seconds() > self.max_age
+
+    def ensure_fresh(self) -> bool:
+        """
+        Sync when stale (if auto_sync allows it).
+
+        Returns:
+            True when the mirror is fresh enough to query, False when callers should
+            fall back to live API reads
+        """
+        if not self.is_stale():
+            return True
+        if not self.auto_sync:
+            logger.info(f"Catalog mirror last synced {self.synced_at or 'never'}; auto sync disabled")
+            return False
+        try:
+            self.sync()
+            return True
+        except (BulkOperationError, ShopifyAPIError, requests.RequestException, sqlite3.OperationalError) as e:
+            # OperationalError: the file stayed locked by another writer past the timeout
+            logger.warning(f"Catalog mirror sync failed, falling back to live reads: {e}")
+            return False
+
+    # --- Writes ---------------------------------------------------------------
+
+    def _write_product(self, conn: sqlite3.Connection, product: Dict[str, Any]):
+        """Replace a REST-shaped product with its tags and variants"""
+        product_id = product['id']
+        conn.execute(f'INSERT OR REPLACE INTO products ({", ".join(_PRODUCT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                     (product_id, product.get('title'), product.get('handle'), product.get('vendor'),
+                      product.get('product_type'), product.get('status'),
+                      ', '.join(_split_tags(product.get('tags'))), product.get('updated_at')))
+        conn.execute('DELETE FROM product_tags WHERE product_id = ?', (product_id,))
+        conn.executemany('INSERT OR IGNORE INTO product_tags (product_id, tag) VALUES (?, ?)',
+                         [(product_id, tag) for tag in _split_tags(product.get('tags'))])
+        conn.execute('DELETE FROM variants WHERE product_id = ?', (product_id,))
+        variants = product.get('variants') or []
+        conn.executemany(
+            f'INSERT OR REPLACE INTO variants ({", ".join(_VARIANT_COLUMNS)}) VALUES ({", ".join("?" * len(_VARIANT_COLUMNS))})',
+            [tuple(product_id if c == 'product_id' else v.get(c) for c in _VARIANT_COLUMNS) for v in variants]
+        )
+        # Keep the item -> variant link current; the bulk seed overwrites `tracked` with the real flag
+        conn.executemany(
+            'INSERT INTO inventory_items (id, variant_id, sku, tracked) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET variant_id = excluded.variant_id, sku = excluded.sku',
+            [(v['inventory_item_id'], v['id'], v.get('sku'), int(v.get('inventory_management') == 'shopify'))
+             for v in variants if v.get('inventory_item_id')]
+        )
+
+    def _write_metafields(self, conn: sqlite3.Connection, product_id: int, metafields: Iterable[Dict[str, Any]]):
+        conn.execute('DELETE FROM metafields WHERE product_id = ?', (product_id,))
+        conn.executemany('INSERT OR REPLACE INTO metafields (product_id, namespace, key, value, type) VALUES (?, ?, ?, ?, ?)',
+                         [(product_id, m.get('namespace'), m.get('key'), m.get('value'), m.get('type'))
+                          for m in metafields])
+
+    def upsert_products(self, products: Iterable[Dict[str, Any]]):
+        """
+        Record REST-shaped products (e.g. products.json responses after a create or
+        update) without waiting for the next sync.
+        """
+        conn = self._connect()
+        with conn:
+            for product in products:
+                self._write_product(conn, product)
+
+    def _refresh_variant_totals(self, conn: sqlite3.Connection, item_ids: List[int]):
+        """Recompute variants.inventory_quantity from the mirrored levels of these items"""
+        for i in range(0, len(item_ids), 500):
+            chunk = item_ids[i:i + 500]
+            conn.execute('UPDATE variants SET inventory_quantity = (SELECT SUM(available) FROM inventory_levels l '
+                         'WHERE l.inventory_item_id = variants.inventory_item_id) '
+                         f'WHERE inventory_item_id IN ({",".join("?" * len(chunk))})', chunk)
+
+    def _prune_orphans(self, conn: sqlite3.Connection):
+        """Drop rows left behind by deleted products and variants"""
+        conn.execute('DELETE FROM product_tags WHERE product_id NOT IN (SELECT id FROM products)')
+        conn.execute('DELETE FROM metafields WHERE product_id NOT IN (SELECT id FROM products)')
+        conn.execute('DELETE FROM variants WHERE product_id NOT IN (SELECT id FROM products)')
+        conn.execute('DELETE FROM inventory_items WHERE variant_id NOT IN (SELECT id FROM variants)')
+        conn.execute('DELETE FROM inventory_levels WHERE inventory_item_id NOT IN (SELECT id FROM inventory_items)')
+
+    def _fetch_locations(self) -> List[Dict[str, Any]]:
+        response = self.client.get('locations.json')
+        if response.status_code != 200:
+            raise ShopifyAPIError(response.status_code, response.text[:300])
+        return response.json().get('locations', [])
+
+    def _write_locations(self, conn: sqlite3.Connection, locations: List[Dict[str, Any]]):
+        conn.execute('DELETE FROM locations')
+        conn.executemany('INSERT INTO locations (id, name, active) VALUES (?, ?, ?)',
+                         [(loc['id'], loc.get('name'), int(bool(loc.get('active', True)))) for loc in locations])
+
+    # --- Sync -----------------------------------------------------------------
+
+    def seed(self):
+        """
+        Rebuild the mirror from two bulk exports (products with variants and
+        metafields, then inventory items with levels). Both operations run to
+        completion before the write transaction opens, so the WAL write lock is
+        held only while their results stream in; readers see the previous copy
+        until it commits.
+
+        Raises:
+            BulkOperationError / ShopifyAPIError: an export couldn't be run
+        """
+        started = _utc_now()
+        exporter = ShopifyBulkExporter.from_env(self.client)
+        locations = self._fetch_locations()
+        # Shopify runs one bulk query at a time per shop; results stay downloadable for days
+        products_url = exporter.run(MIRROR_PRODUCTS_QUERY)
+        inventory_url = exporter.run(MIRROR_INVENTORY_QUERY)
+        conn = self._connect()
+        products = 0
+        with conn:
+            for table in ('products', 'product_tags', 'variants', 'inventory_items', 'inventory_levels', 'metafields'):
+                conn.execute(f'DELETE FROM {table}')
+            for node in exporter.reassemble(exporter.download(products_url)):
+                product = rest_product(node)
+                self._write_product(conn, product)
+                self._write_metafields(conn, product['id'], node.get('__children', {}).get('Metafield', []))
+                products += 1
+
+            for node in exporter.reassemble(exporter.download(inventory_url)):
+                item_id = gid_to_id(node['id'])
+                conn.execute('INSERT OR REPLACE INTO inventory_items (id, variant_id, sku, tracked) VALUES (?, ?, ?, ?)',
+                             (item_id, gid_to_id((node.get('variant') or {}).get('id')), node.get('sku'),
+                              int(bool(node.get('tracked')))))
+                levels = []
+                for level in node.get('__children', {}).get('InventoryLevel', []):
+                    available = next((q.get('quantity') for q in level.get('quantities') or []
+                                      if q.get('name') == 'available'), None)
+                    levels.append((item_id, gid_to_id((level.get('location') or {}).get('id')),
+                                   available, level.get('updatedAt')))
+                conn.executemany('INSERT OR REPLACE INTO inventory_levels '
+                                 '(inventory_item_id, location_id, available, updated_at) VALUES (?, ?, ?, ?)', levels)
+
+            self._write_locations(conn, locations)
+            self._prune_orphans(conn)
+            cursor = (started - timedelta(seconds=self.overlap)).isoformat(timespec='seconds')
+            self._set_state(conn, products_cursor=cursor, levels_cursor=cursor, seeded_at=started.isoformat(),
+                            ids_checked_at=started.isoformat(), synced_at=_utc_now().isoformat())
+        logger.info(f"Catalog mirror seeded with {products} products")
+
+    def _fetch_metafields(self, product_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        metafields = {}
+        for i in range(0, len(product_ids), METAFIELD_BATCH_SIZE):
+            chunk = product_ids[i:i + METAFIELD_BATCH_SIZE]
+            data = self.client.graphql(PRODUCT_METAFIELDS_QUERY,
+                                       {'ids': [f'gid://shopify/Product/{p}' for p in chunk]})
+            for node in data.get('nodes') or []:
+                if node:
+                    edges = (node.get('metafields') or {}).get('edges') or []
+                    metafields[gid_to_id(node['id'])] = [e['node'] for e in edges]
+        return metafields
+
+    def _id_check_due(self) -> bool:
+        checked_at = self._get_state('ids_checked_at')
+        if not checked_at:
+            return True
+        return (_utc_now() - datetime.fromisoformat(checked_at)).total_seconds() >= self.id_check_interval
+
+    def _fetch_deleted(self) -> Optional[List[int]]:
+        """
+        Mirrored products no longer in the store. The live id list is paged only
+        when the mirror holds more products than the store or a periodic check is
+        due; returns None when it wasn't.
+        """
+        if not self._id_check_due():
+            response = self.client.get('products/count.json')
+            if response.status_code != 200:
+                raise ShopifyAPIError(response.status_code, response.text[:300])
+            if self.scalar('SELECT COUNT(*) FROM products') <= response.json().get('count', 0):
+                return None
+        live = {p['id'] for p in self.client.paginate('products.json', 'products', {'fields': 'id', 'limit': 250})}
+        return [row['id'] for row in self.query('SELECT id FROM products') if row['id'] not in live]
+
+    def sync(self, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the mirror up to date: a bulk seed when it has never been seeded (or
+        `full` is set), otherwise an incremental pass over what changed since the
+        last cursors. Changes are fetched first and written in one transaction.
+
+        Returns:
+            Counts of products, levels and deletions applied
+
+        Raises:
+            BulkOperationError / ShopifyAPIError: the store couldn't be read
+        """
+        products_cursor = self._get_state('products_cursor')
+        levels_cursor = self._get_state('levels_cursor')
+        if full or not products_cursor or not levels_cursor:
+            self.seed()
+            return {'products': self.scalar('SELECT COUNT(*) FROM products'), 'levels': 0, 'deleted': 0}
+
+        started = _utc_now()
+        products = list(self.client.paginate('products.json', 'products',
+                                             {'updated_at_min': products_cursor, 'limit': 250}))
+        metafields = self._fetch_metafields([p['id'] for p in products])
+        locations = self._fetch_locations()
+        levels = []
+        # inventory_levels.json takes up to 50 location ids per call
+        for i in range(0, len(locations), 50):
+            params = {'location_ids': ','.join(str(loc['id']) for loc in locations[i:i + 50]),
+                      'updated_at_min': levels_cursor, 'limit': 250}
+            for level in self.client.paginate('inventory_levels.json', 'inventory_levels', params):
+                levels.append((level['inventory_item_id'], level['location_id'],
+                               level.get('available'), level.get('updated_at')))
+        deleted = self._fetch_deleted()
+        ids_checked = deleted is not None
+        deleted = deleted or []
+
+        conn = self._connect()
+        with conn:
+            for product in products:
+                self._write_product(conn, product)
+            for product_id, fields in metafields.items():
+                self._write_metafields(conn, product_id, fields)
+            self._write_locations(conn, locations)
+            conn.executemany('INSERT OR REPLACE INTO inventory_levels '
+                             '(inventory_item_id, location_id, available, updated_at) VALUES (?, ?, ?, ?)', levels)
+            self._refresh_variant_totals(conn, list({level[0] for level in levels}))
+            for i in range(0, len(deleted), 500):
+                chunk = deleted[i:i + 500]
+                conn.execute(f'DELETE FROM products WHERE id IN ({",".join("?" * len(chunk))})', chunk)
+            self._prune_orphans(conn)
+            cursor = (started - timedelta(seconds=self.overlap)).isoformat(timespec='seconds')
+            self._set_state(conn, products_cursor=cursor, levels_cursor=cursor, synced_at=_utc_now().isoformat())
+            if ids_checked:
+                self._set_state(conn, ids_checked_at=started.isoformat())
+        logger.info(f"Catalog mirror synced: {len(products)} products, {len(levels)} levels, {len(deleted)} deleted")
+        return {'products': len(products), 'levels': len(levels), 'deleted': len(deleted)}
+
+    # --- Reads ----------------------------------------------------------------
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Run a read-only SQL query against the mirror"""
+        return self._connect().execute(sql, tuple(params)).fetchall()
+
+    def scalar(self, sql: str, params: Iterable[Any] = ()) -> Any:
+        """First column of the first row (e.g. a COUNT), or None"""
+        row = self._connect().execute(sql, tuple(params)).fetchone()
+        return row[0] if row else None
+
+    def iter_products(self, tag: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield mirrored products (optionally only those with `tag`) shaped like export_products()"""
+        conn = self._connect()
+        if tag is None:
+            rows = conn.execute('SELECT * FROM products ORDER BY id')
+        else:
+            rows = conn.execute('SELECT p.* FROM products p JOIN product_tags t ON t.product_id = p.id '
+                                'WHERE t.tag = ? ORDER BY p.id', (tag,))
+        for row in rows.fetchall():
+            product = dict(row)
+            product['variants'] = [dict(v) for v in conn.execute(
+                'SELECT * FROM variants WHERE product_id = ? ORDER BY id', (product['id'],))]
+            yield product
+
+    def status(self) -> Dict[str, Any]:
+        """Row counts and sync timestamps"""
+        counts = {table: self.scalar(f'SELECT COUNT(*) FROM {table}')
+                  for table in ('products', 'variants', 'inventory_items', 'inventory_levels', 'metafields', 'locations')}
+        return dict(counts, seeded_at=self._get_state('seeded_at'), synced_at=self._get_state('synced_at'))
+
+
+def fresh_mirror(client: Optional[ShopifyAdminClient] = None) -> Optional[CatalogMirror]:
+    """
+    The configured mirror, synced if it was stale. None when the mirror is disabled
+    or couldn't be brought up to date, in which case callers read the store live.
+    """
+    mirror = CatalogMirror.from_env(client)
+    if mirror is None or not mirror.ensure_fresh():
+        return None
+    return mirror
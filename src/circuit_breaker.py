@@ -0,0 +1,186 @@
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Optional
+
+try:
+    from .shared_state import SharedStateFile
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from shared_state import SharedStateFile
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_congestion_error(error: BaseException) -> bool:
+    """Whether an HTTP client exception looks like throttling or a server error (429/5xx)"""
+    message = str(error)
+    return bool(re.search(r'\b(429|50[0-4])\b', message)) or 'Too Many Requests' in message
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state is shared by every process on the host.
+
+    closed:    requests flow; `failure_threshold` failures (429/5xx/transport
+               errors) within `failure_window` seconds open the circuit.
+    open:      allow() refuses everything for the cool-down, which doubles on
+               every consecutive trip up to max_open_seconds.
+    half_open: one process at a time gets a probe request; success closes the
+               circuit, failure re-opens it.
+
+    After recovery, traffic ramps back up linearly over ramp_seconds (allow()
+    admits a growing fraction of requests) instead of every worker resuming at
+    full speed at once.
+
+    While the circuit is closed and not ramping, allow() and record_success()
+    only read the state file; the lock is taken and the file rewritten only for
+    transitions and failures.
+    """
+
+    def __init__(self,
+                 name: str,
+                 state_path: str,
+                 failure_threshold: int = 5,
+                 failure_window: float = 30.0,
+                 open_seconds: float = 15.0,
+                 max_open_seconds: float = 300.0,
+                 ramp_seconds: float = 60.0,
+                 probe_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.ramp_seconds = ramp_seconds
+        self.probe_timeout = probe_timeout
+        self._state = SharedStateFile(
+            state_path,
+            lambda now: {'state': CLOSED, 'failures': [], 'open_until': 0.0,
+                         'trips': 0, 'probe_until': 0.0, 'ramp_started': 0.0}
+        )
+
+    @classmethod
+    def from_env(cls, name: str, prefix: Optional[str] = None) -> Optional['CircuitBreaker']:
+        """
+        Build from <PREFIX>_CIRCUIT_THRESHOLD / _WINDOW / _OPEN_SECONDS /
+        _MAX_OPEN_SECONDS / _RAMP_SECONDS / _FILE (prefix defaults to the name
+        upper-cased). Returns None when <PREFIX>_CIRCUIT_DISABLED is set.
+        """
+        prefix = prefix or name.upper()
+        if os.getenv(f'{prefix}_CIRCUIT_DISABLED', 'false').lower() in ('1', 'true', 'yes'):
+            return None
+        default_path = os.path.join(tempfile.gettempdir(), f'{name.lower()}_circuit.json')
+        return cls(
+            name,
+            state_path=os.getenv(f'{prefix}_CIRCUIT_FILE', default_path),
+            failure_threshold=int(os.getenv(f'{prefix}_CIRCUIT_THRESHOLD', 5)),
+            failure_window=float(os.getenv(f'{prefix}_CIRCUIT_WINDOW', 30)),
+            open_seconds=float(os.getenv(f'{prefix}_CIRCUIT_OPEN_SECONDS', 15)),
+            max_open_seconds=float(os.getenv(f'{prefix}_CIRCUIT_MAX_OPEN_SECONDS', 300)),
+            ramp_seconds=float(os.getenv(f'{prefix}_CIRCUIT_RAMP_SECONDS', 60))
+        )
+
+    def _trip(self, state, now):
+        state['state'] = OPEN
+        state['open_until'] = now + min(self.max_open_seconds, self.open_seconds * 2 ** state['trips'])
+        state['trips'] += 1
+        state['failures'] = []
+        state['probe_until'] = 0.0
+        state['ramp_started'] = 0.0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (never blocks)"""
+        snapshot = self._state.read()
+        if snapshot['state'] == CLOSED and not snapshot['ramp_started']:
+            return True
+
+        def _allow(state, now):
+            if state['state'] == OPEN:
+                if now < state['open_until']:
+                    return False
+                state['state'] = HALF_OPEN
+                state['probe_until'] = 0.0
+
+            if state['state'] == HALF_OPEN:
+                # Only one probe in flight across processes; a lost probe expires
+                if now < state['probe_until']:
+                    return False
+                state['probe_until'] = now + self.probe_timeout
+                return True
+
+            if state['ramp_started']:
+                elapsed = now - state['ramp_started']
+                if elapsed >= self.ramp_seconds:
+                    state['ramp_started'] = 0.0
+                    state['trips'] = 0
+                    return True
+                return random.random() < 0.1 + 0.9 * elapsed / self.ramp_seconds
+            return True
+
+        return self._state.update(_allow)
+
+    def record_success(self):
+        # Only a half-open probe's success changes anything
+        if self._state.read()['state'] != HALF_OPEN:
+            return
+
+        def _success(state, now):
+            if state['state'] == HALF_OPEN:
+                state['state'] = CLOSED
+                state['probe_until'] = 0.0
+                state['ramp_started'] = now
+                state['failures'] = []
+
+        self._state.update(_success)
+
+    def record_failure(self):
+        def _failure(state, now):
+            if state['state'] == HALF_OPEN:
+                self._trip(state, now)
+                return
+            if state['state'] == OPEN:
+                return
+            failures = [t for t in state['failures'] if now - t < self.failure_window]
+            failures.append(now)
+            state['failures'] = failures[-self.failure_threshold:]
+            if len(failures) >= self.failure_threshold:
+                self._trip(state, now)
+
+        self._state.update(_failure)
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will admit a probe (0 when closed and done ramping)"""
+        def _remaining(state, now):
+            if state['state'] == OPEN:
+                return max(0.0, state['open_until'] - now)
+            if state['state'] == HALF_OPEN:
+                return max(0.0, state['probe_until'] - now)
+            # Ramping up: a refused request may try again shortly. Only allow() clears
+            # ramp_started, so a finished ramp is worked out here rather than read
+            if state['ramp_started'] and now - state['ramp_started'] < self.ramp_seconds:
+                return 1.0
+            return 0.0
+
+        return _remaining(self._state.read(), time.time())
+
+    @property
+    def state(self) -> str:
+        return self._state.read()['state']
+
+    def check(self):
+        """Raise CircuitOpenError unless allow() admits a request"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
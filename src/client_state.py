@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class ClientState:
+    """
+    Small persisted key/value store for things the client learns at runtime
+    (e.g. which UPC parameter form an endpoint accepts), so later runs start
+    from what earlier runs discovered.
+
+    Stored as JSON and written atomically; concurrent processes simply
+    last-writer-win, which is fine for learned hints.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = self._load()
+
+    @classmethod
+    def from_env(cls) -> 'ClientState':
+        """Build from WALMART_STATE_PATH (empty string keeps state in memory only)"""
+        return cls(os.getenv('WALMART_STATE_PATH', '.cache/walmart_client_state.json') or None)
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """Update a value and persist the whole state"""
+        with self._lock:
+            if self._data.get(key) == value:
+                return
+            self._data[key] = value
+            if not self.path:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # Learned hints are best-effort; keep going with the in-memory copy
+                pass
@@ -0,0 +1,236 @@
+import base64
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+
+try:
+    from .rate_limiter import SharedRateLimiter
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from rate_limiter import SharedRateLimiter
+
+
+# Parsed keys by source, so every client in a process shares one parse
+_key_cache: Dict[Tuple, Any] = {}
+_key_cache_lock = threading.Lock()
+
+
+def load_private_key(content: Optional[str] = None, path: Optional[str] = None):
+    """
+    Parse an RSA private key from base64 DER (WALMART_PRIVATE_KEY style) or a PEM file.
+    Returns None when neither is configured; raises on an unreadable key. Results
+    are cached per process (a PEM file is re-read only if its mtime changes).
+    """
+    if content:
+        cache_key = ('der', content)
+    elif path and os.path.exists(path):
+        cache_key = ('pem', path, os.path.getmtime(path))
+    else:
+        return None
+
+    with _key_cache_lock:
+        key = _key_cache.get(cache_key)
+        if key is None:
+            if content:
+                key = serialization.load_der_private_key(base64.b64decode(content), password=None,
+                                                         backend=default_backend())
+            else:
+                with open(path, 'rb') as key_file:
+                    key = serialization.load_pem_private_key(key_file.read(), password=None,
+                                                             backend=default_backend())
+            _key_cache[cache_key] = key
+        return key
+
+
+class WalmartCredential:
+    """
+    One consumer ID / private key pair with its own rate budget and signature cache.
+    The rate limiter is host-wide per credential, so a throttled key is paused for
+    every worker at once.
+    """
+
+    def __init__(self,
+                 consumer_id: str,
+                 private_key: Any,
+                 key_version: str = '1',
+                 rate_limiter: Optional[SharedRateLimiter] = None):
+        self.consumer_id = consumer_id
+        self.private_key = private_key
+        self.key_version = key_version
+        self.rate_limiter = rate_limiter
+
+        # (timestamp, signature, signed_at) reused until it nears the signature TTL
+        self.signed_auth: Optional[Tuple[str, str, float]] = None
+        self.signature_lock = threading.Lock()
+
+        self.in_flight = 0
+        self.sidelined_until = 0.0
+        # This process's estimate of when the limiter admits the next request,
+        # refreshed from each reservation; only used to rank credentials
+        self.available_at = 0.0
+        self.stats = {'requests': 0, 'throttled': 0, 'errors': 0, 'sidelined': 0}
+
+    @property
+    def label(self) -> str:
+        """Short, log-safe identifier"""
+        return self.consumer_id[:8]
+
+
+class CredentialPool:
+    """
+    Routes each Walmart request to the least-loaded credential.
+
+    Load is the time until the credential's limiter (or its sideline) would admit
+    a request, then requests in flight, then requests sent. The limiter time is the
+    in-memory estimate from this process's last reservation, so ranking touches no
+    files; only the chosen credential's bucket is read and updated. A credential that gets
+    a 429 is sidelined for Retry-After (or `sideline_seconds`) and traffic moves to
+    the others; when every credential is sidelined, callers wait for the first one
+    to come back.
+    """
+
+    def __init__(self, credentials: List[WalmartCredential], sideline_seconds: float = 30.0):
+        if not credentials:
+            raise ValueError("CredentialPool needs at least one credential")
+        self.credentials = credentials
+        self.sideline_seconds = sideline_seconds
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, primary: WalmartCredential) -> 'CredentialPool':
+        """
+        Add WALMART_CONSUMER_ID_2, _3, ... to the primary credential. Each extra
+        credential reads WALMART_PRIVATE_KEY_<n> or WALMART_PRIVATE_KEY_PATH_<n>,
+        WALMART_PRIVATE_KEY_VERSION_<n> and WALMART_RATE_LIMIT_QPS_<n> / _BURST_<n>
+        (falling back to the unnumbered values) and gets its own host-wide bucket.
+        WALMART_CREDENTIAL_SIDELINE_SECONDS sets the default pause after a 429.
+        """
+        credentials = [primary]
+        n = 2
+        while os.getenv(f'WALMART_CONSUMER_ID_{n}'):
+            consumer_id = os.getenv(f'WALMART_CONSUMER_ID_{n}')
+            private_key = load_private_key(os.getenv(f'WALMART_PRIVATE_KEY_{n}'),
+                                           os.getenv(f'WALMART_PRIVATE_KEY_PATH_{n}'))
+            if private_key is None:
+                raise ValueError(f"No private key configured for WALMART_CONSUMER_ID_{n}")
+            credentials.append(WalmartCredential(
+                consumer_id,
+                private_key,
+                os.getenv(f'WALMART_PRIVATE_KEY_VERSION_{n}', os.getenv('WALMART_PRIVATE_KEY_VERSION', '1')),
+                _limiter_for(n, consumer_id)
+            ))
+            n += 1
+        return cls(credentials, float(os.getenv('WALMART_CREDENTIAL_SIDELINE_SECONDS', 30)))
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    @property
+    def primary(self) -> WalmartCredential:
+        return self.credentials[0]
+
+    def _wait_for(self, credential: WalmartCredential, now: float) -> float:
+        return max(0.0, credential.sidelined_until - now, credential.available_at - now)
+
+    def reserve(self) -> Tuple[WalmartCredential, float]:
+        """
+        Pick the least-loaded credential, take a token from its limiter and mark a
+        request in flight. Returns the credential and how long to wait before sending;
+        pair with release().
+        """
+        if len(self.credentials) == 1:
+            credential = self.primary
+            sideline_wait = 0.0
+        else:
+            now = time.time()
+            with self._lock:
+                loads = [(self._wait_for(c, now), c.in_flight, c.stats['requests'], i)
+                         for i, c in enumerate(self.credentials)]
+            _, _, _, index = min(loads)
+            credential = self.credentials[index]
+            sideline_wait = max(0.0, credential.sidelined_until - now)
+
+        wait = credential.rate_limiter.reserve() if credential.rate_limiter else 0.0
+        with self._lock:
+            credential.in_flight += 1
+            credential.stats['requests'] += 1
+            if credential.rate_limiter:
+                # A wait means the bucket is in debt, so the next token is one interval later
+                next_token = wait + 1.0 / credential.rate_limiter.qps if wait > 0 else 0.0
+                credential.available_at = time.time() + next_token
+        return credential, max(wait, sideline_wait)
+
+    def acquire(self) -> WalmartCredential:
+        """reserve() and sleep until the chosen credential may send"""
+        credential, wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return credential
+
+    def cancel(self, credential: WalmartCredential):
+        """Return a reservation whose request was never sent"""
+        with self._lock:
+            credential.in_flight = max(0, credential.in_flight - 1)
+            credential.stats['requests'] = max(0, credential.stats['requests'] - 1)
+
+    def release(self, credential: WalmartCredential, status_code: Optional[int], retry_after: Optional[float] = None):
+        """
+        Record a finished request (status None for a transport error). A 429 sidelines
+        the credential; with a single credential there is nowhere to reroute, so its
+        limiter is just paused for Retry-After (default 1s) and callers back off as before.
+        """
+        with self._lock:
+            credential.in_flight = max(0, credential.in_flight - 1)
+            if status_code is None or status_code >= 500:
+                credential.stats['errors'] += 1
+        if status_code != 429:
+            return
+        if len(self.credentials) > 1:
+            self.sideline(credential, retry_after)
+            return
+        with self._lock:
+            credential.stats['throttled'] += 1
+        if credential.rate_limiter:
+            credential.rate_limiter.penalize(retry_after if retry_after is not None else 1.0)
+
+    def sideline(self, credential: WalmartCredential, seconds: Optional[float] = None):
+        """Stop routing to a throttled credential (host-wide, via its limiter) for a while"""
+        seconds = seconds if seconds is not None else self.sideline_seconds
+        with self._lock:
+            credential.stats['throttled'] += 1
+            if credential.sidelined_until <= time.time():
+                credential.stats['sidelined'] += 1
+            credential.sidelined_until = max(credential.sidelined_until, time.time() + seconds)
+            credential.available_at = max(credential.available_at, credential.sidelined_until)
+        if credential.rate_limiter:
+            credential.rate_limiter.penalize(seconds)
+
+    def all_sidelined(self) -> bool:
+        now = time.time()
+        return all(c.sidelined_until > now for c in self.credentials)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-credential counters, requests in flight and remaining sideline time"""
+        now = time.time()
+        with self._lock:
+            return {
+                c.label: dict(c.stats,
+                              in_flight=c.in_flight,
+                              sidelined_for=round(max(0.0, c.sidelined_until - now), 1),
+                              qps=c.rate_limiter.qps if c.rate_limiter else None)
+                for c in self.credentials
+            }
+
+
+def _limiter_for(n: int, consumer_id: str) -> Optional[SharedRateLimiter]:
+    """Host-wide token bucket for the n-th credential, keyed by its consumer ID"""
+    qps = float(os.getenv(f'WALMART_RATE_LIMIT_QPS_{n}', os.getenv('WALMART_RATE_LIMIT_QPS', 5)))
+    if qps <= 0:
+        return None
+    burst = float(os.getenv(f'WALMART_RATE_LIMIT_BURST_{n}', os.getenv('WALMART_RATE_LIMIT_BURST', qps * 2)))
+    default_path = os.path.join(tempfile.gettempdir(), f'walmart_rate_limit_{consumer_id[:8]}.json')
+    return SharedRateLimiter(qps, burst, os.getenv(f'WALMART_RATE_LIMIT_FILE_{n}', default_path))
@@ -0,0 +1,171 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+
+logger = logging.getLogger(__name__)
+
+# Shopify's cap on quantities per inventorySetQuantities call
+MAX_BATCH_SIZE = 250
+
+SET_QUANTITIES_MUTATION = """
+mutation($input: InventorySetQuantitiesInput!) {
+  inventorySetQuantities(input: $input) {
+    userErrors { field message code }
+  }
+}
+"""
+
+ACTIVATE_MUTATION = """
+mutation($item: ID!, $location: ID!, $available: Int) {
+  inventoryActivate(inventoryItemId: $item, locationId: $location, available: $available) {
+    userErrors { field message }
+  }
+}
+"""
+
+# (inventory_item_id, location_id, quantity) with REST ids
+Change = Tuple[int, int, int]
+
+
+def _gid(kind: str, value: Any) -> str:
+    value = str(value)
+    return value if value.startswith('gid://') else f'gid://shopify/{kind}/{value}'
+
+
+def _error_index(field: Optional[List[str]]) -> Optional[int]:
+    """Index into input.quantities named by a userError's field path, if any"""
+    for part in field or []:
+        if re.fullmatch(r'\d+', str(part)):
+            return int(part)
+    return None
+
+
+class InventoryWriter:
+    """
+    Sets available quantities with batched inventorySetQuantities mutations.
+
+    Changes are grouped into mutations of up to 250 items and sent from a small
+    thread pool; each mutation waits on the shared GraphQL cost bucket, so
+    concurrency fills the budget without tripping THROTTLED. A mutation with
+    userErrors is rejected as a whole, so the failing items are split out and
+    the rest are re-sent. Items not yet stocked at a location are activated
+    there with the quantity (the REST connect + set pair), when enabled.
+    """
+
+    def __init__(self,
+                 client: ShopifyAdminClient,
+                 batch_size: int = MAX_BATCH_SIZE,
+                 workers: int = 4,
+                 activate_missing: bool = True,
+                 reason: str = 'correction'):
+        self.client = client
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.workers = max(1, workers)
+        self.activate_missing = activate_missing
+        self.reason = reason
+        self.stats = {'mutations': 0, 'updated': 0, 'activated': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, client: Optional[ShopifyAdminClient] = None) -> 'InventoryWriter':
+        """Build on the shared Shopify client with SHOPIFY_INVENTORY_BATCH_SIZE / _WORKERS"""
+        return cls(
+            client or get_shopify_client(),
+            batch_size=int(os.getenv('SHOPIFY_INVENTORY_BATCH_SIZE', MAX_BATCH_SIZE)),
+            workers=int(os.getenv('SHOPIFY_INVENTORY_WORKERS', 4))
+        )
+
+    def _bump(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def _activate(self, change: Change) -> Optional[str]:
+        """Stock an item at a location with its quantity; returns an error message or None"""
+        item, location, quantity = change
+        # Activation with an absolute quantity is safe to resend after a timeout
+        data = self.client.graphql(ACTIVATE_MUTATION, {
+            'item': _gid('InventoryItem', item), 'location': _gid('Location', location), 'available': quantity
+        }, idempotent=True)
+        errors = (data.get('inventoryActivate') or {}).get('userErrors') or []
+        if errors:
+            return '; '.join(e.get('message', str(e)) for e in errors)
+        self._bump('activated')
+        return None
+
+    def _write_batch(self, batch: List[Change]) -> Dict[Tuple[int, int], str]:
+        """Send one batch, peeling off failing items until the rest go through"""
+        failures: Dict[Tuple[int, int], str] = {}
+        pending = list(batch)
+        while pending:
+            variables = {'input': {
+                'name': 'available',
+                'reason': self.reason,
+                'ignoreCompareQuantity': True,
+                'quantities': [
+                    {'inventoryItemId': _gid('InventoryItem', item), 'locationId': _gid('Location', location),
+                     'quantity': quantity}
+                    for item, location, quantity in pending
+                ]
+            }}
+            self._bump('mutations')
+            try:
+                # Absolute quantities without a compare check: repeating the call is a no-op
+                data = self.client.graphql(SET_QUANTITIES_MUTATION, variables, idempotent=True)
+            except ShopifyAPIError as e:
+                failures.update({(item, location): str(e) for item, location, _ in pending})
+                break
+            errors = (data.get('inventorySetQuantities') or {}).get('userErrors') or []
+            if not errors:
+                self._bump('updated', len(pending))
+                break
+
+            rejected: Dict[int, dict] = {}
+            for error in errors:
+                index = _error_index(error.get('field'))
+                if index is None or index >= len(pending):
+                    # Not tied to one item: nothing in the batch can be retried safely
+                    rejected = {i: error for i in range(len(pending))}
+                    break
+                rejected[index] = error
+            for index, error in rejected.items():
+                change = pending[index]
+                message = error.get('message', str(error))
+                if self.activate_missing and error.get('code') == 'ITEM_NOT_STOCKED_AT_LOCATION':
+                    try:
+                        message = self._activate(change)
+                    except ShopifyAPIError as e:
+                        message = str(e)
+                if message:
+                    failures[change[:2]] = message
+            if len(rejected) == len(pending):
+                break
+            pending = [change for i, change in enumerate(pending) if i not in rejected]
+        self._bump('failed', len(failures))
+        return failures
+
+    def set_quantities(self, changes: Iterable[Change]) -> Dict[str, Any]:
+        """
+        Set the available quantity for each (inventory_item_id, location_id, quantity).
+
+        Returns:
+            {'updated': items set by the batched mutation or activation,
+             'failures': {(inventory_item_id, location_id): error message}}
+        """
+        # Last write wins for duplicate item/location pairs
+        unique = {(item, location): (item, location, quantity) for item, location, quantity in changes}
+        items = list(unique.values())
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        failures: Dict[Tuple[int, int], str] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for batch_failures in executor.map(self._write_batch, batches):
+                failures.update(batch_failures)
+        logger.info(f"Inventory: {len(items) - len(failures)} set, {len(failures)} failed in {len(batches)} batches")
+        return {'updated': len(items) - len(failures), 'failures': failures}
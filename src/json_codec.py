@@ -0,0 +1,78 @@
+import json
+from typing import Any, Dict, IO, Iterator, Optional, Union
+
+# Optional accelerators: everything works with the stdlib alone
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import brotli  # noqa: F401 -- urllib3 and aiohttp decode br when this is importable
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document, using orjson when installed.
+    orjson parses the raw bytes directly, so large pages are not first copied
+    into a decoded str the way response.json() does.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON str, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def iter_array(stream: IO[bytes], key: str = 'items', meta: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Yield the elements of the top-level array `key` one at a time.
+
+    With ijson installed the document is parsed incrementally, so only one
+    element is held in memory at a time; without it the whole document is
+    parsed and its array is walked instead.
+
+    Args:
+        stream: File-like object returning bytes (e.g. requests' response.raw)
+        key: Name of the top-level array to walk
+        meta: If given, filled with the document's top-level scalar fields
+              (nextPage, totalResults, ...). Complete once the iterator is exhausted.
+    """
+    if ijson is None:
+        document = loads(stream.read())
+        if meta is not None:
+            meta.update({k: v for k, v in document.items() if not isinstance(v, (dict, list))})
+        yield from document.get(key) or []
+        return
+
+    item_prefix = f'{key}.item'
+    builder = None
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event in ('end_map', 'end_array'):
+                yield builder.value
+                builder = None
+        elif prefix == item_prefix:
+            if event in ('start_map', 'start_array'):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            else:
+                yield value
+        elif meta is not None and prefix and '.' not in prefix and event in _SCALAR_EVENTS:
+            meta[prefix] = value
@@ -0,0 +1,68 @@
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Any
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent response latencies per endpoint, used to derive
+    adaptive timeouts and hedge delays from observed percentiles.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float):
+        with self._lock:
+            self._samples[endpoint].append(latency)
+
+    def percentile(self, endpoint: str, pct: float) -> Optional[float]:
+        """pct-th percentile of the window, or None until min_samples have been seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p95/p99 and sample count per endpoint"""
+        with self._lock:
+            endpoints = list(self._samples)
+        return {
+            endpoint: {
+                'samples': len(self._samples[endpoint]),
+                'p50': self.percentile(endpoint, 50),
+                'p95': self.percentile(endpoint, 95),
+                'p99': self.percentile(endpoint, 99)
+            }
+            for endpoint in endpoints
+        }
+
+
+class HedgeBudget:
+    """
+    Caps duplicate (hedged) requests to a fraction of normal traffic: every
+    request earns `ratio` of a token, every hedge spends one, and at most
+    `burst` tokens can be banked.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_take(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
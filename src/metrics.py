@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default histogram buckets (upper bounds; +Inf is implicit)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 500_000, 1_000_000, 5_000_000, 20_000_000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram: per-bucket counts plus total count and sum"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs in Prometheus order, ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms keyed by name and labels.
+
+    Recording only touches memory under a lock; exporters (JSON snapshot file,
+    Prometheus text file, callback) run at most every `export_interval` seconds
+    from whichever thread records next, and once more on flush().
+    """
+
+    def __init__(self, export_interval: float = 15.0):
+        self.export_interval = export_interval
+        self.exporters: List[Any] = []
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._lock = threading.Lock()
+        self._next_export = time.time() + export_interval
+
+    @classmethod
+    def from_env(cls, prefix: str = 'WALMART') -> 'MetricsRegistry':
+        """
+        Build from <PREFIX>_METRICS_INTERVAL, <PREFIX>_METRICS_JSON and
+        <PREFIX>_METRICS_PROM (file paths; '{pid}' is replaced by the process id
+        so parallel workers don't overwrite each other)
+        """
+        registry = cls(export_interval=float(os.getenv(f'{prefix}_METRICS_INTERVAL', 15)))
+        json_path = os.getenv(f'{prefix}_METRICS_JSON')
+        prom_path = os.getenv(f'{prefix}_METRICS_PROM')
+        if json_path:
+            registry.add_exporter(JSONFileExporter(json_path))
+        if prom_path:
+            registry.add_exporter(PrometheusFileExporter(prom_path))
+        return registry
+
+    def add_exporter(self, exporter: Any):
+        """Register an object with an export(registry) method"""
+        self.exporters.append(exporter)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+        self._maybe_export()
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            self._buckets.setdefault(name, buckets)
+            key = _label_key(labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets[name])
+            histogram.observe(value)
+        self._maybe_export()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly copy of every series"""
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        'labels': dict(key),
+                        'count': h.count,
+                        'sum': round(h.sum, 6),
+                        'buckets': dict(h.cumulative())
+                    }
+                    for key, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {
+            'updated_at': datetime.now().isoformat(),
+            'pid': os.getpid(),
+            'counters': counters,
+            'histograms': histograms
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        def _labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(key) + ([extra] if extra else [])
+            if not pairs:
+                return ''
+            escaped = (v.replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+            return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# TYPE {name} counter')
+                for key, value in series.items():
+                    lines.append(f'{name}{_labels(key)} {value:g}')
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {name} histogram')
+                for key, h in series.items():
+                    for le, count in h.cumulative():
+                        lines.append(f'{name}_bucket{_labels(key, ("le", le))} {count}')
+                    lines.append(f'{name}_sum{_labels(key)} {h.sum:g}')
+                    lines.append(f'{name}_count{_labels(key)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _maybe_export(self):
+        if not self.exporters or time.time() < self._next_export:
+            return
+        with self._lock:
+            # Another thread may have claimed this export already
+            if time.time() < self._next_export:
+                return
+            self._next_export = time.time() + self.export_interval
+        self.flush()
+
+    def flush(self):
+        """Run every exporter now; exporter failures never reach the request path"""
+        for exporter in self.exporters:
+            try:
+                exporter.export(self)
+            except Exception:
+                pass
+
+
+def _write_atomic(path: str, text: str):
+    path = path.replace('{pid}', str(os.getpid()))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class JSONFileExporter:
+    """Writes registry.snapshot() to a JSON file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, registry: MetricsRegistry):
+        _write_atomic(self.path, json.dumps(registry.snapshot(), indent=2))
+
+
+class PrometheusFileExporter:
+    """Writes the Prometheus text format, e.g. for node_exporter's textfile collector (*.prom)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, registry: MetricsRegistry):
+        _write_atomic(self.path, registry.to_prometheus())
+
+
+class CallbackExporter:
+    """Hands each snapshot to a callable (push to StatsD, a dashboard, a test, ...)"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        self.callback = callback
+
+    def export(self, registry: MetricsRegistry):
+        self.callback(registry.snapshot())
@@ -0,0 +1,137 @@
+import os
+import time
+from collections import deque
+from typing import Any, Callable, List, Optional
+
+try:
+    from .circuit_breaker import CircuitBreaker, is_congestion_error
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from circuit_breaker import CircuitBreaker, is_congestion_error
+
+
+class ParkedWork:
+    """
+    Searches and imports a wave importer sets aside instead of sleeping on an
+    open circuit, and the loop that finishes them at the end of the run.
+
+    Searches are parked while the Walmart circuit is open. Items are parked
+    while the Shopify circuit is open or when a save hits throttling/server
+    errors; an item still failing after max_attempts tries is dropped. A save
+    that may already have been applied (ShopifyAPIError.maybe_applied: a POST
+    that timed out or got a 5xx) is never parked, so it can't be created twice.
+    Without a Shopify circuit, retries of a throttled item back off
+    exponentially (up to max_delay seconds), since nothing else paces them.
+    """
+
+    def __init__(self,
+                 search: Callable[[str, str], Optional[List[Any]]],
+                 save: Callable[[Any, str, str], bool],
+                 walmart_circuit: Optional[CircuitBreaker] = None,
+                 shopify_circuit: Optional[CircuitBreaker] = None,
+                 max_attempts: int = 5,
+                 max_delay: float = 60.0):
+        """
+        Args:
+            search: search(keyword, category) -> items, or None when the Walmart
+                    circuit refused the search
+            save: save(item, category, keyword) -> whether the product was created
+            walmart_circuit: Breaker guarding searches (None when disabled)
+            shopify_circuit: Breaker guarding saves (None when disabled)
+            max_attempts: Throttled tries before an item is dropped
+            max_delay: Longest back-off between tries without a Shopify circuit
+        """
+        self.search = search
+        self.save = save
+        self.walmart_circuit = walmart_circuit
+        self.shopify_circuit = shopify_circuit
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.keywords = deque()  # (category, keyword)
+        self.items = deque()     # (item, category, keyword, attempts)
+
+    @classmethod
+    def from_env(cls,
+                 search: Callable[[str, str], Optional[List[Any]]],
+                 save: Callable[[Any, str, str], bool],
+                 walmart_circuit: Optional[CircuitBreaker] = None,
+                 shopify_circuit: Optional[CircuitBreaker] = None) -> 'ParkedWork':
+        """Build with SHOPIFY_PARKED_MAX_ATTEMPTS"""
+        return cls(search, save, walmart_circuit, shopify_circuit,
+                   max_attempts=int(os.getenv('SHOPIFY_PARKED_MAX_ATTEMPTS', 5)))
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords or self.items)
+
+    def park_search(self, category: str, keyword: str):
+        self.keywords.append((category, keyword))
+
+    def import_item(self, item: Any, category: str, keyword: str) -> int:
+        """
+        Import one item now, or park it while the Shopify circuit is open.
+        Returns 1 if the item was imported, else 0.
+        """
+        if self.shopify_circuit and not self.shopify_circuit.allow():
+            self.items.append((item, category, keyword, 0))
+            return 0
+        return self.try_import(item, category, keyword)
+
+    def try_import(self, item: Any, category: str, keyword: str, attempts: int = 0) -> int:
+        """
+        Save one item and report the outcome to the Shopify circuit. Throttling and
+        server errors park the item instead of sleeping on them, up to max_attempts
+        tries. Returns 1 if the item was imported, else 0.
+        """
+        try:
+            imported = self.save(item, category, keyword)
+            if self.shopify_circuit:
+                self.shopify_circuit.record_success()
+            return int(imported)
+        except Exception as e:
+            if getattr(e, 'maybe_applied', False):
+                # The create timed out or got a 5xx and may exist already; resending
+                # it could duplicate the product
+                if self.shopify_circuit:
+                    self.shopify_circuit.record_failure()
+                print(f"      ❌ Save of {item.item_id} may have gone through ({e}); not resending it")
+                return 0
+            if not is_congestion_error(e):
+                print(f"      ❌ Error importing item: {e}")
+                return 0
+            if self.shopify_circuit:
+                self.shopify_circuit.record_failure()
+            attempts += 1
+            if attempts >= self.max_attempts:
+                print(f"      ❌ Giving up on {item.item_id} after {attempts} throttled attempts: {e}")
+            else:
+                print(f"      ⏸️ Shopify is throttling; parking {item.item_id} for later")
+                self.items.append((item, category, keyword, attempts))
+            return 0
+
+    def resume(self) -> int:
+        """
+        Finish parked searches and imports, waiting out each cool-down instead of
+        hammering the API. Returns the number imported.
+        """
+        imported = 0
+        while self.keywords or self.items:
+            progressed = False
+            walmart_wait = self.walmart_circuit.retry_after() if self.walmart_circuit else 0.0
+            if self.keywords and walmart_wait == 0:
+                category, keyword = self.keywords.popleft()
+                found = self.search(keyword, category)
+                if found is None:
+                    self.keywords.append((category, keyword))
+                else:
+                    self.items.extend((item, category, keyword, 0) for item in found)
+                    progressed = True
+            if self.items and (self.shopify_circuit is None or self.shopify_circuit.allow()):
+                item, category, keyword, attempts = self.items.popleft()
+                if self.shopify_circuit is None and attempts:
+                    time.sleep(min(self.max_delay, 2.0 ** attempts))
+                imported += self.try_import(item, category, keyword, attempts)
+                progressed = True
+            if not progressed:
+                shopify_wait = self.shopify_circuit.retry_after() if self.shopify_circuit else 30.0
+                waits = [w for w, queue in ((walmart_wait, self.keywords), (shopify_wait, self.items)) if queue]
+                time.sleep(max(1.0, min(waits)))
+        return imported
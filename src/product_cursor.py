@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Optional, Any, Iterator
+from urllib.parse import urlparse, parse_qs
+
+
+def parse_last_doc(next_page: Optional[str]) -> Optional[str]:
+    """Extract the lastDoc cursor from a paginated items nextPage URL"""
+    if not next_page:
+        return None
+    values = parse_qs(urlparse(next_page).query).get('lastDoc')
+    return values[0] if values else None
+
+
+class ProductCursor:
+    """
+    Lazy iterator over the paginated items endpoint.
+
+    Follows nextPage/lastDoc cursors and yields items one at a time, so a
+    full-category crawl holds at most two pages in memory. While the caller
+    works through the current page, the next one is already being fetched on a
+    background thread.
+
+    With max_items, each request asks only for the items still needed and no
+    page is requested once the limit is covered.
+
+    resume_token is the lastDoc of the page currently being yielded (None for the
+    first page). Passing it back as iter_products(resume_token=...) restarts from
+    that page, so items are delivered at least once across restarts.
+    """
+
+    def __init__(self,
+                 client,
+                 page_size: Optional[int] = None,
+                 max_items: Optional[int] = None,
+                 resume_token: Optional[str] = None,
+                 prefetch: bool = True,
+                 **filters):
+        self.client = client
+        self.page_size = page_size
+        self.max_items = max_items
+        self.filters = filters
+        self.prefetch = prefetch
+
+        self.resume_token = resume_token
+        self.pages_fetched = 0
+        self.items_yielded = 0
+        self.error: Optional[str] = None
+        self.exhausted = False
+
+    def _fetch_page(self, last_doc: Optional[str], count: Optional[int]) -> Dict[str, Any]:
+        return self.client.get_products(count=count, lastDoc=last_doc, **self.filters)
+
+    def _count_after(self, delivered: int) -> Optional[int]:
+        """Page size for the request after `delivered` items (None: the client's tuned size)"""
+        if self.max_items is None:
+            return self.page_size
+        size = self.page_size or self.client.batch_tuner.size('products')
+        return max(1, min(size, self.max_items - delivered))
+
+    def _wants_more(self, delivered: int) -> bool:
+        return self.max_items is None or delivered < self.max_items
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            page_token = self.resume_token
+            pending: Optional[Future] = None
+            if not self._wants_more(0):
+                return
+            result = self._fetch_page(page_token, self._count_after(0))
+
+            while True:
+                if not result['success']:
+                    self.error = result.get('error')
+                    return
+                self.pages_fetched += 1
+
+                items = result['data'].get('items', [])
+                next_token = parse_last_doc(result['metadata'].get('next_page'))
+                if not items:
+                    self.exhausted = True
+                    return
+
+                # Start fetching the next page before handing out this one, unless
+                # this page already covers max_items
+                delivered = self.items_yielded + len(items)
+                if next_token and executor and self._wants_more(delivered):
+                    pending = executor.submit(self._fetch_page, next_token, self._count_after(delivered))
+
+                for item in items:
+                    if self.max_items is not None and self.items_yielded >= self.max_items:
+                        return
+                    self.items_yielded += 1
+                    yield item
+
+                # This page is fully consumed; a restart should begin at the next one
+                self.resume_token = next_token
+                if not next_token:
+                    self.exhausted = True
+                    return
+                if not self._wants_more(self.items_yielded):
+                    return
+                page_token = next_token
+                result = pending.result() if pending else self._fetch_page(page_token, self._count_after(self.items_yielded))
+                pending = None
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
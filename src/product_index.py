@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import requests
+
+try:
+    from .catalog_mirror import CatalogMirror
+    from .shopify_bulk import BulkOperationError, export_products
+    from .shopify_client import ShopifyAdminClient, ShopifyAPIError
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from catalog_mirror import CatalogMirror
+    from shopify_bulk import BulkOperationError, export_products
+    from shopify_client import ShopifyAdminClient, ShopifyAPIError
+
+logger = logging.getLogger(__name__)
+
+# Older imports stored the GTIN as the SKU with this prefix
+LEGACY_SKU_PREFIX = 'JN_'
+
+
+class ProductIndex:
+    """
+    In-memory SKU/barcode -> (product_id, variant_id) index for upsert lookups.
+
+    Loaded once per run from the catalog mirror (after an incremental sync) or,
+    when there is no seeded mirror, from one bulk export of the tagged products.
+    Lookups are then dictionary hits instead of paging through the store for
+    every item, and products created during the run are added in place so later
+    items see them.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def add(self, product_id: int, variant_id: Optional[int], sku: Any = None, barcode: Any = None):
+        """Index a variant under its SKU and barcode (blank values are skipped)"""
+        with self._lock:
+            for key in (sku, barcode):
+                key = str(key or '').strip()
+                if key:
+                    # First seen wins, as the old page-order scan did
+                    self._by_key.setdefault(key, (product_id, variant_id))
+
+    def add_products(self, products: Iterable[Dict[str, Any]]):
+        """Index REST-shaped products with their variants"""
+        for product in products:
+            for variant in product.get('variants') or []:
+                self.add(product['id'], variant.get('id'), variant.get('sku'), variant.get('barcode'))
+
+    def lookup(self, gtin: str) -> Optional[Tuple[int, int]]:
+        """
+        (product_id, variant_id) of the variant whose SKU or barcode is `gtin`, or
+        whose SKU is the legacy JN_<gtin>; None when not indexed.
+        """
+        gtin = (gtin or '').strip()
+        if not gtin:
+            return None
+        return self._by_key.get(gtin) or self._by_key.get(LEGACY_SKU_PREFIX + gtin)
+
+    @classmethod
+    def from_mirror(cls, mirror: CatalogMirror, tag: Optional[str] = None) -> 'ProductIndex':
+        """Build from the mirror's variants, optionally only products with `tag`"""
+        index = cls()
+        sql = 'SELECT v.product_id, v.id, v.sku, v.barcode FROM variants v'
+        params: Tuple[Any, ...] = ()
+        if tag is not None:
+            sql += ' JOIN product_tags t ON t.product_id = v.product_id WHERE t.tag = ?'
+            params = (tag,)
+        for row in mirror.query(sql + ' ORDER BY v.product_id, v.id', params):
+            index.add(row['product_id'], row['id'], row['sku'], row['barcode'])
+        return index
+
+    @classmethod
+    def from_export(cls, tag: Optional[str] = None, client: Optional[ShopifyAdminClient] = None) -> 'ProductIndex':
+        """
+        Build from one bulk export, optionally only products with `tag`.
+
+        Raises:
+            BulkOperationError / ShopifyAPIError: the export couldn't be run
+        """
+        index = cls()
+        index.add_products(export_products(f"tag:'{tag}'" if tag else None, client))
+        return index
+
+    @classmethod
+    def load(cls, tag: Optional[str] = None, client: Optional[ShopifyAdminClient] = None) -> 'ProductIndex':
+        """
+        Build from the catalog mirror when it has been seeded (syncing it first, so
+        products created by earlier runs are included), else from a bulk export.
+
+        Raises:
+            BulkOperationError / ShopifyAPIError: neither source could be read
+        """
+        mirror = CatalogMirror.from_env(client)
+        if mirror is not None and mirror.synced_at is not None:
+            try:
+                mirror.sync()
+                index = cls.from_mirror(mirror, tag)
+                logger.info(f"Product index loaded {len(index)} keys from the catalog mirror")
+                return index
+            except (BulkOperationError, ShopifyAPIError, requests.RequestException, sqlite3.OperationalError) as e:
+                logger.warning(f"Catalog mirror sync failed, indexing from a bulk export: {e}")
+        index = cls.from_export(tag, client)
+        logger.info(f"Product index loaded {len(index)} keys from a bulk export")
+        return index
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+try:
+    from .shared_state import SharedStateFile
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from shared_state import SharedStateFile
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds to wait"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class SharedRateLimiter:
+    """
+    Token bucket shared by every process on the host.
+
+    Bucket state lives in a small JSON file guarded by an exclusive flock, so all
+    workers started by launch_parallel.py / launch_wave*.py draw from one quota
+    instead of each pacing itself. Callers reserve a token and sleep for the
+    returned delay; the bucket may go into debt so concurrent callers queue up
+    at exactly `qps` instead of stampeding when tokens refill.
+    """
+
+    def __init__(self, qps: float, burst: float, state_path: str):
+        self.qps = qps
+        self.burst = max(1.0, burst)
+        self.state_path = state_path
+        self._state = SharedStateFile(
+            state_path,
+            lambda now: {'tokens': self.burst, 'updated': now, 'blocked_until': 0.0}
+        )
+
+    @classmethod
+    def from_env(cls, prefix: str = 'WALMART') -> Optional['SharedRateLimiter']:
+        """
+        Build a limiter from <prefix>_RATE_LIMIT_QPS / _BURST / _FILE.
+        Returns None when the QPS is 0 (limiting disabled).
+        """
+        qps = float(os.getenv(f'{prefix}_RATE_LIMIT_QPS', 5))
+        if qps <= 0:
+            return None
+        burst = float(os.getenv(f'{prefix}_RATE_LIMIT_BURST', qps * 2))
+        default_path = os.path.join(tempfile.gettempdir(), f'{prefix.lower()}_rate_limit.json')
+        return cls(qps, burst, os.getenv(f'{prefix}_RATE_LIMIT_FILE', default_path))
+
+    def _update(self, mutate):
+        """Apply mutate(state, now) to the shared bucket state"""
+        return self._state.update(mutate)
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state['updated'])
+        state['tokens'] = min(self.burst, state['tokens'] + elapsed * self.qps)
+        state['updated'] = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens from the bucket and return how long the caller must wait before sending"""
+        def _reserve(state, now):
+            self._refill(state, now)
+            state['tokens'] -= tokens
+            debt_wait = -state['tokens'] / self.qps if state['tokens'] < 0 else 0.0
+            return max(debt_wait, state['blocked_until'] - now, 0.0)
+
+        return self._update(_reserve)
+
+    def pending(self, tokens: float = 1.0) -> float:
+        """How long a reserve() would have to wait right now, without taking anything"""
+        def _pending(state, now):
+            self._refill(state, now)
+            debt_wait = (tokens - state['tokens']) / self.qps if state['tokens'] < tokens else 0.0
+            return max(debt_wait, state['blocked_until'] - now, 0.0)
+
+        return self._update(_pending)
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the caller may send a request"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def sync(self, available: float):
+        """
+        Lower the bucket to what the server reports is left (e.g. Shopify's call-limit
+        header), so traffic from other clients of the same quota is accounted for.
+        Never raises it: other processes may hold reservations the server hasn't seen yet.
+        """
+        def _sync(state, now):
+            self._refill(state, now)
+            state['tokens'] = min(state['tokens'], available)
+
+        self._update(_sync)
+
+    def penalize(self, retry_after: float):
+        """
+        Pause every process sharing the bucket for retry_after seconds (e.g. after a 429)
+        and drain the burst allowance so traffic resumes at the steady rate.
+        """
+        def _penalize(state, now):
+            self._refill(state, now)
+            state['blocked_until'] = max(state['blocked_until'], now + retry_after)
+            # Enough debt that the bucket is back to one token when the pause ends;
+            # otherwise it refills during the pause and a full burst goes out at once
+            state['tokens'] = min(state['tokens'], 1.0 - retry_after * self.qps)
+
+        self._update(_penalize)
@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, List, Any
+
+try:
+    from . import json_codec
+except ImportError:  # imported by flat name, with src/ on sys.path
+    import json_codec
+
+# Fields that change often (price, stock, shipping, seller); everything else
+# (title, images, descriptions, category, identifiers) is treated as static
+VOLATILE_FIELDS = frozenset({
+    'salePrice', 'msrp', 'stock', 'availableOnline', 'offerType', 'clearance',
+    'rollback', 'specialBuy', 'marketplace', 'sellerInfo', 'bundle',
+    'standardShipRate', 'twoThreeDayShippingRate', 'overnightShippingRate',
+    'freeShippingOver35Dollars', 'shipToStore', 'freeShipToStore',
+    'pickupTodayEligible', 'availableOnlineSameDay', 'offerId'
+})
+
+
+class ResponseCache:
+    """
+    On-disk TTL cache for Walmart responses, backed by SQLite in WAL mode so
+    parallel import/audit processes can share it.
+
+    Entries are keyed by endpoint plus normalized params (or by a single item ID
+    for the items endpoint). Each entry records when it was fetched; readers pick
+    the TTL for the field class they need: callers reading only static fields
+    (title, images, description) accept entries up to static_ttl old, while
+    anything that reads price/stock is limited to volatile_ttl. Static-only reads
+    of entries older than volatile_ttl come back without VOLATILE_FIELDS, so a
+    stale price can never be mistaken for a current one.
+
+    accessed_at only orders LRU eviction, so a hit refreshes it just when it is
+    more than a quarter of volatile_ttl old; most reads then never write and
+    don't contend for the database's write lock.
+    """
+
+    def __init__(self,
+                 path: str,
+                 volatile_ttl: float = 900,
+                 static_ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 200000):
+        self.path = path
+        self.volatile_ttl = volatile_ttl
+        self.static_ttl = static_ttl
+        self.max_entries = max_entries
+        self.touch_interval = volatile_ttl / 4
+        self._local = threading.local()
+        self._puts_since_evict = 0
+        self._evict_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' payload TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)')
+        conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """Build the cache from WALMART_CACHE_* env vars; None when disabled"""
+        if os.getenv('WALMART_CACHE_DISABLED', 'false').lower() in ('1', 'true', 'yes'):
+            return None
+        return cls(
+            path=os.getenv('WALMART_CACHE_PATH', '.cache/walmart_responses.sqlite3'),
+            volatile_ttl=float(os.getenv('WALMART_CACHE_VOLATILE_TTL', 900)),
+            static_ttl=float(os.getenv('WALMART_CACHE_STATIC_TTL', 7 * 24 * 3600)),
+            max_entries=int(os.getenv('WALMART_CACHE_MAX_ENTRIES', 200000))
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """Stable cache key from an endpoint name and its query params"""
+        normalized = sorted((str(k), str(v)) for k, v in params.items() if v is not None)
+        return endpoint + '?' + '&'.join(f'{k}={v}' for k, v in normalized)
+
+    def _max_age(self, static_only: bool) -> float:
+        return self.static_ttl if static_only else self.volatile_ttl
+
+    @staticmethod
+    def _strip_volatile(payload: Any) -> Any:
+        """Drop volatile fields from an item, a list of items or a page with 'items'"""
+        if isinstance(payload, list):
+            return [ResponseCache._strip_volatile(p) for p in payload]
+        if isinstance(payload, dict):
+            if isinstance(payload.get('items'), list):
+                return dict(payload, items=ResponseCache._strip_volatile(payload['items']))
+            return {k: v for k, v in payload.items() if k not in VOLATILE_FIELDS}
+        return payload
+
+    def get(self, key: str, static_only: bool = False) -> Optional[Any]:
+        """Return the cached payload for key if it is fresh enough, else None"""
+        return self.get_many([key], static_only).get(key)
+
+    def get_many(self, keys: List[str], static_only: bool = False) -> Dict[str, Any]:
+        """Return {key: payload} for the keys that have a fresh entry"""
+        if not keys:
+            return {}
+        now = time.time()
+        oldest = now - self._max_age(static_only)
+        conn = self._connect()
+        found: Dict[str, Any] = {}
+        stale_access: List[str] = []
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT key, payload, fetched_at, accessed_at FROM entries'
+                f' WHERE key IN ({placeholders}) AND fetched_at >= ?',
+                (*chunk, oldest)
+            ).fetchall()
+            for key, payload, fetched_at, accessed_at in rows:
+                payload = json_codec.loads(payload)
+                if now - fetched_at > self.volatile_ttl:
+                    # Static-only read of an entry whose price/stock are past their TTL
+                    payload = self._strip_volatile(payload)
+                found[key] = payload
+                if now - accessed_at > self.touch_interval:
+                    stale_access.append(key)
+        if stale_access:
+            for i in range(0, len(stale_access), 500):
+                chunk = stale_access[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                conn.execute(f'UPDATE entries SET accessed_at = ? WHERE key IN ({placeholders})', (now, *chunk))
+            conn.commit()
+        return found
+
+    def put(self, key: str, payload: Any):
+        """Store a payload under key"""
+        self.put_many({key: payload})
+
+    def put_many(self, entries: Dict[str, Any]):
+        """Store several payloads at once"""
+        if not entries:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO entries (key, payload, fetched_at, accessed_at) VALUES (?, ?, ?, ?)',
+            [(key, json_codec.dumps(payload), now, now) for key, payload in entries.items()]
+        )
+        conn.commit()
+
+        with self._evict_lock:
+            self._puts_since_evict += len(entries)
+            should_evict = self._puts_since_evict >= 1000
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop entries past every TTL, then least-recently-used entries beyond max_entries"""
+        conn = self._connect()
+        conn.execute('DELETE FROM entries WHERE fetched_at < ?', (time.time() - max(self.static_ttl, self.volatile_ttl),))
+        (count,) = conn.execute('SELECT COUNT(*) FROM entries').fetchone()
+        if count > self.max_entries:
+            # Trim to 90% so we are not evicting on every put
+            excess = count - int(self.max_entries * 0.9)
+            conn.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)',
+                (excess,)
+            )
+        conn.commit()
+
+    def clear(self):
+        """Remove every entry"""
+        conn = self._connect()
+        conn.execute('DELETE FROM entries')
+        conn.commit()
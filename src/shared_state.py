@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to per-process state
+    fcntl = None
+
+
+class SharedStateFile:
+    """
+    Small JSON document shared by every process on the host.
+
+    Each update() reads the document, applies a mutation and writes it back
+    while holding an exclusive flock on a sibling .lock file, so concurrent
+    workers (launch_parallel.py, launch_wave*.py) see one consistent state.
+    The document is only rewritten when the mutation changed it, and then via a
+    temp file and os.replace, so read() can take an unlocked snapshot that is
+    never half-written. Where fcntl is unavailable the state is kept per
+    process instead.
+    """
+
+    def __init__(self, path: str, initial: Callable[[float], Dict[str, Any]]):
+        """
+        Args:
+            path: State file location
+            initial: Builds the default fields for a given time; missing fields
+                     in the file are filled from it
+        """
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.initial = initial
+        self._lock = threading.Lock()
+        self._local_state = initial(time.time())
+
+    def _load(self, now: float) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            state = json.loads(raw) if raw else {}
+        except (OSError, ValueError):
+            state = {}
+        if not isinstance(state, dict):
+            state = {}
+        for key, value in self.initial(now).items():
+            state.setdefault(key, value)
+        return state
+
+    def _write(self, payload: str):
+        # Only called under the flock, so one temp name per state file is enough
+        tmp_path = self.path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload.encode('utf-8'))
+        os.replace(tmp_path, self.path)
+
+    def read(self) -> Dict[str, Any]:
+        """
+        Unlocked snapshot of the state, for fast paths that only need to look.
+        Anything that acts on the result and may change it must go through update().
+        """
+        if fcntl is None:
+            with self._lock:
+                return dict(self._local_state)
+        return self._load(time.time())
+
+    def update(self, mutate: Callable[[Dict[str, Any], float], Any]) -> Any:
+        """Apply mutate(state, now) under the file lock and return its result"""
+        with self._lock:
+            if fcntl is None:
+                return mutate(self._local_state, time.time())
+
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                now = time.time()
+                state = self._load(now)
+                before = json.dumps(state)
+
+                result = mutate(state, now)
+
+                payload = json.dumps(state)
+                if payload != before:
+                    self._write(payload)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
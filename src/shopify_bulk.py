@@ -0,0 +1,538 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+try:
+    from .json_codec import dumps, loads
+    from .shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from json_codec import dumps, loads
+    from shopify_client import ShopifyAdminClient, ShopifyAPIError, get_shopify_client
+
+logger = logging.getLogger(__name__)
+
+# Fields every catalog scan needs; shaped back into REST-style dicts by rest_product().
+# %(inventory_level)s optionally adds LOCATION_LEVEL_FIELD for one location.
+PRODUCTS_QUERY = """
+{
+  products%(filter)s {
+    edges {
+      node {
+        id
+        title
+        handle
+        vendor
+        productType
+        status
+        tags
+        updatedAt
+        variants {
+          edges {
+            node {
+              id
+              title
+              sku
+              barcode
+              price
+              inventoryQuantity
+              inventoryManagement
+              inventoryPolicy
+              inventoryItem { id%(inventory_level)s }
+              fulfillmentService { handle }
+              selectedOptions { value }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Available quantity at one location, read into the variant's 'location_available'
+LOCATION_LEVEL_FIELD = ' inventoryLevel(locationId: %s) { quantities(names: ["available"]) { quantity } }'
+
+RUN_QUERY_MUTATION = """
+mutation($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+OPERATION_QUERY = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation { id status errorCode objectCount url }
+  }
+}
+"""
+
+CURRENT_OPERATION_QUERY = """
+query($type: BulkOperationType!) {
+  currentBulkOperation(type: $type) { id status }
+}
+"""
+
+RUN_MUTATION_MUTATION = """
+mutation($mutation: String!, $path: String!) {
+  bulkOperationRunMutation(mutation: $mutation, stagedUploadPath: $path) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+STAGED_UPLOAD_MUTATION = """
+mutation($filename: String!) {
+  stagedUploadsCreate(input: [{resource: BULK_MUTATION_VARIABLES, filename: $filename, mimeType: "text/jsonl", httpMethod: POST}]) {
+    stagedTargets { url parameters { name value } }
+    userErrors { field message }
+  }
+}
+"""
+
+# Run once per line of the staged JSONL ({"input": ProductInput}) by bulk imports
+PRODUCT_CREATE_MUTATION = """
+mutation call($input: ProductInput!) {
+  productCreate(input: $input) {
+    product {
+      id
+      variants(first: 1) { edges { node { id inventoryItem { id } } } }
+    }
+    userErrors { field message }
+  }
+}
+"""
+
+# Shopify's cap on a bulk mutation's staged variables file
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+_FINISHED = ('COMPLETED', 'CANCELED', 'EXPIRED', 'FAILED')
+
+
+class BulkOperationError(Exception):
+    """Raised when a bulk operation can't be started, fails, or doesn't finish in time"""
+
+
+def gid_to_id(gid: Optional[str]) -> Optional[int]:
+    """'gid://shopify/Product/123' -> 123 (the REST id)"""
+    if not gid:
+        return None
+    return int(gid.rsplit('/', 1)[-1])
+
+
+def gid_type(gid: str) -> str:
+    """'gid://shopify/ProductVariant/123' -> 'ProductVariant'"""
+    return gid.split('/')[-2]
+
+
+def rest_variant(node: Dict[str, Any], product_id: Optional[int] = None) -> Dict[str, Any]:
+    """Shape a bulk-export ProductVariant like a REST variant"""
+    options = [o.get('value') for o in node.get('selectedOptions') or []]
+    variant = {
+        'id': gid_to_id(node['id']),
+        'product_id': product_id or gid_to_id(node.get('__parentId')),
+        'title': node.get('title'),
+        'sku': node.get('sku') or '',
+        'barcode': node.get('barcode'),
+        'price': node.get('price'),
+        'inventory_quantity': node.get('inventoryQuantity') or 0,
+        'inventory_management': (node.get('inventoryManagement') or '').lower() or None,
+        'inventory_policy': (node.get('inventoryPolicy') or '').lower() or None,
+        'inventory_item_id': gid_to_id((node.get('inventoryItem') or {}).get('id')),
+        'fulfillment_service': (node.get('fulfillmentService') or {}).get('handle'),
+    }
+    if 'inventoryLevel' in (node.get('inventoryItem') or {}):
+        # Exported with a location: None when the item isn't stocked there
+        level = node['inventoryItem']['inventoryLevel'] or {}
+        quantities = level.get('quantities') or []
+        variant['location_available'] = quantities[0].get('quantity') if quantities else None
+    for i in range(3):
+        variant[f'option{i + 1}'] = options[i] if i < len(options) else None
+    return variant
+
+
+def product_input(product: Dict[str, Any],
+                  location_id: Optional[int] = None,
+                  fulfillment_service_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Turn a REST products.json payload (what the importers already build) into a
+    GraphQL ProductInput for bulk creation. Variant stock is set at `location_id`,
+    and variants are assigned to the fulfillment service when its id is given.
+    """
+    tags = product.get('tags') or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',') if t.strip()]
+    graphql_input = {
+        'title': product.get('title'),
+        'descriptionHtml': product.get('body_html') or '',
+        'vendor': product.get('vendor'),
+        'productType': product.get('product_type'),
+        'tags': tags,
+        'status': (product.get('status') or 'active').upper(),
+    }
+    if product.get('images'):
+        graphql_input['images'] = [{'src': image['src']} for image in product['images']]
+    if product.get('metafields'):
+        graphql_input['metafields'] = [
+            {k: m[k] for k in ('namespace', 'key', 'value', 'type')} for m in product['metafields']
+        ]
+
+    variants = []
+    for variant in product.get('variants') or []:
+        variant_input = {
+            'price': str(variant.get('price') or '0.00'),
+            'inventoryPolicy': (variant.get('inventory_policy') or 'deny').upper(),
+        }
+        management = variant.get('inventory_management')
+        if management:
+            # REST takes 'shopify' or the fulfillment service's handle
+            variant_input['inventoryManagement'] = 'SHOPIFY' if management == 'shopify' else 'FULFILLMENT_SERVICE'
+        for rest_key, graphql_key in (('sku', 'sku'), ('barcode', 'barcode')):
+            if variant.get(rest_key):
+                variant_input[graphql_key] = str(variant[rest_key])
+        if fulfillment_service_id:
+            variant_input['fulfillmentServiceId'] = f'gid://shopify/FulfillmentService/{fulfillment_service_id}'
+        if location_id and variant.get('inventory_quantity') is not None:
+            variant_input['inventoryQuantities'] = [{
+                'availableQuantity': int(variant['inventory_quantity']),
+                'locationId': f'gid://shopify/Location/{location_id}'
+            }]
+        variants.append(variant_input)
+    if variants:
+        graphql_input['variants'] = variants
+    return graphql_input
+
+
+def rest_product(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a reassembled bulk-export Product like a REST product (tags as a comma string)"""
+    product_id = gid_to_id(node['id'])
+    return {
+        'id': product_id,
+        'admin_graphql_api_id': node['id'],
+        'title': node.get('title') or '',
+        'handle': node.get('handle'),
+        'vendor': node.get('vendor') or '',
+        'product_type': node.get('productType'),
+        'status': (node.get('status') or '').lower(),
+        'tags': ', '.join(node.get('tags') or []),
+        'updated_at': node.get('updatedAt'),
+        'variants': [rest_variant(v, product_id) for v in node.get('__children', {}).get('ProductVariant', [])],
+    }
+
+
+class BulkOperationRunner:
+    """
+    Submit, poll and download GraphQL Bulk Operations.
+
+    Shopify runs at most one bulk query and one bulk mutation per app and store at
+    a time. When another worker's operation of the same type is running, submitting
+    waits for it to finish and then tries again.
+    """
+
+    def __init__(self,
+                 client: ShopifyAdminClient,
+                 poll_interval: float = 1.0,
+                 max_poll_interval: float = 15.0,
+                 timeout: float = 3600.0,
+                 download_timeout: float = 60.0,
+                 chunk_size: int = 1 << 16):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.download_timeout = download_timeout
+        self.chunk_size = chunk_size
+        self.stats = {'operations': 0, 'polls': 0, 'records': 0, 'bytes': 0, 'orphans': 0}
+
+    @classmethod
+    def from_env(cls, client: Optional[ShopifyAdminClient] = None):
+        """Build on the shared Shopify client with SHOPIFY_BULK_POLL_INTERVAL / _MAX_POLL_INTERVAL / _TIMEOUT"""
+        return cls(
+            client or get_shopify_client(),
+            poll_interval=float(os.getenv('SHOPIFY_BULK_POLL_INTERVAL', 1)),
+            max_poll_interval=float(os.getenv('SHOPIFY_BULK_MAX_POLL_INTERVAL', 15)),
+            timeout=float(os.getenv('SHOPIFY_BULK_TIMEOUT', 3600))
+        )
+
+    def _submit(self, mutation: str, variables: Dict[str, Any], field: str, operation_type: str) -> str:
+        """
+        Run a bulkOperationRun* mutation and return the new operation id, waiting out
+        another operation of the same type if one is in progress.
+
+        Raises:
+            BulkOperationError: Shopify rejected the operation
+        """
+        deadline = time.time() + self.timeout
+        while True:
+            # Re-running a query export is harmless; a repeated import mutation would create products twice
+            data = self.client.graphql(mutation, variables, idempotent=operation_type == 'QUERY')
+            result = data.get(field) or {}
+            errors = result.get('userErrors') or []
+            if not errors and result.get('bulkOperation'):
+                self.stats['operations'] += 1
+                return result['bulkOperation']['id']
+
+            message = '; '.join(e.get('message', str(e)) for e in errors) or 'no bulk operation returned'
+            if 'in progress' not in message or time.time() > deadline:
+                raise BulkOperationError(f"{field} failed: {message}")
+            current = self.client.graphql(CURRENT_OPERATION_QUERY, {'type': operation_type}).get('currentBulkOperation') or {}
+            if current.get('id') and current.get('status') not in _FINISHED:
+                logger.info(f"Bulk operation {current['id']} already running; waiting for it to finish")
+                self.wait(current['id'], deadline - time.time())
+
+    def wait(self, operation_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Poll an operation (backing off up to max_poll_interval) until it finishes.
+
+        Returns:
+            The finished operation: status, errorCode, objectCount, url
+
+        Raises:
+            BulkOperationError: still running after `timeout` seconds
+        """
+        deadline = time.time() + (timeout if timeout is not None else self.timeout)
+        interval = self.poll_interval
+        while True:
+            self.stats['polls'] += 1
+            operation = self.client.graphql(OPERATION_QUERY, {'id': operation_id}).get('node') or {}
+            if operation.get('status') in _FINISHED:
+                return operation
+            if time.time() + interval > deadline:
+                raise BulkOperationError(f"Bulk operation {operation_id} still {operation.get('status')} after timeout")
+            time.sleep(interval)
+            interval = min(self.max_poll_interval, interval * 1.5)
+
+    def _result_url(self, operation_id: str) -> Optional[str]:
+        """
+        Wait for an operation and return its result URL (None when it produced nothing).
+
+        Raises:
+            BulkOperationError: the operation failed, was canceled or expired
+        """
+        operation = self.wait(operation_id)
+        if operation['status'] != 'COMPLETED':
+            raise BulkOperationError(
+                f"Bulk operation {operation_id} {operation['status']}: {operation.get('errorCode') or 'no error code'}"
+            )
+        logger.info(f"Bulk operation {operation_id} completed with {operation.get('objectCount')} objects")
+        return operation.get('url')
+
+    def download(self, url: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the JSONL result and yield one flat record per line.
+
+        The URL is a pre-signed storage link, so it is fetched without the Shopify
+        access token.
+        """
+        if not url:
+            return
+        with requests.get(url, stream=True, timeout=self.download_timeout) as response:
+            if response.status_code != 200:
+                raise BulkOperationError(f"Bulk result download failed: HTTP {response.status_code}")
+            for line in response.iter_lines(chunk_size=self.chunk_size):
+                if not line:
+                    continue
+                self.stats['bytes'] += len(line) + 1
+                self.stats['records'] += 1
+                yield loads(line)
+
+
+class ShopifyBulkExporter(BulkOperationRunner):
+    """
+    Full-catalog reads through GraphQL Bulk Operations.
+
+    Instead of walking products.json 250 at a time (dozens of throttled calls on a
+    large store), a read is one bulkOperationRunQuery, a few cheap status polls
+    and a single download of the JSONL result. The file is streamed and parsed a
+    line at a time; nested connections come back as flat lines carrying
+    __parentId, which are reattached under their parent's `__children`.
+    """
+
+    def start(self, query: str) -> str:
+        """Submit a bulk query and return the operation id"""
+        return self._submit(RUN_QUERY_MUTATION, {'query': query}, 'bulkOperationRunQuery', 'QUERY')
+
+    def run(self, query: str) -> Optional[str]:
+        """Start a bulk query, wait for it and return the result URL (None when nothing matched)"""
+        return self._result_url(self.start(query))
+
+    def reassemble(self, records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Reattach __parentId records to their parents and yield each top-level object
+        once complete, with its children under `__children[<type>]` (e.g.
+        'ProductVariant'). Shopify writes an object's descendants right after it, so
+        only the current top-level object is held in memory.
+        """
+        current = None
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            parent_id = record.get('__parentId')
+            if parent_id is None:
+                if current is not None:
+                    yield current
+                current = record
+                by_id = {record['id']: record} if 'id' in record else {}
+                continue
+            parent = by_id.get(parent_id)
+            if parent is None:
+                self.stats['orphans'] += 1
+                logger.warning(f"Bulk record for {parent_id} arrived outside its parent's block; skipped")
+                continue
+            record_type = gid_type(record['id']) if 'id' in record else 'Object'
+            parent.setdefault('__children', {}).setdefault(record_type, []).append(record)
+            if 'id' in record:
+                by_id[record['id']] = record
+        if current is not None:
+            yield current
+
+    def iter_objects(self, query: str) -> Iterator[Dict[str, Any]]:
+        """Run a bulk query and yield its reassembled top-level objects as they download"""
+        return self.reassemble(self.download(self.run(query)))
+
+    def iter_products(self,
+                      search: Optional[str] = None,
+                      location_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every product (optionally filtered by a products search string such as
+        "tag:'Source:Walmart'") as a REST-shaped dict with its variants. With
+        location_id, each variant also carries 'location_available', its available
+        quantity at that location (None when not stocked there).
+        """
+        query_filter = f'(query: {json.dumps(search)})' if search else ''
+        inventory_level = ''
+        if location_id:
+            inventory_level = LOCATION_LEVEL_FIELD % json.dumps(f'gid://shopify/Location/{location_id}')
+        query = PRODUCTS_QUERY % {'filter': query_filter, 'inventory_level': inventory_level}
+        for node in self.iter_objects(query):
+            yield rest_product(node)
+
+
+def export_products(search: Optional[str] = None,
+                    client: Optional[ShopifyAdminClient] = None,
+                    location_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the whole catalog (or a search) via one bulk operation, optionally with
+    each variant's available quantity at `location_id`.
+
+    Raises:
+        BulkOperationError / ShopifyAPIError: the export couldn't be run
+    """
+    return ShopifyBulkExporter.from_env(client).iter_products(search, location_id)
+
+
+class ShopifyBulkImporter(BulkOperationRunner):
+    """
+    Create products in bulk through a staged JSONL upload and bulkOperationRunMutation.
+
+    Each batch is written as one {"input": ProductInput} line per product, uploaded
+    to Shopify's staged storage and run as a single productCreate bulk mutation.
+    Throughput is then set by Shopify's bulk pipeline instead of one throttled REST
+    round trip per product. The result file is matched back to the caller's source
+    ids by line number.
+    """
+
+    def __init__(self, client: ShopifyAdminClient, max_upload_bytes: int = MAX_UPLOAD_BYTES, **kwargs):
+        super().__init__(client, **kwargs)
+        self.max_upload_bytes = max_upload_bytes
+
+    def stage(self, payload: bytes, filename: str = 'bulk_products.jsonl') -> str:
+        """
+        Upload a JSONL variables file to staged storage.
+
+        Returns:
+            The stagedUploadPath to pass to bulkOperationRunMutation
+
+        Raises:
+            BulkOperationError: the upload target couldn't be created or the upload failed
+        """
+        # A repeated call only reserves another, unused upload target
+        data = self.client.graphql(STAGED_UPLOAD_MUTATION, {'filename': filename}, idempotent=True)
+        result = data.get('stagedUploadsCreate') or {}
+        targets = result.get('stagedTargets') or []
+        if result.get('userErrors') or not targets:
+            raise BulkOperationError(f"stagedUploadsCreate failed: {result.get('userErrors') or 'no target returned'}")
+        target = targets[0]
+        fields = {p['name']: p['value'] for p in target.get('parameters') or []}
+        # Pre-signed storage URL: no Shopify token, the form fields carry the signature
+        response = requests.post(target['url'], data=fields,
+                                 files={'file': (filename, payload, 'text/jsonl')},
+                                 timeout=self.download_timeout)
+        if response.status_code >= 300:
+            raise BulkOperationError(f"Staged upload failed: HTTP {response.status_code} {response.text[:200]}")
+        return fields['key']
+
+    def run_mutation(self, mutation: str, payload: bytes) -> Optional[str]:
+        """Stage the variables file, run the bulk mutation, wait for it and return the result URL"""
+        path = self.stage(payload)
+        operation_id = self._submit(RUN_MUTATION_MUTATION, {'mutation': mutation, 'path': path},
+                                    'bulkOperationRunMutation', 'MUTATION')
+        return self._result_url(operation_id)
+
+    def _batches(self, inputs: List[Tuple[str, Dict[str, Any]]]) -> Iterator[Tuple[List[str], bytes]]:
+        """Split (source_id, ProductInput) pairs into JSONL files under max_upload_bytes"""
+        source_ids: List[str] = []
+        lines: List[bytes] = []
+        size = 0
+        for source_id, graphql_input in inputs:
+            line = (dumps({'input': graphql_input}) + '\n').encode('utf-8')
+            if lines and size + len(line) > self.max_upload_bytes:
+                yield source_ids, b''.join(lines)
+                source_ids, lines, size = [], [], 0
+            source_ids.append(source_id)
+            lines.append(line)
+            size += len(line)
+        if lines:
+            yield source_ids, b''.join(lines)
+
+    def import_products(self, inputs: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Create products in as few bulk mutations as the upload cap allows.
+
+        Args:
+            inputs: (source_id, ProductInput) pairs, e.g. from product_input()
+
+        Returns:
+            Per source id: product_id, variant_id and inventory_item_id (REST ids,
+            None when not created) and the errors reported for that line. A source id
+            missing from the result file, or in a batch that couldn't be staged, run
+            or downloaded, is reported with an error; other batches' results are kept.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for source_ids, payload in self._batches(inputs):
+            logger.info(f"Bulk importing {len(source_ids)} products ({len(payload)} bytes)")
+            error = 'missing from bulk result'
+            try:
+                self._import_batch(source_ids, payload, results)
+            except (BulkOperationError, ShopifyAPIError, requests.exceptions.RequestException) as e:
+                # Only this batch is lost; lines it already reported are kept
+                logger.error(f"Bulk import batch of {len(source_ids)} products failed: {e}")
+                error = f'batch failed: {e}'
+            for source_id in source_ids:
+                results.setdefault(source_id, {'product_id': None, 'variant_id': None,
+                                               'inventory_item_id': None, 'errors': [error]})
+        return results
+
+    def _import_batch(self, source_ids: List[str], payload: bytes, results: Dict[str, Dict[str, Any]]):
+        """Run one productCreate batch and record each result line under its source id"""
+        for line_number, record in enumerate(self.download(self.run_mutation(PRODUCT_CREATE_MUTATION, payload))):
+            # __lineNumber is 0-based into the uploaded file; fall back to result order
+            index = record.get('__lineNumber', line_number)
+            if not 0 <= index < len(source_ids):
+                continue
+            created = (record.get('data') or {}).get('productCreate') or {}
+            product = created.get('product') or {}
+            variant = ((product.get('variants') or {}).get('edges') or [{}])[0].get('node') or {}
+            errors = [e.get('message', str(e)) for e in (created.get('userErrors') or []) + (record.get('errors') or [])]
+            results[source_ids[index]] = {
+                'product_id': gid_to_id(product.get('id')),
+                'variant_id': gid_to_id(variant.get('id')),
+                'inventory_item_id': gid_to_id((variant.get('inventoryItem') or {}).get('id')),
+                'errors': errors if errors or product else ['no product returned'],
+            }
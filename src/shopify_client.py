@@ -0,0 +1,365 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+try:
+    from .rate_limiter import SharedRateLimiter, parse_retry_after
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from rate_limiter import SharedRateLimiter, parse_retry_after
+
+load_dotenv()
+
+# Shopify's standard-plan buckets; Plus stores report larger ones, which are adopted
+# from the first response that shows them
+REST_BUCKET_SIZE = 40
+REST_LEAK_RATE = 2.0
+GRAPHQL_BUCKET_SIZE = 1000
+GRAPHQL_RESTORE_RATE = 50.0
+
+# GraphQL cost reserved for a query whose actual cost hasn't been seen yet
+DEFAULT_QUERY_COST = 50
+
+
+class ShopifyAPIError(Exception):
+    """Raised when a Shopify call fails after retries (429/5xx) or GraphQL returns errors"""
+
+    def __init__(self, status_code: Optional[int], message: str, maybe_applied: bool = False):
+        super().__init__(f"Shopify API error {status_code}: {message}" if status_code else f"Shopify API error: {message}")
+        self.status_code = status_code
+        # A non-idempotent call that timed out or got a 5xx may still have taken effect;
+        # check before sending it again
+        self.maybe_applied = maybe_applied
+
+
+class ShopifyAdminClient:
+    """
+    Shopify Admin API client (REST and GraphQL) paced by the store's leaky buckets.
+
+    Every call first takes capacity from a host-wide bucket (SharedRateLimiter, one
+    for REST calls and one for GraphQL cost points) that is shared by all workers.
+    Each response then syncs that bucket with what Shopify reports:
+    X-Shopify-Shop-Api-Call-Limit for REST, extensions.cost.throttleStatus for GraphQL.
+    Requests go out as fast as the bucket allows instead of after fixed sleeps;
+    a 429 or THROTTLED response pauses every worker until the bucket has drained.
+    """
+
+    def __init__(self,
+                 store_url: str,
+                 access_token: str,
+                 api_version: str = '2024-01',
+                 rest_limiter: Optional[SharedRateLimiter] = None,
+                 graphql_limiter: Optional[SharedRateLimiter] = None,
+                 bucket_margin: float = 2.0,
+                 max_retries: int = 5,
+                 timeout: float = 30.0,
+                 pool_size: int = 10):
+        self.store_url = store_url.replace('https://', '').rstrip('/')
+        self.access_token = access_token
+        self.api_version = api_version
+        self.base_url = f"https://{self.store_url}/admin/api/{api_version}"
+        self.rest_limiter = rest_limiter
+        self.graphql_limiter = graphql_limiter
+        self.bucket_margin = bucket_margin
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'X-Shopify-Access-Token': access_token,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        })
+
+        self._primary_location_id: Optional[int] = None
+        # Last actual cost per GraphQL query text, reserved up front next time
+        self._query_costs: Dict[str, float] = {}
+        self.stats = {'rest_calls': 0, 'graphql_calls': 0, 'throttled': 0, 'retries': 0, 'wait_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'ShopifyAdminClient':
+        """
+        Build from SHOPIFY_STORE_URL / SHOPIFY_ACCESS_TOKEN / SHOPIFY_API_VERSION.
+        Bucket sizes and rates come from SHOPIFY_REST_BUCKET_SIZE / _LEAK_RATE and
+        SHOPIFY_GRAPHQL_BUCKET_SIZE / _RESTORE_RATE; SHOPIFY_RATE_LIMIT_DISABLED
+        turns pacing off (429s are still retried).
+        """
+        store_url = os.getenv('SHOPIFY_STORE_URL')
+        access_token = os.getenv('SHOPIFY_ACCESS_TOKEN')
+        if not store_url or not access_token:
+            raise ValueError("SHOPIFY_STORE_URL and SHOPIFY_ACCESS_TOKEN must be set")
+
+        rest_limiter = graphql_limiter = None
+        if os.getenv('SHOPIFY_RATE_LIMIT_DISABLED', 'false').lower() not in ('1', 'true', 'yes'):
+            store = re.sub(r'[^A-Za-z0-9]+', '_', store_url.replace('https://', '').split('.')[0])
+            state_dir = os.getenv('SHOPIFY_RATE_LIMIT_DIR', tempfile.gettempdir())
+            rest_limiter = SharedRateLimiter(
+                float(os.getenv('SHOPIFY_REST_LEAK_RATE', REST_LEAK_RATE)),
+                float(os.getenv('SHOPIFY_REST_BUCKET_SIZE', REST_BUCKET_SIZE)),
+                os.path.join(state_dir, f'shopify_{store}_rest_bucket.json')
+            )
+            graphql_limiter = SharedRateLimiter(
+                float(os.getenv('SHOPIFY_GRAPHQL_RESTORE_RATE', GRAPHQL_RESTORE_RATE)),
+                float(os.getenv('SHOPIFY_GRAPHQL_BUCKET_SIZE', GRAPHQL_BUCKET_SIZE)),
+                os.path.join(state_dir, f'shopify_{store}_graphql_bucket.json')
+            )
+        return cls(
+            store_url,
+            access_token,
+            api_version=os.getenv('SHOPIFY_API_VERSION', '2024-01'),
+            rest_limiter=rest_limiter,
+            graphql_limiter=graphql_limiter,
+            bucket_margin=float(os.getenv('SHOPIFY_BUCKET_MARGIN', 2)),
+            max_retries=int(os.getenv('SHOPIFY_MAX_RETRIES', 5)),
+            timeout=float(os.getenv('SHOPIFY_REQUEST_TIMEOUT', 30))
+        )
+
+    def _bump(self, stat: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _wait(self, limiter: Optional[SharedRateLimiter], cost: float = 1.0):
+        if limiter is None:
+            return
+        wait = limiter.reserve(min(cost, limiter.burst))
+        if wait > 0:
+            self._bump('wait_seconds', wait)
+            time.sleep(wait)
+
+    def url(self, path: str) -> str:
+        """Absolute URL for an Admin API path ('products.json') or an already absolute URL"""
+        if path.startswith('http'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # --- REST -----------------------------------------------------------------
+
+    def _observe_rest_limit(self, response: requests.Response):
+        """Sync the REST bucket with X-Shopify-Shop-Api-Call-Limit ('used/size')"""
+        header = response.headers.get('X-Shopify-Shop-Api-Call-Limit')
+        if not header or self.rest_limiter is None:
+            return
+        try:
+            used, size = (float(v) for v in header.split('/'))
+        except ValueError:
+            return
+        if size != self.rest_limiter.burst:
+            # Plus stores: bigger bucket, leaking at the same size/20 per second
+            self.rest_limiter.burst = size
+            self.rest_limiter.qps = size / 20
+        self.rest_limiter.sync(size - used - self.bucket_margin)
+
+    def request(self,
+                method: str,
+                path: str,
+                params: Optional[Dict[str, Any]] = None,
+                json: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        Send one REST call once the shared bucket has room, retrying 429s (after
+        Retry-After) and 5xx/transport errors with backoff. A POST may already have
+        been applied when it times out or gets a 5xx, so it is only retried after a
+        429 or a failed connection; other failures raise and the caller decides
+        whether to resend.
+
+        Returns:
+            The response (any non-429, non-5xx status; callers check status_code)
+
+        Raises:
+            ShopifyAPIError: still throttled or failing after max_retries, or a POST
+                             that may have been applied failed
+        """
+        self._bump('rest_calls')
+        return self._send(method, path, params, json, self.rest_limiter)
+
+    def _send(self,
+              method: str,
+              path: str,
+              params: Optional[Dict[str, Any]],
+              json: Optional[Dict[str, Any]],
+              limiter: Optional[SharedRateLimiter],
+              cost: float = 1.0,
+              idempotent: Optional[bool] = None) -> requests.Response:
+        """
+        request() against a given bucket, taking `cost` from it before each attempt.
+        Non-idempotent calls (POST unless told otherwise) are retried only when the
+        request can't have reached Shopify: a 429 or a connection that never opened.
+        """
+        if idempotent is None:
+            idempotent = method.upper() != 'POST'
+        url = self.url(path)
+        last_error = None
+        for attempt in range(self.max_retries):
+            self._wait(limiter, cost)
+            try:
+                response = self.session.request(method, url, params=params, json=json, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                last_error = ShopifyAPIError(None, str(e))
+                # ConnectionError covers ConnectTimeout; a ReadTimeout may have been applied
+                if not idempotent and not isinstance(e, requests.exceptions.ConnectionError):
+                    raise ShopifyAPIError(None, str(e), maybe_applied=True) from e
+                self._bump('retries')
+                time.sleep(min(30, 2 ** attempt))
+                continue
+
+            self._observe_rest_limit(response)
+            if response.status_code == 429:
+                self._bump('throttled')
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                retry_after = retry_after if retry_after is not None else 2.0
+                if limiter:
+                    limiter.penalize(retry_after)
+                else:
+                    time.sleep(retry_after)
+                last_error = ShopifyAPIError(429, response.text[:300])
+            elif response.status_code >= 500:
+                last_error = ShopifyAPIError(response.status_code, response.text[:300])
+                if not idempotent:
+                    raise ShopifyAPIError(response.status_code, response.text[:300], maybe_applied=True)
+                time.sleep(min(30, 2 ** attempt))
+            else:
+                return response
+            self._bump('retries')
+        raise last_error
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.request('GET', path, params=params)
+
+    def post(self, path: str, json: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.request('POST', path, json=json)
+
+    def put(self, path: str, json: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.request('PUT', path, json=json)
+
+    def delete(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.request('DELETE', path, params=params)
+
+    def paginate(self, path: str, key: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every record under `key` across cursor pages (Link: rel="next").
+
+        Raises:
+            ShopifyAPIError: a page came back with an error status
+        """
+        url, page_params = self.url(path), params
+        while url:
+            response = self.get(url, params=page_params)
+            if response.status_code != 200:
+                raise ShopifyAPIError(response.status_code, response.text[:300])
+            yield from response.json().get(key, [])
+            # The next-page URL already carries the query (page_info + limit)
+            url, page_params = response.links.get('next', {}).get('url'), None
+
+    def primary_location_id(self) -> Optional[int]:
+        """The store's primary location (where REST inventory_quantity writes land), cached"""
+        if self._primary_location_id is None:
+            response = self.get('shop.json', params={'fields': 'primary_location_id'})
+            if response.status_code == 200:
+                self._primary_location_id = (response.json().get('shop') or {}).get('primary_location_id')
+        return self._primary_location_id
+
+    # --- GraphQL --------------------------------------------------------------
+
+    def _observe_throttle_status(self, body: Dict[str, Any], query_key: str):
+        """Sync the GraphQL bucket with extensions.cost and remember the query's cost"""
+        cost = (body.get('extensions') or {}).get('cost') or {}
+        actual = cost.get('actualQueryCost') or cost.get('requestedQueryCost')
+        if actual is not None:
+            self._query_costs[query_key] = float(actual)
+        status = cost.get('throttleStatus')
+        if not status or self.graphql_limiter is None:
+            return
+        self.graphql_limiter.burst = float(status.get('maximumAvailable', self.graphql_limiter.burst))
+        self.graphql_limiter.qps = float(status.get('restoreRate', self.graphql_limiter.qps))
+        self.graphql_limiter.sync(float(status['currentlyAvailable']) - self.bucket_margin)
+
+    def graphql(self,
+                query: str,
+                variables: Optional[Dict[str, Any]] = None,
+                cost: Optional[float] = None,
+                idempotent: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Run a GraphQL Admin query/mutation once the shared cost bucket can cover it.
+        THROTTLED responses wait for the bucket to restore and retry.
+
+        Args:
+            query: GraphQL document
+            variables: Query variables
+            cost: Points to reserve (defaults to the query's last actual cost)
+            idempotent: Whether a timed-out or 5xx call may be resent (defaults to
+                        True for queries, False for mutations; pass True for
+                        mutations that are safe to repeat, such as absolute sets)
+
+        Returns:
+            The response's `data`
+
+        Raises:
+            ShopifyAPIError: on GraphQL errors, or still throttled after max_retries
+        """
+        if idempotent is None:
+            idempotent = not _is_mutation(query)
+        query_key = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        for attempt in range(self.max_retries):
+            reserve = cost if cost is not None else self._query_costs.get(query_key, DEFAULT_QUERY_COST)
+            self._bump('graphql_calls')
+            # _send retries HTTP 429/5xx; cost-based throttling arrives as a 200 with THROTTLED errors
+            response = self._send('POST', 'graphql.json', None, {'query': query, 'variables': variables or {}},
+                                  self.graphql_limiter, reserve, idempotent=idempotent)
+            try:
+                body = response.json()
+            except ValueError:
+                # e.g. an HTML error or throttle page
+                raise ShopifyAPIError(response.status_code, response.text[:300])
+            if response.status_code != 200 or not isinstance(body, dict):
+                errors = body.get('errors', body) if isinstance(body, dict) else body
+                raise ShopifyAPIError(response.status_code, str(errors)[:300])
+            self._observe_throttle_status(body, query_key)
+
+            errors = body.get('errors') or []
+            if any((e.get('extensions') or {}).get('code') == 'THROTTLED' for e in errors):
+                self._bump('throttled')
+                status = ((body.get('extensions') or {}).get('cost') or {}).get('throttleStatus') or {}
+                needed = self._query_costs.get(query_key, reserve) - float(status.get('currentlyAvailable', 0))
+                wait = max(1.0, needed / float(status.get('restoreRate') or GRAPHQL_RESTORE_RATE))
+                if self.graphql_limiter:
+                    self.graphql_limiter.penalize(wait)
+                else:
+                    time.sleep(wait)
+                self._bump('retries')
+                continue
+            if errors:
+                raise ShopifyAPIError(None, '; '.join(e.get('message', str(e)) for e in errors)[:500])
+            return body.get('data') or {}
+        raise ShopifyAPIError(429, 'GraphQL query still throttled after retries')
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client: Optional[ShopifyAdminClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def _is_mutation(query: str) -> bool:
+    """Whether a GraphQL document is a mutation (unsafe to resend blindly)"""
+    return query.lstrip().startswith('mutation')
+
+
+def get_shopify_client() -> ShopifyAdminClient:
+    """Process-wide ShopifyAdminClient built from the environment on first use"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = ShopifyAdminClient.from_env()
+    return _shared_client
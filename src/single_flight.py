@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one execution.
+
+    The first caller for a key runs the function; callers arriving with the same
+    key while it is in flight wait for it and receive the same result object
+    (treat it as read-only). Once the call finishes the key is forgotten, so
+    later calls run again (the response cache handles reuse over time).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Returns:
+            (result, shared) where shared is True if this caller was coalesced
+            onto another caller's in-flight request
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared future when its leader was cancelled, so followers run the call themselves"""
+
+
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight for coroutines on one event loop.
+
+    A cancelled leader doesn't take its followers down with it: they wake up and
+    the first of them runs the call as the new leader.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                # shield: a cancelled follower must not cancel the leader's request
+                return await asyncio.shield(future), True
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged
+            future.exception()
+            raise
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
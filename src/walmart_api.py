@@ -1,18 +1,81 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import json
 import logging
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple, Iterator
 from datetime import datetime
 import os
+import atexit
 import base64
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 from dotenv import load_dotenv
 
+try:
+    from .rate_limiter import SharedRateLimiter, parse_retry_after
+    from .response_cache import ResponseCache
+    from .product_cursor import ProductCursor
+    from .client_state import ClientState
+    from .single_flight import SingleFlight
+    from .batch_tuner import BatchTuner
+    from .latency_tracker import LatencyTracker, HedgeBudget
+    from .circuit_breaker import CircuitBreaker, CircuitOpenError
+    from .metrics import MetricsRegistry, SIZE_BUCKETS
+    from .credential_pool import WalmartCredential, CredentialPool, load_private_key
+    from . import json_codec
+except ImportError:  # imported by flat name, with src/ on sys.path
+    from rate_limiter import SharedRateLimiter, parse_retry_after
+    from response_cache import ResponseCache
+    from product_cursor import ProductCursor
+    from client_state import ClientState
+    from single_flight import SingleFlight
+    from batch_tuner import BatchTuner
+    from latency_tracker import LatencyTracker, HedgeBudget
+    from circuit_breaker import CircuitBreaker, CircuitOpenError
+    from metrics import MetricsRegistry, SIZE_BUCKETS
+    from credential_pool import WalmartCredential, CredentialPool, load_private_key
+    import json_codec
+
 load_dotenv()
 
+# Walmart rejects requests whose WM_CONSUMER.INTIMESTAMP drifts too far from its clock,
+# so a cached signature is never reused for longer than this.
+MAX_SIGNATURE_AGE_SECONDS = 170
+
+# The items endpoint accepts at most this many ids/upcs per request
+MAX_ITEMS_PER_REQUEST = 20
+
+# Query parameter names the items endpoint may accept for UPC lookups, in default order
+UPC_PARAM_FORMS = ('upc', 'gtin')
+# Statuses meaning the endpoint rejected the UPC param form itself, so the other form is worth a try
+UPC_PARAM_REJECTED_STATUSES = (400, 422)
+
+_shared_client: Optional['WalmartAPIClient'] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_client() -> 'WalmartAPIClient':
+    """
+    Process-wide WalmartAPIClient, built on first use and closed at exit.
+    Scripts and helpers that call this share one parsed key, pooled session,
+    rate limiter, cache and metrics registry instead of constructing their own.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                client = WalmartAPIClient()
+                atexit.register(client.close)
+                _shared_client = client
+    return _shared_client
+
+
 class WalmartAPIClient:
     """
     Walmart Affiliate API client for testing batch product retrieval
@@ -23,60 +86,450 @@ class WalmartAPIClient:
         # Base endpoints
         self.base_url = os.getenv('BASE_URL', 'https://developer.api.walmart.com/api-proxy/service/affil/product/v2/paginated/items')
         self.items_by_ids_url = os.getenv('ITEMS_BY_IDS_URL', 'https://developer.api.walmart.com/api-proxy/service/affil/product/v2/items')
+        self.search_url = os.getenv('SEARCH_URL', 'https://developer.api.walmart.com/api-proxy/service/affil/product/v2/search')
         self.consumer_id = os.getenv('WALMART_CONSUMER_ID')
         self.private_key_version = os.getenv('WALMART_PRIVATE_KEY_VERSION', '1')
         self.private_key_path = os.getenv('WALMART_PRIVATE_KEY_PATH')
         self.private_key_content = os.getenv('WALMART_PRIVATE_KEY')
+        self.allow_demo_key = os.getenv('WALMART_ALLOW_DEMO_KEY', 'false').lower() in ('1', 'true', 'yes')
         self.publisher_id = os.getenv('PUBLISHER_ID')
         self.campaign_id = os.getenv('CAMPAIGN_ID')
         self.ad_id = os.getenv('AD_ID')
         self.max_retries = int(os.getenv('MAX_RETRIES', 3))
         self.timeout = int(os.getenv('REQUEST_TIMEOUT', 30))
         self.delay = float(os.getenv('DELAY_BETWEEN_REQUESTS', 1))
+        self.pool_size = int(os.getenv('HTTP_POOL_SIZE', 20))
+        self.http_retries = int(os.getenv('HTTP_RETRIES', 2))
+        self.id_fetch_workers = int(os.getenv('ID_FETCH_WORKERS', 4))
+        self.search_page_concurrency = int(os.getenv('SEARCH_PAGE_CONCURRENCY', 4))
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('walmart_api_test.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Per-endpoint timeouts follow observed latency: p99 x multiplier, kept
+        # between MIN_REQUEST_TIMEOUT and REQUEST_TIMEOUT
+        self.adaptive_timeouts = os.getenv('ADAPTIVE_TIMEOUTS', 'true').lower() in ('1', 'true', 'yes')
+        self.min_timeout = float(os.getenv('MIN_REQUEST_TIMEOUT', 2))
+        self.timeout_multiplier = float(os.getenv('TIMEOUT_P99_MULTIPLIER', 3))
+        self.latency = LatencyTracker()
+        
+        # Hedged item/search lookups: a duplicate request goes out once the first
+        # has taken longer than the endpoint's p95, for at most HEDGE_BUDGET of traffic
+        hedge_ratio = float(os.getenv('HEDGE_BUDGET', 0.05))
+        self.hedge_budget = HedgeBudget(hedge_ratio) if hedge_ratio > 0 else None
+        
+        # Signed header cache: reuse one timestamp/signature pair for a short window
+        # instead of running an RSA signature for every request (0 disables caching)
+        self.signature_ttl = min(float(os.getenv('SIGNATURE_CACHE_SECONDS', 60)), MAX_SIGNATURE_AGE_SECONDS)
+        self.signature_refresh_margin = float(os.getenv('SIGNATURE_REFRESH_MARGIN', 5))
+        self.stats = {
+            'signatures_generated': 0,
+            'signature_cache_hits': 0,
+            'signing_time_seconds': 0.0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'upc_param_fallbacks': 0,
+            'coalesced_requests': 0,
+            'hedged_requests': 0,
+            'hedge_wins': 0
+        }
+        self._stats_lock = threading.Lock()
+        
+        # Logging is configured by the calling script. Per-request status/latency/size
+        # goes to the metrics registry; only errors and a LOG_SAMPLE_RATE fraction of
+        # successful responses are logged.
         self.logger = logging.getLogger(__name__)
+        self.log_sample_rate = float(os.getenv('LOG_SAMPLE_RATE', 0.01))
+        self.metrics = MetricsRegistry.from_env()
         
         if not self.consumer_id:
             raise ValueError("WALMART_CONSUMER_ID not found in environment variables")
         
         # Load private key
         self.private_key = self._load_private_key()
+        
+        # Pooled keep-alive session shared by every request this client makes
+        self.session = self._create_session()
+        
+        # Host-wide token bucket shared by every client/process (None when disabled)
+        self.rate_limiter = SharedRateLimiter.from_env('WALMART')
+        
+        # Consumer ID/key pairs (WALMART_CONSUMER_ID plus _2, _3, ...), each with its
+        # own rate budget; requests go to the least-loaded one and throttled ones sit out
+        self.credentials = CredentialPool.from_env(
+            WalmartCredential(self.consumer_id, self.private_key, self.private_key_version, self.rate_limiter)
+        )
+        
+        # Host-wide circuit breaker: 429/5xx storms stop every worker at once (None when disabled)
+        self.circuit = CircuitBreaker.from_env('walmart')
+        
+        # On-disk TTL cache for item and search lookups (None when disabled)
+        self.response_cache = ResponseCache.from_env()
+        
+        # Persisted hints learned at runtime (e.g. which UPC param form works)
+        self.client_state = ClientState.from_env()
+        
+        # Concurrent identical requests share one network call
+        self.single_flight = SingleFlight()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='walmart-hedge')
+        
+        # Batch sizes (count/numItems/ids per request) seeded from BatchTester's
+        # tuning profile and adapted to observed latency and throttling
+        self.batch_tuner = BatchTuner.from_env()
     
-    def _load_private_key(self):
-        """Load RSA private key from file or environment variable"""
+    def _create_session(self) -> requests.Session:
+        """
+        Build a requests.Session with a sized connection pool and connection-level retries.
+        HTTP status handling (429/5xx) stays in the request methods.
+        """
+        retry = Retry(
+            total=self.http_retries,
+            connect=self.http_retries,
+            read=self.http_retries,
+            status=0,
+            backoff_factor=0.3,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+    
+    def _send(self, url: str, params: Dict[str, Any], stream: bool = False) -> Tuple[requests.Response, Dict[str, str]]:
+        """
+        Send one signed GET through the pooled session with the least-loaded credential,
+        paced by that credential's shared rate limiter. A 429 pauses every process
+        sharing the credential for the server's Retry-After (and sidelines it when
+        the pool has others). With stream=True the body is left unread for
+        incremental parsing.
+
+        Returns:
+            (response, headers sent)
+        """
+        credential = self.credentials.acquire()
+        return self._dispatch(url, params, stream, credential)
+    
+    def _dispatch(self,
+                  url: str,
+                  params: Dict[str, Any],
+                  stream: bool = False,
+                  credential: Optional[WalmartCredential] = None) -> Tuple[requests.Response, Dict[str, str]]:
+        """
+        _send without the rate-limit wait (the caller has already reserved `credential`).
+        Raises CircuitOpenError instead of sending while the Walmart circuit is open.
+        """
+        if self.circuit:
+            try:
+                self.circuit.check()
+            except CircuitOpenError:
+                if credential is not None:
+                    self.credentials.cancel(credential)
+                raise
+        status_code, retry_after = None, None
         try:
-            if self.private_key_content:
-                # Load from environment variable (base64 encoded)
-                key_bytes = base64.b64decode(self.private_key_content)
-                return serialization.load_der_private_key(
-                    key_bytes, 
-                    password=None, 
-                    backend=default_backend()
-                )
-            elif self.private_key_path and os.path.exists(self.private_key_path):
-                # Load from file
-                with open(self.private_key_path, 'rb') as key_file:
-                    return serialization.load_pem_private_key(
-                        key_file.read(),
-                        password=None,
-                        backend=default_backend()
-                    )
+            # Sign after any rate-limit wait so the timestamp is fresh when it goes out
+            headers = self._get_headers(credential)
+            timeout = self._timeout_for(url)
+            if self.hedge_budget:
+                self.hedge_budget.on_request()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=timeout, stream=stream)
+            except requests.exceptions.Timeout:
+                # Count the timeout as a sample so a slow spell raises the next timeout
+                self._observe_response(url, None, timeout)
+                raise
+            except requests.exceptions.RequestException:
+                self._observe_response(url, None, None)
+                raise
+            status_code = response.status_code
+            size = response.headers.get('Content-Length') if stream else len(response.content)
+            self._observe_response(url, status_code, response.elapsed.total_seconds(),
+                                   int(size) if size is not None else None, params)
+            if status_code == 429:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            return response, headers
+        finally:
+            self._release_credential(credential, status_code, retry_after)
+    
+    def _release_credential(self,
+                            credential: Optional[WalmartCredential],
+                            status_code: Optional[int],
+                            retry_after: Optional[float]):
+        """Hand a reserved credential back to the pool and count the outcome against it"""
+        if credential is None:
+            return
+        self.credentials.release(credential, status_code, retry_after)
+        if len(self.credentials) > 1:
+            self.metrics.inc('walmart_credential_requests_total', credential=credential.label,
+                             status=str(status_code) if status_code is not None else 'error')
+    
+    def _send_hedged(self, url: str, params: Dict[str, Any]) -> Tuple[requests.Response, Dict[str, str]]:
+        """
+        _send for idempotent lookups: if no response has arrived within the endpoint's
+        p95 latency and the hedge budget allows, fire a duplicate request and return
+        whichever succeeds first. The slower response is discarded.
+        """
+        delay = self.latency.percentile(self._endpoint_for(url), 95) if self.hedge_budget else None
+        if delay is None:
+            return self._send(url, params)
+
+        # Pace the primary here so time spent queueing on the limiter does not trigger hedges
+        credential = self.credentials.acquire()
+        primary = self._hedge_pool.submit(self._dispatch, url, params, False, credential)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        if not self.hedge_budget.try_take():
+            return primary.result()
+
+        self._bump('hedged_requests')
+        hedge = self._hedge_pool.submit(self._send, url, params)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(self._close_response)
+                    if future is hedge:
+                        self._bump('hedge_wins')
+                    return future.result()
+        # Both attempts failed; surface the primary's error to the caller's retry loop
+        return primary.result()
+    
+    @staticmethod
+    def _close_response(future):
+        if future.exception() is None:
+            future.result()[0].close()
+    
+    def _endpoint_for(self, url: str) -> Optional[str]:
+        """Tuning/latency bucket for a request URL"""
+        return {self.base_url: 'products', self.search_url: 'search', self.items_by_ids_url: 'ids'}.get(url)
+    
+    def _timeout_for(self, url: str) -> float:
+        """Timeout for a request: p99 latency x TIMEOUT_P99_MULTIPLIER once enough samples exist"""
+        endpoint = self._endpoint_for(url)
+        if not self.adaptive_timeouts or endpoint is None:
+            return self.timeout
+        p99 = self.latency.percentile(endpoint, 99)
+        if p99 is None:
+            return self.timeout
+        return min(self.timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+    
+    def _wait_after_throttle(self, response: requests.Response, attempt: int) -> float:
+        """
+        Back off after a 429 before retrying: honor Retry-After when present, else
+        exponential backoff. With a shared limiter the wait is applied to the bucket
+        so the next acquire() (in any process) waits it out. With several credentials
+        the retry just moves to one that is not sidelined.
+        """
+        if len(self.credentials) > 1 and not self.credentials.all_sidelined():
+            # The throttled credential is sidelined; the retry goes to another one
+            return 0.0
+        wait_time = parse_retry_after(response.headers.get('Retry-After'))
+        if wait_time is None:
+            wait_time = 2 ** attempt  # Exponential backoff
+        if self.rate_limiter:
+            self.rate_limiter.penalize(wait_time)
+        else:
+            time.sleep(wait_time)
+        return wait_time
+    
+    def _observe_response(self,
+                          url: str,
+                          status_code: Optional[int],
+                          latency: Optional[float],
+                          size: Optional[int] = None,
+                          params: Optional[Dict[str, Any]] = None):
+        """
+        Feed a response (status None for a transport error) into the metrics registry,
+        the circuit breaker, the latency window and the batch tuner for its endpoint.
+        Only congestion signals (429, 5xx, transport errors) count as circuit failures.
+        Batches shrink on those (429 only where the tuner says so), on slow responses
+        and on a 400 for a request larger than the tuner's starting size; other 4xx
+        responses are the caller's problem.
+        """
+        self._record_metrics(url, status_code, latency, size)
+        congested = status_code is None or status_code == 429 or status_code >= 500
+        if self.circuit:
+            if congested:
+                self.circuit.record_failure()
             else:
-                self.logger.warning("No private key found. Will create a demo key for testing.")
-                return self._generate_demo_key()
+                self.circuit.record_success()
+        endpoint = self._endpoint_for(url)
+        if endpoint is None:
+            return
+        if latency is not None and (status_code is None or status_code < 400):
+            self.latency.record(endpoint, latency)
+        if not congested and status_code >= 400:
+            if status_code == 400:
+                self.batch_tuner.record_rejected(endpoint, self._batch_size(endpoint, params))
+            return
+        self.batch_tuner.record(endpoint, not congested, latency, throttled=status_code == 429)
+
+    @staticmethod
+    def _batch_size(endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Number of items a request asked for (count, numItems or ids/upcs), if known"""
+        if not params:
+            return None
+        if endpoint == 'ids':
+            for name in ('ids',) + UPC_PARAM_FORMS:
+                if params.get(name):
+                    return len(str(params[name]).split(','))
+            return None
+        value = params.get('count' if endpoint == 'products' else 'numItems')
+        return int(value) if value is not None else None
+    
+    def _record_metrics(self,
+                        url: str,
+                        status_code: Optional[int],
+                        latency: Optional[float],
+                        size: Optional[int]):
+        """Count the response and log it if it failed or falls in the log sample"""
+        endpoint = self._endpoint_for(url) or 'other'
+        status = str(status_code) if status_code is not None else 'error'
+        self.metrics.inc('walmart_requests_total', endpoint=endpoint, status=status)
+        if latency is not None:
+            self.metrics.observe('walmart_request_duration_seconds', latency, endpoint=endpoint)
+        if size is not None:
+            self.metrics.observe('walmart_response_size_bytes', size, SIZE_BUCKETS, endpoint=endpoint)
+
+        failed = status_code is None or status_code >= 400
+        if failed or random.random() < self.log_sample_rate:
+            latency_text = f"{latency:.2f}s" if latency is not None else "n/a"
+            size_text = f"{size} bytes" if size is not None else "n/a"
+            self.logger.log(logging.WARNING if failed else logging.INFO,
+                            f"{endpoint} response: status {status}, time {latency_text}, size {size_text}")
+    
+    @staticmethod
+    def _circuit_open_result(error: CircuitOpenError) -> Dict[str, Any]:
+        """Failure result for a request refused by the open circuit; callers can park the work"""
+        return {
+            'data': None,
+            'metadata': {},
+            'success': False,
+            'error': str(error),
+            'circuit_open': True,
+            'retry_after': error.retry_after
+        }
+    
+    def _bump(self, stat: str, amount: float = 1):
+        """Thread-safe increment of a client stat"""
+        with self._stats_lock:
+            self.stats[stat] = self.stats.get(stat, 0) + amount
+        self.metrics.inc('walmart_client_events_total', amount, event=stat)
+    
+    def _item_cache_key(self,
+                        kind: str,
+                        value: Any,
+                        postal_code: Optional[str],
+                        extra_params: Optional[Dict[str, Any]]) -> str:
+        """Cache key for one item looked up by ID ('item') or UPC/GTIN ('upc')"""
+        value = str(value).strip()
+        if kind == 'upc':
+            value = value.lstrip('0')
+        return ResponseCache.make_key(f'{kind}:{value}', dict(extra_params or {}, postalCode=postal_code))
+    
+    def _lookup_cached_items(self,
+                             kind: str,
+                             values: List[Any],
+                             postal_code: Optional[str],
+                             extra_params: Optional[Dict[str, Any]],
+                             use_cache: bool,
+                             static_only: bool) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        """
+        Split requested values into items already in the response cache and values
+        that still need a network fetch.
+
+        Returns:
+            (cached items, values to fetch)
+        """
+        if not (use_cache and self.response_cache):
+            return [], list(values)
+        keys = [self._item_cache_key(kind, v, postal_code, extra_params) for v in values]
+        found = self.response_cache.get_many(list(set(keys)), static_only)
+        remaining = [v for v, key in zip(values, keys) if key not in found]
+        self._bump('cache_hits', len(values) - len(remaining))
+        self._bump('cache_misses', len(remaining))
+        return list(found.values()), remaining
+    
+    def _store_items(self,
+                     kind: str,
+                     key_fields: Tuple[str, ...],
+                     results: List[Dict[str, Any]],
+                     postal_code: Optional[str],
+                     extra_params: Optional[Dict[str, Any]]):
+        """Write items from successful batch results into the response cache"""
+        if not self.response_cache:
+            return
+        entries = {}
+        for result in results:
+            if not result.get('success'):
+                continue
+            items = result['data'].get('items') or []
+            for item in (items if isinstance(items, list) else [items]):
+                for field in key_fields:
+                    if item.get(field) is not None:
+                        entries[self._item_cache_key(kind, item[field], postal_code, extra_params)] = item
+        self.response_cache.put_many(entries)
+    
+    def _coalesce(self, key: str, fetch):
+        """Run fetch() once for concurrent callers with the same request key"""
+        result, shared = self.single_flight.do(key, fetch)
+        if shared:
+            self._bump('coalesced_requests')
+        return result
+    
+    def _lookup_cached_page(self, cache_key: str, use_cache: bool, static_only: bool) -> Optional[Dict[str, Any]]:
+        """Return a cached page payload (get_products/search) or None on miss/bypass"""
+        if not (use_cache and self.response_cache):
+            return None
+        cached = self.response_cache.get(cache_key, static_only)
+        self._bump('cache_hits' if cached is not None else 'cache_misses')
+        return cached
+    
+    def credential_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Requests, throttles, errors, in-flight count and sideline time per credential"""
+        return self.credentials.snapshot()
+    
+    def close(self):
+        """Close pooled connections"""
+        self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+        self.metrics.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _load_private_key(self):
+        """
+        Load RSA private key from file or environment variable (parsed once per process).
+        A throwaway demo key is only generated when WALMART_ALLOW_DEMO_KEY is set.
+        """
+        try:
+            # WALMART_PRIVATE_KEY (base64 DER) takes precedence over the PEM file
+            private_key = load_private_key(self.private_key_content, self.private_key_path)
         except Exception as e:
+            if not self.allow_demo_key:
+                raise ValueError(f"Failed to load Walmart private key: {e}") from e
             self.logger.error(f"Failed to load private key: {str(e)}")
             self.logger.info("Generating demo key for testing...")
             return self._generate_demo_key()
+        if private_key is not None:
+            return private_key
+        if not self.allow_demo_key:
+            raise ValueError("No Walmart private key found: set WALMART_PRIVATE_KEY_PATH or WALMART_PRIVATE_KEY "
+                             "(or WALMART_ALLOW_DEMO_KEY=true to generate a throwaway key)")
+        self.logger.warning("No private key found. Will create a demo key for testing.")
+        return self._generate_demo_key()
     
     def _generate_demo_key(self):
         """Generate a temporary RSA key pair for testing purposes"""
@@ -100,10 +553,10 @@ class WalmartAPIClient:
         self.logger.warning("⚠️  Generated temporary keys. You'll need to upload walmart_public_key.pem to Walmart Developer Portal")
         return private_key
     
-    def _generate_signature(self, string_to_sign: str) -> str:
-        """Generate RSA SHA256 signature for the given string"""
+    def _generate_signature(self, string_to_sign: str, private_key=None) -> str:
+        """Generate RSA SHA256 signature for the given string (default: the primary key)"""
         try:
-            signature = self.private_key.sign(
+            signature = (private_key or self.private_key).sign(
                 string_to_sign.encode('utf-8'),
                 padding.PKCS1v15(),
                 hashes.SHA256()
@@ -113,34 +566,70 @@ class WalmartAPIClient:
             self.logger.error(f"Failed to generate signature: {str(e)}")
             raise
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Get required headers for API requests with RSA signature authentication"""
-        # Generate timestamp in milliseconds
-        timestamp = str(int(time.time() * 1000))
-        
-        # Create signature data according to Walmart API spec
-        signature_data = {
-            'WM_CONSUMER.ID': self.consumer_id,
-            'WM_CONSUMER.INTIMESTAMP': timestamp,
-            'WM_SEC.KEY_VERSION': self.private_key_version
-        }
-        
-        # Canonicalize the data (sort keys and create string)
-        sorted_keys = sorted(signature_data.keys())
-        canonical_string = '\n'.join(signature_data[key] for key in sorted_keys) + '\n'
+    def _get_signed_auth(self, credential: Optional[WalmartCredential] = None) -> Tuple[str, str]:
+        """
+        Return a (timestamp, signature) pair for a credential (default: the primary),
+        re-signing only when its cached pair is about to leave the configured reuse window.
+        """
+        credential = credential or self.credentials.primary
+        max_age = self.signature_ttl - self.signature_refresh_margin
+        cached = credential.signed_auth
+        if cached and time.time() - cached[2] < max_age:
+            with self._stats_lock:
+                self.stats['signature_cache_hits'] += 1
+            return cached[0], cached[1]
         
-        # Generate signature
-        signature = self._generate_signature(canonical_string)
+        with credential.signature_lock:
+            # Another thread may have refreshed while we waited for the lock
+            cached = credential.signed_auth
+            if cached and time.time() - cached[2] < max_age:
+                with self._stats_lock:
+                    self.stats['signature_cache_hits'] += 1
+                return cached[0], cached[1]
+            
+            # Generate timestamp in milliseconds
+            signed_at = time.time()
+            timestamp = str(int(signed_at * 1000))
+            
+            # Create signature data according to Walmart API spec
+            signature_data = {
+                'WM_CONSUMER.ID': credential.consumer_id,
+                'WM_CONSUMER.INTIMESTAMP': timestamp,
+                'WM_SEC.KEY_VERSION': credential.key_version
+            }
+            
+            # Canonicalize the data (sort keys and create string)
+            sorted_keys = sorted(signature_data.keys())
+            canonical_string = '\n'.join(signature_data[key] for key in sorted_keys) + '\n'
+            
+            # Generate signature
+            signature = self._generate_signature(canonical_string, credential.private_key)
+            with self._stats_lock:
+                self.stats['signatures_generated'] += 1
+                self.stats['signing_time_seconds'] += time.time() - signed_at
+            
+            if self.signature_ttl > 0:
+                credential.signed_auth = (timestamp, signature, signed_at)
+            return timestamp, signature
+    
+    def _get_headers(self, credential: Optional[WalmartCredential] = None) -> Dict[str, str]:
+        """
+        Get required headers for API requests with RSA signature authentication,
+        signed with `credential` (default: the primary WALMART_CONSUMER_ID)
+        """
+        credential = credential or self.credentials.primary
+        timestamp, signature = self._get_signed_auth(credential)
         
         # Build headers
         headers = {
             'WM_SVC.NAME': 'Walmart Open API',
-            'WM_QOS.CORRELATION_ID': f'test_{timestamp}',
-            'WM_CONSUMER.ID': self.consumer_id,
+            'WM_QOS.CORRELATION_ID': f'test_{int(time.time() * 1000)}',
+            'WM_CONSUMER.ID': credential.consumer_id,
             'WM_CONSUMER.INTIMESTAMP': timestamp,
-            'WM_SEC.KEY_VERSION': self.private_key_version,
+            'WM_SEC.KEY_VERSION': credential.key_version,
             'WM_SEC.AUTH_SIGNATURE': signature,
             'Accept': 'application/json',
+            'Accept-Encoding': json_codec.ACCEPT_ENCODING,
             'Content-Type': 'application/json'
         }
         
@@ -167,21 +656,207 @@ class WalmartAPIClient:
                 
         return params
 
+    def _build_items_params(self,
+                            param_name: str,
+                            values: List[Any],
+                            postal_code: Optional[str] = None,
+                            extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build query parameters for the items endpoint (ids/upc/gtin lookups)"""
+        params: Dict[str, Any] = {
+            param_name: ','.join(str(v) for v in values)
+        }
+        if postal_code:
+            # Some endpoints may accept 'postalCode' to localize availability
+            params['postalCode'] = postal_code
+        if extra_params:
+            params.update({k: v for k, v in extra_params.items() if v is not None})
+        return params
+
+    def _build_search_params(self, query: str, **kwargs) -> Dict[str, Any]:
+        """Build query parameters for the search endpoint"""
+        params = {
+            'query': query,
+            'publisherId': self.publisher_id,
+            'campaignId': self.campaign_id,
+        }
+        # Add optional params
+        for k, v in kwargs.items():
+            if v is not None:
+                params[k] = v
+        return params
+
+    @staticmethod
+    def _normalize_items(data: Any) -> Any:
+        """
+        Normalize an items endpoint payload to align with get_products structure.
+        The items endpoint usually returns {'items': [...]} or a list.
+        """
+        if isinstance(data, dict):
+            return data.get('items', data.get('data', data))
+        return data
+
+    @staticmethod
+    def _products_metadata(data: Dict[str, Any],
+                           response_time: float,
+                           response_size: int,
+                           count: int,
+                           status_code: int,
+                           headers: Dict[str, str],
+                           params: Dict[str, Any]) -> Dict[str, Any]:
+        """Metadata block attached to successful get_products results"""
+        return {
+            'request_time': datetime.now().isoformat(),
+            'response_time_seconds': response_time,
+            'response_size_bytes': response_size,
+            'requested_count': count,
+            'actual_items_returned': len(data.get('items', [])),
+            'total_pages': data.get('totalPages'),
+            'next_page': data.get('nextPage'),
+            'status_code': status_code,
+            'headers_sent': dict(headers),
+            'params_sent': dict(params)
+        }
+
+    @staticmethod
+    def _chunk(values: List[Any], size: int = MAX_ITEMS_PER_REQUEST) -> List[List[Any]]:
+        """Split values into endpoint-sized batches"""
+        return [values[i:i + size] for i in range(0, len(values), size)]
+
+    @staticmethod
+    def _merge_item_batches(requested: List[Any],
+                            results: List[Dict[str, Any]],
+                            key_fields: Tuple[str, ...],
+                            response_time: float) -> Dict[str, Any]:
+        """
+        Merge per-batch items results into one result in input order.
+
+        Items are matched back to the requested values through key_fields (leading
+        zeros ignored, so 12- and 13-digit UPCs line up). Requested values with no
+        matching item are reported in 'missing'; errors from failed batches are
+        collected in 'errors' and their values count as missing too.
+        """
+        def _key(value: Any) -> str:
+            return str(value).strip().lstrip('0')
+
+        returned: List[Dict[str, Any]] = []
+        by_key: Dict[str, Dict[str, Any]] = {}
+        errors: List[str] = []
+        for result in results:
+            if not result.get('success'):
+                errors.append(result.get('error'))
+                continue
+            batch_items = result['data'].get('items') or []
+            if isinstance(batch_items, dict):
+                batch_items = [batch_items]
+            for item in batch_items:
+                returned.append(item)
+                for field in key_fields:
+                    if item.get(field) is not None:
+                        by_key.setdefault(_key(item[field]), item)
+
+        if len(errors) == len(results):
+            return {
+                'success': False,
+                'error': errors[0],
+                'errors': errors,
+                'missing': list(requested)
+            }
+
+        items: List[Dict[str, Any]] = []
+        missing: List[Any] = []
+        seen = set()
+        for value in requested:
+            item = by_key.get(_key(value))
+            if item is None:
+                missing.append(value)
+            elif id(item) not in seen:
+                seen.add(id(item))
+                items.append(item)
+        # Keep anything the API returned that we could not map back to an input value
+        items.extend(item for item in returned if id(item) not in seen)
+
+        return {
+            'success': True,
+            'data': {
+                'items': items
+            },
+            'response_time': response_time,
+            'missing': missing,
+            'errors': errors
+        }
+
+    def _fetch_item_batches(self,
+                            fetch_batch,
+                            kind: str,
+                            values: List[Any],
+                            key_fields: Tuple[str, ...],
+                            postal_code: Optional[str],
+                            extra_params: Optional[Dict[str, Any]],
+                            max_workers: Optional[int],
+                            use_cache: bool,
+                            static_only: bool) -> Dict[str, Any]:
+        """
+        Serve what we can from the response cache, fetch the rest in endpoint-sized
+        batches concurrently and merge everything in input order.
+        """
+        start_time = time.time()
+        cached_items, to_fetch = self._lookup_cached_items(
+            kind, values, postal_code, extra_params, use_cache, static_only
+        )
+
+        def _fetch(batch: List[Any]) -> Dict[str, Any]:
+            key = ResponseCache.make_key(
+                f'{self.items_by_ids_url}#{kind}',
+                dict(extra_params or {}, values=','.join(str(v) for v in batch), postalCode=postal_code)
+            )
+            return self._coalesce(key, lambda: fetch_batch(batch))
+
+        results: List[Dict[str, Any]] = []
+        if to_fetch:
+            batches = self._chunk(to_fetch, self.batch_tuner.size('ids'))
+            workers = min(max_workers or self.id_fetch_workers, len(batches))
+            if workers <= 1:
+                results = [_fetch(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_fetch, batches))
+            self._store_items(kind, key_fields, results, postal_code, extra_params)
+
+        if cached_items:
+            results.append({'success': True, 'data': {'items': cached_items}})
+        merged = self._merge_item_batches(values, results, key_fields, time.time() - start_time)
+        merged['cache_hits'] = len(values) - len(to_fetch)
+        if any(r.get('circuit_open') for r in results):
+            # Some batches were refused; their values are in 'missing' and can be retried later
+            merged['circuit_open'] = True
+        return merged
+
     def get_items_by_ids(self,
                          ids: List[int],
                          postal_code: Optional[str] = None,
-                         extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                         extra_params: Optional[Dict[str, Any]] = None,
+                         max_workers: Optional[int] = None,
+                         use_cache: bool = True,
+                         static_only: bool = False) -> Dict[str, Any]:
         """
         Retrieve product details by Walmart item IDs. Optionally pass a postal/ZIP code
         to attempt location-aware availability/pricing when supported.
+        Any number of IDs may be passed; they are split into batches of
+        MAX_ITEMS_PER_REQUEST and fetched concurrently.
 
         Args:
             ids: List of Walmart item IDs
             postal_code: Optional postal/ZIP code (e.g., '78210')
             extra_params: Additional query params if needed
+            max_workers: Concurrent batch requests (defaults to ID_FETCH_WORKERS)
+            use_cache: Read from the response cache (False forces a network fetch;
+                       fetched items still refresh the cache)
+            static_only: Caller only reads static fields (title, images, description),
+                         so cached items up to WALMART_CACHE_STATIC_TTL old are acceptable
 
         Returns:
-            Dict with success flag, data or error, response time metadata
+            Dict with success flag, data or error, response time metadata,
+            'missing' (requested IDs not returned) and per-batch 'errors'
         """
         if not ids:
             return {
@@ -189,46 +864,40 @@ class WalmartAPIClient:
                 'error': 'No item IDs provided'
             }
 
-        headers = self._get_headers()
+        return self._fetch_item_batches(
+            lambda batch: self._fetch_items_by_ids_batch(batch, postal_code, extra_params),
+            'item', ids, ('itemId',), postal_code, extra_params, max_workers, use_cache, static_only
+        )
 
-        params: Dict[str, Any] = {
-            'ids': ','.join(str(i) for i in ids)
-        }
-        if postal_code:
-            # Some endpoints may accept 'postalCode' to localize availability
-            params['postalCode'] = postal_code
-        if extra_params:
-            params.update({k: v for k, v in extra_params.items() if v is not None})
+    def _fetch_items_by_ids_batch(self,
+                                  ids: List[int],
+                                  postal_code: Optional[str] = None,
+                                  extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch a single batch (at most MAX_ITEMS_PER_REQUEST) of item IDs"""
+        params = self._build_items_params('ids', ids, postal_code, extra_params)
 
         start_time = time.time()
         for attempt in range(self.max_retries):
             try:
-                self.logger.info(f"Fetching {len(ids)} items by IDs (attempt {attempt + 1})")
-                response = requests.get(self.items_by_ids_url, headers=headers, params=params, timeout=self.timeout)
+                self.logger.debug(f"Fetching {len(ids)} items by IDs (attempt {attempt + 1})")
+                response, _ = self._send_hedged(self.items_by_ids_url, params)
                 response_time = time.time() - start_time
-                self.logger.info(f"Response status: {response.status_code}")
-                self.logger.info(f"Response time: {response_time:.2f}s")
-                self.logger.info(f"Response size: {len(response.content)} bytes")
 
                 if response.status_code == 200:
-                    data = response.json()
-                    # Normalize to align with get_products structure when possible
-                    # items endpoint usually returns {'items': [...]} or a list
-                    if isinstance(data, dict):
-                        items = data.get('items', data.get('data', data))
-                    else:
-                        items = data
-
+                    data = json_codec.loads(response.content)
                     return {
                         'success': True,
                         'data': {
-                            'items': items
+                            'items': self._normalize_items(data)
                         },
                         'response_time': response_time
                     }
                 else:
                     error_text = response.text
                     self.logger.error(f"API error: {response.status_code} - {error_text[:300]}")
+                    if response.status_code == 429 and attempt < self.max_retries - 1:
+                        self._wait_after_throttle(response, attempt)
+                        continue
                     if response.status_code >= 500 and attempt < self.max_retries - 1:
                         time.sleep(2 ** attempt)
                         continue
@@ -236,6 +905,8 @@ class WalmartAPIClient:
                         'success': False,
                         'error': f"Status {response.status_code}: {error_text}"
                     }
+            except CircuitOpenError as e:
+                return self._circuit_open_result(e)
             except Exception as e:
                 self.logger.error(f"Request failed: {str(e)}")
                 if attempt < self.max_retries - 1:
@@ -249,78 +920,113 @@ class WalmartAPIClient:
     def get_items_by_upc(self,
                           upcs: List[str],
                           postal_code: Optional[str] = None,
-                          extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                          extra_params: Optional[Dict[str, Any]] = None,
+                          max_workers: Optional[int] = None,
+                          use_cache: bool = True,
+                          static_only: bool = False) -> Dict[str, Any]:
         """
         Retrieve product details by UPC/GTIN codes using the items endpoint.
-        Tries the 'upc' parameter; if unsupported, falls back to 'gtin'.
+        Tries the 'upc' parameter; if unsupported, falls back to 'gtin'. Whichever
+        form works is remembered per endpoint and tried first from then on.
+        Any number of codes may be passed; they are split into batches of
+        MAX_ITEMS_PER_REQUEST and fetched concurrently.
 
         Args:
             upcs: List of UPC/GTIN strings
             postal_code: Optional postal/ZIP code
             extra_params: Additional query params
+            max_workers: Concurrent batch requests (defaults to ID_FETCH_WORKERS)
+            use_cache: Read from the response cache (see get_items_by_ids)
+            static_only: Accept cached items up to WALMART_CACHE_STATIC_TTL old
 
         Returns:
-            Dict with success flag and items array when successful.
+            Dict with success flag and items array when successful, plus
+            'missing' (requested codes not returned) and per-batch 'errors'.
         """
         if not upcs:
             return {'success': False, 'error': 'No UPCs provided'}
 
-        headers = self._get_headers()
+        return self._fetch_item_batches(
+            lambda batch: self._fetch_items_by_upc_batch(batch, postal_code, extra_params),
+            'upc', upcs, ('upc', 'gtin'), postal_code, extra_params, max_workers, use_cache, static_only
+        )
 
+    def _fetch_items_by_upc_batch(self,
+                                  upcs: List[str],
+                                  postal_code: Optional[str] = None,
+                                  extra_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch a single batch (at most MAX_ITEMS_PER_REQUEST) of UPC/GTIN codes"""
         def _request_with(param_name: str) -> Dict[str, Any]:
-            params: Dict[str, Any] = {param_name: ','.join(upcs)}
-            if postal_code:
-                params['postalCode'] = postal_code
-            if extra_params:
-                params.update({k: v for k, v in extra_params.items() if v is not None})
+            params = self._build_items_params(param_name, upcs, postal_code, extra_params)
 
             start_time = time.time()
             try:
-                self.logger.info(f"Fetching {len(upcs)} items by {param_name} (batch)")
-                resp = requests.get(self.items_by_ids_url, headers=headers, params=params, timeout=self.timeout)
+                self.logger.debug(f"Fetching {len(upcs)} items by {param_name} (batch)")
+                resp, _ = self._send_hedged(self.items_by_ids_url, params)
                 rt = time.time() - start_time
-                self.logger.info(f"Response status: {resp.status_code}")
-                self.logger.info(f"Response time: {rt:.2f}s")
-                self.logger.info(f"Response size: {len(resp.content)} bytes")
                 if resp.status_code == 200:
-                    data = resp.json()
-                    items = data.get('items', data if isinstance(data, list) else [])
-                    return {'success': True, 'data': {'items': items}, 'response_time': rt}
-                return {'success': False, 'error': f"Status {resp.status_code}: {resp.text}"}
+                    data = json_codec.loads(resp.content)
+                    return {'success': True, 'data': {'items': self._normalize_items(data)}, 'response_time': rt}
+                return {'success': False, 'error': f"Status {resp.status_code}: {resp.text}",
+                        'status_code': resp.status_code}
+            except CircuitOpenError as e:
+                return self._circuit_open_result(e)
             except Exception as e:
                 return {'success': False, 'error': str(e)}
 
-        # Try 'upc' param first
-        res = _request_with('upc')
-        if res.get('success'):
-            return res
-        # Fallback to 'gtin'
-        self.logger.info("'upc' param failed; trying 'gtin' param")
-        res2 = _request_with('gtin')
-        if res2.get('success'):
-            return res2
-        return res2
+        res: Dict[str, Any] = {}
+        for param_name in self._upc_param_order():
+            res = _request_with(param_name)
+            if res.get('success'):
+                self._learn_upc_param(param_name)
+                return res
+            if res.get('status_code') not in UPC_PARAM_REJECTED_STATUSES:
+                # Throttling, server, transport errors and an open circuit say nothing
+                # about the param form; don't fall back
+                return res
+            self.logger.info(f"'{param_name}' param failed; trying the other form")
+            self._bump('upc_param_fallbacks')
+        return res
+    
+    def _upc_param_order(self) -> List[str]:
+        """
+        UPC parameter forms to try against the items endpoint, starting with the
+        one that last worked for it (persisted in client_state).
+        """
+        learned = self.client_state.get(f'upc_param:{self.items_by_ids_url}')
+        if learned in UPC_PARAM_FORMS:
+            return [learned] + [p for p in UPC_PARAM_FORMS if p != learned]
+        return list(UPC_PARAM_FORMS)
+    
+    def _learn_upc_param(self, param_name: str):
+        """Remember the UPC parameter form the items endpoint accepted"""
+        self.client_state.set(f'upc_param:{self.items_by_ids_url}', param_name)
     
     def get_products(self, 
-                    count: int = 25,
+                    count: Optional[int] = None,
                     category: Optional[str] = None,
                     brand: Optional[str] = None,
                     special_offer: Optional[str] = None,
+                    use_cache: bool = True,
+                    static_only: bool = False,
                     **kwargs) -> Dict[str, Any]:
         """
         Retrieve products from Walmart API
         
         Args:
-            count: Number of items to retrieve (testing parameter)
+            count: Number of items to retrieve (None uses the tuned batch size)
             category: Category ID filter
             brand: Brand name filter
             special_offer: Special offer filter (rollback, clearance, etc.)
+            use_cache: Read from the response cache (False forces a network fetch)
+            static_only: Accept a cached page up to WALMART_CACHE_STATIC_TTL old
             **kwargs: Additional filter parameters
             
         Returns:
             Dict containing API response data and metadata
         """
-        headers = self._get_headers()
+        if count is None:
+            count = self.batch_tuner.size('products')
         params = self._build_params(
             count=count,
             category=category,
@@ -329,43 +1035,42 @@ class WalmartAPIClient:
             **kwargs
         )
         
+        cache_key = ResponseCache.make_key(self.base_url, params)
+        cached = self._lookup_cached_page(cache_key, use_cache, static_only)
+        if cached is not None:
+            metadata = self._products_metadata(cached, 0.0, 0, count, 200, {}, params)
+            metadata['cache_hit'] = True
+            return {
+                'data': cached,
+                'metadata': metadata,
+                'success': True,
+                'error': None
+            }
+        
+        return self._coalesce(cache_key, lambda: self._fetch_products_page(count, params, cache_key))
+    
+    def _fetch_products_page(self, count: int, params: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """Network half of get_products: request one page with retries and cache it"""
         start_time = time.time()
         
         for attempt in range(self.max_retries):
             try:
-                self.logger.info(f"Making API request (attempt {attempt + 1}) with count={count}")
+                self.logger.debug(f"Making API request (attempt {attempt + 1}) with count={count}")
                 
-                response = requests.get(
-                    self.base_url,
-                    headers=headers,
-                    params=params,
-                    timeout=self.timeout
-                )
+                response, headers = self._send(self.base_url, params)
                 
                 end_time = time.time()
                 response_time = end_time - start_time
                 
-                # Log request details
-                self.logger.info(f"Response status: {response.status_code}")
-                self.logger.info(f"Response time: {response_time:.2f}s")
-                self.logger.info(f"Response size: {len(response.content)} bytes")
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                     
                     # Add metadata to response
-                    metadata = {
-                        'request_time': datetime.now().isoformat(),
-                        'response_time_seconds': response_time,
-                        'response_size_bytes': len(response.content),
-                        'requested_count': count,
-                        'actual_items_returned': len(data.get('items', [])),
-                        'total_pages': data.get('totalPages'),
-                        'next_page': data.get('nextPage'),
-                        'status_code': response.status_code,
-                        'headers_sent': dict(headers),
-                        'params_sent': dict(params)
-                    }
+                    metadata = self._products_metadata(
+                        data, response_time, len(response.content), count,
+                        response.status_code, headers, params
+                    )
                     
                     result = {
                         'data': data,
@@ -374,7 +1079,9 @@ class WalmartAPIClient:
                         'error': None
                     }
                     
-                    self.logger.info(f"Successfully retrieved {len(data.get('items', []))} items")
+                    self.logger.debug(f"Successfully retrieved {len(data.get('items', []))} items")
+                    if self.response_cache:
+                        self.response_cache.put(cache_key, data)
                     return result
                     
                 else:
@@ -382,9 +1089,8 @@ class WalmartAPIClient:
                     self.logger.warning(f"Response content: {response.text[:500]}")
                     
                     if response.status_code == 429:  # Rate limited
-                        wait_time = 2 ** attempt  # Exponential backoff
+                        wait_time = self._wait_after_throttle(response, attempt)
                         self.logger.info(f"Rate limited. Waiting {wait_time}s before retry...")
-                        time.sleep(wait_time)
                         continue
                     
                     # For other HTTP errors, return the error immediately
@@ -401,6 +1107,8 @@ class WalmartAPIClient:
                         'error': f"HTTP {response.status_code}: {response.text}"
                     }
                     
+            except CircuitOpenError as e:
+                return self._circuit_open_result(e)
             except requests.exceptions.RequestException as e:
                 self.logger.error(f"Request exception on attempt {attempt + 1}: {str(e)}")
                 if attempt == self.max_retries - 1:  # Last attempt
@@ -429,47 +1137,219 @@ class WalmartAPIClient:
             'error': f"Failed after {self.max_retries} attempts"
         }
     
-    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+    def iter_products(self,
+                      category: Optional[str] = None,
+                      brand: Optional[str] = None,
+                      page_size: Optional[int] = None,
+                      max_items: Optional[int] = None,
+                      resume_token: Optional[str] = None,
+                      prefetch: bool = True,
+                      **kwargs) -> ProductCursor:
+        """
+        Stream products from the paginated items endpoint, following nextPage/lastDoc
+        cursors and prefetching the next page in the background.
+
+        Args:
+            category: Category ID filter
+            brand: Brand name filter
+            page_size: Items per request (count); None follows the tuned batch size page by page
+            max_items: Stop after this many items
+            resume_token: lastDoc cursor from a previous cursor's resume_token
+            prefetch: Fetch the next page while the caller processes the current one
+            **kwargs: Additional filter parameters passed to get_products
+
+        Returns:
+            ProductCursor: iterate it for items; inspect .resume_token, .error,
+            .exhausted and .pages_fetched as it goes
         """
-        Search for products using the Search API
+        return ProductCursor(
+            self,
+            page_size=page_size,
+            max_items=max_items,
+            resume_token=resume_token,
+            prefetch=prefetch,
+            category=category,
+            brand=brand,
+            **kwargs
+        )
+
+    def stream_products(self,
+                        count: int = 1000,
+                        category: Optional[str] = None,
+                        brand: Optional[str] = None,
+                        page_info: Optional[Dict[str, Any]] = None,
+                        **kwargs) -> Iterator[Dict[str, Any]]:
         """
-        search_url = "https://developer.api.walmart.com/api-proxy/service/affil/product/v2/search"
-        headers = self._get_headers()
+        Yield the items of one paginated items page as they are parsed off the wire,
+        without building the whole document (incremental when ijson is installed).
+        Meant for large count pulls; streamed pages bypass the response cache.
+
+        Args:
+            count: Number of products to request
+            category: Category ID filter
+            brand: Brand name filter
+            page_info: If given, filled with the page's top-level fields
+                       (nextPage, totalResults, ...) once iteration finishes
+            **kwargs: Additional filter parameters
+
+        Raises:
+            requests.HTTPError: if the page could not be fetched
+        """
+        params = self._build_params(count=count, category=category, brand=brand, **kwargs)
+
+        for attempt in range(self.max_retries):
+            response, _ = self._send(self.base_url, params, stream=True)
+            if response.status_code == 429 and attempt < self.max_retries - 1:
+                response.close()
+                self._wait_after_throttle(response, attempt)
+                continue
+            break
+
+        with response:
+            if response.status_code != 200:
+                self.logger.warning(f"API returned status code: {response.status_code}")
+                response.raise_for_status()
+            # Let urllib3 undo gzip/br as the parser reads
+            response.raw.decode_content = True
+            yield from json_codec.iter_array(response.raw, 'items', page_info)
+
+    def search(self, query: str, use_cache: bool = True, static_only: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Search for products using the Search API.
+        use_cache/static_only behave as in get_products.
+        """
+        params = self._build_search_params(query, **kwargs)
         
-        params = {
-            'query': query,
-            'publisherId': self.publisher_id,
-            'campaignId': self.campaign_id,
-        }
-        # Add optional params
-        for k, v in kwargs.items():
-            if v is not None:
-                params[k] = v
-                
+        cache_key = ResponseCache.make_key(self.search_url, params)
+        cached = self._lookup_cached_page(cache_key, use_cache, static_only)
+        if cached is not None:
+            return {
+                'success': True,
+                'data': cached,
+                'cache_hit': True
+            }
+        
+        return self._coalesce(cache_key, lambda: self._fetch_search_page(query, params, cache_key))
+    
+    def _fetch_search_page(self, query: str, params: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """Network half of search: request one page and cache it"""
         try:
-            self.logger.info(f"Searching for: {query}")
-            response = requests.get(search_url, headers=headers, params=params, timeout=self.timeout)
+            self.logger.debug(f"Searching for: {query}")
+            response, _ = self._send_hedged(self.search_url, params)
             
             if response.status_code == 200:
+                data = json_codec.loads(response.content)
+                if self.response_cache:
+                    self.response_cache.put(cache_key, data)
                 return {
                     'success': True,
-                    'data': response.json()
+                    'data': data
                 }
             else:
                 return {
                     'success': False,
                     'error': f"Status {response.status_code}: {response.text}"
                 }
+        except CircuitOpenError as e:
+            return self._circuit_open_result(e)
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
 
+    @staticmethod
+    def _search_offsets(max_items: int, page_size: int) -> List[int]:
+        """1-based 'start' offsets for every search page needed to cover max_items"""
+        return list(range(1, max_items + 1, page_size))
+
+    @staticmethod
+    def _merge_search_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge search pages fetched in offset order: stop at the first empty or failed
+        page and de-duplicate items by itemId.
+        """
+        items: List[Dict[str, Any]] = []
+        seen = set()
+        pages_used = 0
+        error = None
+        for page in pages:
+            if not page.get('success'):
+                error = page.get('error')
+                break
+            page_items = page['data'].get('items', [])
+            if not page_items:
+                break
+            pages_used += 1
+            for item in page_items:
+                item_id = item.get('itemId')
+                if item_id is not None:
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                items.append(item)
+
+        if error and not pages_used:
+            return {'success': False, 'error': error, 'pages_fetched': 0}
+        return {
+            'success': True,
+            'data': {
+                'items': items
+            },
+            'pages_fetched': pages_used,
+            'error': error
+        }
+
+    def search_pages(self,
+                     query: str,
+                     max_items: int = 500,
+                     concurrency: Optional[int] = None,
+                     page_size: Optional[int] = None,
+                     **kwargs) -> Dict[str, Any]:
+        """
+        Deep search: fetch every page up to max_items, requesting the known 'start'
+        offsets concurrently (under the shared rate limit) instead of one by one.
+
+        Pages are requested in waves of `concurrency`; no further wave is started
+        once a page comes back empty or fails.
+
+        Args:
+            query: Search query
+            max_items: Stop after this many results
+            concurrency: Pages in flight at once (defaults to SEARCH_PAGE_CONCURRENCY)
+            page_size: numItems per page (the search API caps this at 25; None uses the tuned size)
+            **kwargs: Additional search params passed to search()
+
+        Returns:
+            Dict with success flag, de-duplicated items in result order under
+            data.items, 'pages_fetched', and 'error' if a page failed part way
+        """
+        page_size = page_size or self.batch_tuner.size('search')
+        offsets = self._search_offsets(max_items, page_size)
+        workers = max(1, concurrency or self.search_page_concurrency)
+
+        def _fetch(start: int) -> Dict[str, Any]:
+            return self.search(query, numItems=page_size, start=start, **kwargs)
+
+        pages: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, len(offsets), workers):
+                wave = list(pool.map(_fetch, offsets[i:i + workers]))
+                pages.extend(wave)
+                if any(not p.get('success') or not p['data'].get('items') for p in wave):
+                    break
+
+        result = self._merge_search_pages(pages)
+        if result['success']:
+            result['data']['items'] = result['data']['items'][:max_items]
+        if any(p.get('circuit_open') for p in pages):
+            result['circuit_open'] = True
+        return result
+
     def test_connection(self) -> bool:
         """Test basic API connectivity"""
         try:
-            result = self.get_products(count=1)
+            result = self.get_products(count=1, use_cache=False)
             return result['success']
         except Exception as e:
             self.logger.error(f"Connection test failed: {str(e)}")
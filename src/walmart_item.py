@@ -0,0 +1,110 @@
+import sys
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:
+    from . import json_codec
+except ImportError:  # imported by flat name, with src/ on sys.path
+    import json_codec
+
+# API field -> slot for the fields the import/audit pipeline actually reads
+FIELD_SLOTS = {
+    'itemId': 'item_id',
+    'name': 'name',
+    'salePrice': 'sale_price',
+    'msrp': 'msrp',
+    'stock': 'stock',
+    'marketplace': 'marketplace',
+    'sellerInfo': 'seller_info',
+    'brandName': 'brand_name',
+    'categoryPath': 'category_path',
+    'numReviews': 'num_reviews',
+    'customerRating': 'customer_rating',
+    'upc': 'upc',
+    'gtin': 'gtin',
+    'productUrl': 'product_url',
+    'largeImage': 'large_image'
+}
+
+# Low-cardinality strings shared across many items
+_INTERNED = frozenset({'stock', 'seller_info', 'brand_name', 'category_path'})
+
+
+class WalmartItem:
+    """
+    Compact, slotted view of a Walmart item for scripts that hold many of them
+    (candidate sets sorted and de-duplicated in memory).
+
+    Only the fields in FIELD_SLOTS are parsed out; brand, seller, category and
+    stock strings are interned so repeated values share one object. The full API
+    payload (descriptions, image entities, ...) is kept zlib-compressed and only
+    decoded when something asks for it. get() answers dict-style lookups, so code
+    written against item dicts (e.g. generate_affiliate_link) keeps working.
+    """
+
+    __slots__ = tuple(FIELD_SLOTS.values()) + ('_raw',)
+
+    def __init__(self, data: Dict[str, Any], keep_raw: bool = True):
+        """
+        Args:
+            data: Item dict as returned by the Walmart API
+            keep_raw: Keep the compressed full payload for lazy access (raw, description, image_urls)
+        """
+        for field, slot in FIELD_SLOTS.items():
+            value = data.get(field)
+            if slot in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, slot, value)
+        try:
+            self.num_reviews = int(self.num_reviews or 0)
+        except (TypeError, ValueError):
+            self.num_reviews = 0
+        self._raw = zlib.compress(json_codec.dumps(data).encode('utf-8')) if keep_raw else None
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """Full API payload (empty when built with keep_raw=False)"""
+        if self._raw is None:
+            return {}
+        return json_codec.loads(zlib.decompress(self._raw))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """dict.get over API field names; fields without a slot come from the raw payload"""
+        slot = FIELD_SLOTS.get(field)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is None else value
+        return self.raw.get(field, default)
+
+    @property
+    def description(self) -> str:
+        raw = self.raw
+        return raw.get('longDescription') or raw.get('shortDescription') or ''
+
+    @property
+    def image_urls(self) -> List[str]:
+        """Large image URLs from imageEntities, falling back to largeImage"""
+        urls = [img['largeImage'] for img in self.raw.get('imageEntities') or [] if img.get('largeImage')]
+        if not urls and self.large_image:
+            urls = [self.large_image]
+        return urls
+
+    @property
+    def gtin_or_upc(self) -> Optional[str]:
+        return self.upc or self.gtin
+
+    @property
+    def sold_by_walmart(self) -> bool:
+        """First-party offer: not a marketplace listing, or sold by Walmart"""
+        return self.marketplace is False or 'walmart' in (self.seller_info or '').lower()
+
+    def __eq__(self, other):
+        if not isinstance(other, WalmartItem):
+            return NotImplemented
+        return self.item_id == other.item_id
+
+    def __hash__(self):
+        return hash(self.item_id)
+
+    def __repr__(self):
+        return f'WalmartItem(item_id={self.item_id!r}, name={self.name!r})'
@@ -0,0 +1,44 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from catalog_mirror import CatalogMirror
+from shopify_bulk import BulkOperationError
+from shopify_client import ShopifyAPIError
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed or incrementally sync the local Shopify catalog mirror")
+    parser.add_argument('--full', action='store_true', help="Rebuild from a bulk export instead of syncing changes")
+    parser.add_argument('--status', action='store_true', help="Only print row counts and sync times")
+    args = parser.parse_args()
+
+    mirror = CatalogMirror.from_env()
+    if mirror is None:
+        print("Catalog mirror is disabled (SHOPIFY_MIRROR_DISABLED)")
+        return 1
+
+    if not args.status:
+        print(f"🔄 {'Seeding' if args.full or mirror.synced_at is None else 'Syncing'} {mirror.path}...")
+        try:
+            changes = mirror.sync(full=args.full)
+        except (BulkOperationError, ShopifyAPIError) as e:
+            print(f"❌ Sync failed: {e}")
+            return 1
+        print(f"   ✅ {changes['products']} products, {changes['levels']} inventory levels, {changes['deleted']} deleted")
+
+    print("\n📊 Mirror Status:")
+    for key, value in mirror.status().items():
+        print(f"   {key}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
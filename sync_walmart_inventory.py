@@ -1,33 +1,29 @@
 import csv
-import requests
 import os
-import time
-import json
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from shopify_client import get_shopify_client
+
 # Load environment variables
 load_dotenv()
 
 # Shopify Configuration
 SHOPIFY_STORE_URL = os.getenv("SHOPIFY_STORE_URL")
 SHOPIFY_ACCESS_TOKEN = os.getenv("SHOPIFY_ACCESS_TOKEN")
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("Error: SHOPIFY_STORE_URL and SHOPIFY_ACCESS_TOKEN must be set in .env")
     exit(1)
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
-
 def update_shopify_product(product_id, data):
-    """Updates a product in Shopify via the Admin API."""
-    url = f"{BASE_URL}/products/{product_id}.json"
+    """Updates a product in Shopify via the Admin API (paced by the shared call-limit bucket)."""
     try:
-        response = requests.put(url, headers=HEADERS, json={"product": data})
+        response = get_shopify_client().put(f"products/{product_id}.json", json={"product": data})
         if response.status_code == 200:
             return True
         else:
@@ -102,9 +98,6 @@ def sync_inventory_from_report(report_file='inventory_audit_report.csv'):
             else:
                 print(f"   ⚠️  No action defined for {action}")
 
-            # Rate limiting pause
-            time.sleep(0.5)
-
     print(f"\nSync Complete!")
     print(f"Success: {success_count}")
     print(f"Errors: {error_count}")
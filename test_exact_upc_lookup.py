@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import List, Dict
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 # Same GTIN list as our earlier test
 TEST_PRODUCTS = [
@@ -46,7 +46,7 @@ def chunked(lst: List[str], n: int) -> List[List[str]]:
 
 
 def main():
-    api = WalmartAPIClient()
+    api = get_client()
 
     gtins = [gtin for gtin, _ in TEST_PRODUCTS]
 
@@ -8,7 +8,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 # Test GTINs
 test_products = [
@@ -39,7 +39,7 @@ test_products = [
 def test_gtin_matching():
     """Test matching these GTINs against Walmart"""
     
-    api = WalmartAPIClient()
+    api = get_client()
     POSTAL_CODE = '78210'
     
     print("\n" + "="*80)
@@ -196,7 +196,7 @@ if __name__ == '__main__':
 
     # If we have matches, enrich with ZIP-aware details using item IDs
     if results['matches']:
-        api = WalmartAPIClient()
+        api = get_client()
         POSTAL_CODE = '78210'
         item_ids = [m.get('walmart_item_id') for m in results['matches'] if m.get('walmart_item_id')]
         # Deduplicate and ensure ints
@@ -210,19 +210,16 @@ if __name__ == '__main__':
         print("="*80)
         print(f"Enriching {len(unique_ids)} matched Walmart items with location-aware details...\n")
 
-        # Chunk requests to avoid very long URLs
-        def chunks(lst, n):
-            for i in range(0, len(lst), n):
-                yield lst[i:i+n]
-
+        # The client splits the IDs into endpoint-sized batches and fetches them concurrently
         enriched: dict[int, dict] = {}
-        for batch in chunks(unique_ids, 20):
-            resp = api.get_items_by_ids(batch, postal_code=POSTAL_CODE)
-            if resp.get('success') and resp['data'].get('items'):
-                for it in resp['data']['items']:
-                    wid = it.get('itemId')
-                    if wid is not None:
-                        enriched[wid] = it
+        resp = api.get_items_by_ids(unique_ids, postal_code=POSTAL_CODE)
+        if resp.get('success') and resp['data'].get('items'):
+            for it in resp['data']['items']:
+                wid = it.get('itemId')
+                if wid is not None:
+                    enriched[wid] = it
+        if resp.get('missing'):
+            print(f"⚠️  {len(resp['missing'])} item IDs returned no data for ZIP {POSTAL_CODE}\n")
 
         # Print per-match summary with ZIP-aware flags where available
         available_online_count = 0
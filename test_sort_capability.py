@@ -2,14 +2,14 @@ import os
 import json
 import ssl
 import certifi
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 # Fix SSL issues on macOS
 ssl_context = ssl.create_default_context(cafile=certifi.where())
 ssl._create_default_https_context = ssl._create_unverified_context
 
 def test_sort():
-    client = WalmartAPIClient()
+    client = get_client()
     
     print("🔍 Testing 'sort=best_seller' parameter...")
     
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Scripts import src/ modules by flat name; the tests do the same
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+
+class FakeClock:
+    """Stands in for the time module: time() is fixed until sleep() or advance() moves it"""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += max(0.0, seconds)
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time for the modules that keep shared state or pace retries"""
+    import circuit_breaker
+    import credential_pool
+    import parked_work
+    import rate_limiter
+    import response_cache
+    import shared_state
+    import shopify_client
+
+    fake = FakeClock()
+    for module in (circuit_breaker, credential_pool, parked_work, rate_limiter, response_cache, shared_state,
+                   shopify_client):
+        monkeypatch.setattr(module, 'time', fake)
+    return fake
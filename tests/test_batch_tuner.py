@@ -0,0 +1,70 @@
+from batch_tuner import AIMDTuner, BatchTuner, save_profile
+from client_state import ClientState
+
+
+def test_aimd_grows_additively_and_halves_on_errors():
+    tuner = AIMDTuner(initial=40, minimum=1, maximum=100, latency_target=2.0, step=10)
+    tuner.record(True, 1.0)
+    tuner.record(True, 1.0)
+    assert tuner.size == 60
+    tuner.record(False)
+    assert tuner.size == 30
+    # A slow success counts as congestion too
+    tuner.record(True, 3.0)
+    assert tuner.size == 15
+
+
+def test_aimd_stays_within_its_bounds():
+    tuner = AIMDTuner(initial=500, minimum=5, maximum=100, latency_target=2.0)
+    assert tuner.size == 100
+    tuner.record(True, 0.1)
+    assert tuner.size == 100
+    for _ in range(10):
+        tuner.record(False)
+    assert tuner.size == 5
+
+
+def test_profile_seeds_sizes_capped_at_the_hard_maximum():
+    profile = ClientState(None)
+    profile.set('products', {'optimal': 300, 'max': 1000, 'latency_target': 4.0})
+    profile.set('ids', {'optimal': 50, 'max': 50})
+    tuner = BatchTuner(profile)
+
+    assert tuner.size('products') == 300
+    assert tuner.tuners['products'].maximum == 1000
+    assert tuner.tuners['products'].latency_target == 4.0
+    assert tuner.size('ids') == 20
+    assert tuner.size('search') == 25
+
+
+def test_throttling_only_shrinks_the_paginated_endpoint():
+    tuner = BatchTuner(ClientState(None))
+    tuner.record('ids', False, throttled=True)
+    assert tuner.size('ids') == 20
+    tuner.record('products', False, throttled=True)
+    assert tuner.size('products') == 50
+
+
+def test_rejection_counts_only_above_the_starting_size():
+    tuner = BatchTuner(ClientState(None))
+    tuner.record_rejected('ids', 20)
+    assert tuner.size('ids') == 20
+    tuner.tuners['ids'].initial = 10
+    tuner.record_rejected('ids', 20)
+    assert tuner.size('ids') == 10
+
+
+def test_static_tuner_ignores_outcomes():
+    tuner = BatchTuner(ClientState(None), adaptive=False)
+    tuner.record('products', False)
+    assert tuner.size('products') == 100
+
+
+def test_save_profile_merges_measurements(tmp_path, monkeypatch):
+    path = tmp_path / 'tuning.json'
+    monkeypatch.setenv('WALMART_TUNING_PROFILE', str(path))
+    save_profile('products', optimal=200, max=800)
+    save_profile('products', latency_target=3.0, max=None)
+
+    entry = ClientState(str(path)).get('products')
+    assert (entry['optimal'], entry['max'], entry['latency_target']) == (200, 800, 3.0)
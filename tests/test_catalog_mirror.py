@@ -0,0 +1,132 @@
+import pytest
+
+from catalog_mirror import MIRROR_PRODUCTS_QUERY, CatalogMirror
+from shopify_bulk import ShopifyBulkExporter
+from shopify_client import ShopifyAPIError
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self._body = body
+        self.status_code = status_code
+        self.text = str(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeClient:
+    """Serves the REST/GraphQL reads an incremental sync makes from in-memory store state"""
+
+    def __init__(self):
+        self.products = {}
+        self.changed = []
+        self.levels = []
+        self.paged = []
+
+    def get(self, path, params=None):
+        if path == 'locations.json':
+            return FakeResponse({'locations': [{'id': 9, 'name': 'Main', 'active': True}]})
+        if path == 'products/count.json':
+            return FakeResponse({'count': len(self.products)})
+        raise AssertionError(path)
+
+    def paginate(self, path, key, params=None):
+        self.paged.append(path)
+        if path == 'products.json' and params.get('fields') == 'id':
+            return [{'id': product_id} for product_id in self.products]
+        if path == 'products.json':
+            return list(self.changed)
+        if path == 'inventory_levels.json':
+            return list(self.levels)
+        raise AssertionError(path)
+
+    def graphql(self, query, variables=None, cost=None, idempotent=None):
+        return {'nodes': [{'id': gid, 'metafields': {'edges': [
+            {'node': {'namespace': 'walmart', 'key': 'item_id', 'value': gid[-1], 'type': 'single_line_text_field'}}
+        ]}} for gid in variables['ids']]}
+
+
+PRODUCT_LINES = [
+    {'id': 'gid://shopify/Product/1', 'title': 'Lego', 'tags': ['Source:Walmart', 'Toys'], 'status': 'ACTIVE'},
+    {'id': 'gid://shopify/Metafield/5', 'namespace': 'walmart', 'key': 'item_id', 'value': '111',
+     'type': 'single_line_text_field', '__parentId': 'gid://shopify/Product/1'},
+    {'id': 'gid://shopify/ProductVariant/11', 'sku': 'W1', 'inventoryQuantity': 3, 'inventoryManagement': 'SHOPIFY',
+     'inventoryItem': {'id': 'gid://shopify/InventoryItem/111'}, '__parentId': 'gid://shopify/Product/1'},
+    {'id': 'gid://shopify/Product/2', 'title': 'Puzzle', 'tags': ['Toys'], 'status': 'ACTIVE'},
+    {'id': 'gid://shopify/ProductVariant/21', 'sku': 'W2', 'inventoryQuantity': 0,
+     'inventoryItem': {'id': 'gid://shopify/InventoryItem/211'}, '__parentId': 'gid://shopify/Product/2'},
+]
+
+INVENTORY_LINES = [
+    {'id': 'gid://shopify/InventoryItem/111', 'sku': 'W1', 'tracked': True,
+     'variant': {'id': 'gid://shopify/ProductVariant/11'}},
+    {'id': 'gid://shopify/InventoryLevel/1', 'location': {'id': 'gid://shopify/Location/9'},
+     'quantities': [{'name': 'available', 'quantity': 3}], '__parentId': 'gid://shopify/InventoryItem/111'},
+]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    client = FakeClient()
+    client.products = {1: {}, 2: {}}
+    monkeypatch.setattr(ShopifyBulkExporter, 'run', lambda self, query: query)
+    monkeypatch.setattr(ShopifyBulkExporter, 'download', lambda self, query: iter(
+        [dict(line) for line in (PRODUCT_LINES if query == MIRROR_PRODUCTS_QUERY else INVENTORY_LINES)]))
+    return client
+
+
+@pytest.fixture
+def mirror(tmp_path, store):
+    mirror = CatalogMirror(str(tmp_path / 'mirror.sqlite3'), client=store)
+    mirror.sync()
+    return mirror
+
+
+def test_seed_mirrors_products_tags_metafields_and_levels(mirror):
+    assert mirror.status()['products'] == 2
+    assert [p['title'] for p in mirror.iter_products(tag='Source:Walmart')] == ['Lego']
+    assert mirror.scalar("SELECT value FROM metafields WHERE product_id = 1 AND key = 'item_id'") == '111'
+    assert mirror.scalar('SELECT available FROM inventory_levels WHERE inventory_item_id = 111 AND location_id = 9') == 3
+    assert mirror.scalar('SELECT tracked FROM inventory_items WHERE id = 111') == 1
+    assert not mirror.is_stale()
+
+
+def test_incremental_sync_applies_changes_and_levels(mirror, store):
+    store.changed = [{'id': 2, 'title': 'Puzzle 1000', 'tags': 'Toys, Source:Walmart', 'status': 'active',
+                      'variants': [{'id': 21, 'sku': 'W2', 'inventory_item_id': 211, 'inventory_quantity': 0}]}]
+    store.levels = [{'inventory_item_id': 111, 'location_id': 9, 'available': 7, 'updated_at': '2026-01-01T00:00:00Z'}]
+
+    assert mirror.sync() == {'products': 1, 'levels': 1, 'deleted': 0}
+    assert [p['title'] for p in mirror.iter_products(tag='Source:Walmart')] == ['Lego', 'Puzzle 1000']
+    assert mirror.scalar("SELECT value FROM metafields WHERE product_id = 2") == '2'
+    # The variant total follows the mirrored levels
+    assert mirror.scalar('SELECT inventory_quantity FROM variants WHERE id = 11') == 7
+
+
+def test_store_count_drop_triggers_a_deletion_check(mirror, store):
+    del store.products[2]
+    assert mirror.sync()['deleted'] == 1
+    assert [p['id'] for p in mirror.iter_products()] == [1]
+    assert mirror.scalar('SELECT COUNT(*) FROM variants WHERE product_id = 2') == 0
+
+
+def test_equal_counts_skip_the_id_list_until_the_check_is_due(mirror, store):
+    mirror.sync()
+    assert store.paged.count('products.json') == 1
+    mirror.id_check_interval = 0
+    mirror.sync()
+    # The periodic check pages the ids even though the counts agree
+    assert store.paged.count('products.json') == 3
+
+
+def test_failed_sync_falls_back_to_live_reads(mirror, store, monkeypatch):
+    mirror.max_age = -1
+
+    def fail(path, key, params=None):
+        raise ShopifyAPIError(503, 'Unavailable')
+
+    monkeypatch.setattr(store, 'paginate', fail)
+    assert not mirror.ensure_fresh()
+    mirror.auto_sync = False
+    assert not mirror.ensure_fresh()
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_congestion_error
+
+
+@pytest.fixture
+def breaker(tmp_path, clock):
+    return CircuitBreaker('test', str(tmp_path / 'circuit.json'), failure_threshold=3, failure_window=30,
+                          open_seconds=10, max_open_seconds=40, ramp_seconds=60)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_closed_traffic_never_writes_the_state_file(breaker, tmp_path):
+    for _ in range(5):
+        assert breaker.allow()
+        breaker.record_success()
+    assert not os.path.exists(tmp_path / 'circuit.json')
+    assert breaker.state == CLOSED
+    assert breaker.retry_after() == 0.0
+
+
+def test_failures_outside_the_window_do_not_trip(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.advance(31)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_threshold_failures_open_the_circuit(breaker):
+    trip(breaker)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == pytest.approx(10)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_half_open_admits_one_probe(breaker, clock):
+    trip(breaker)
+    clock.advance(10)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_with_a_longer_cool_down(breaker, clock):
+    trip(breaker)
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == pytest.approx(20)
+
+
+def test_successful_probe_closes_and_ramps(breaker, clock):
+    trip(breaker)
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.retry_after() == 1.0
+
+
+def test_retry_after_reaches_zero_once_the_ramp_ends_without_allow(breaker, clock):
+    # Callers that wait for retry_after() == 0 before calling allow() must not spin forever
+    trip(breaker)
+    clock.advance(10)
+    assert breaker.allow()
+    breaker.record_success()
+    clock.advance(61)
+    assert breaker.retry_after() == 0.0
+    assert breaker.allow()
+
+
+def test_ramp_end_resets_the_trip_count(breaker, clock):
+    trip(breaker)
+    clock.advance(10)
+    breaker.allow()
+    breaker.record_success()
+    clock.advance(61)
+    assert breaker.allow()
+    trip(breaker)
+    assert breaker.retry_after() == pytest.approx(10)
+
+
+def test_state_is_shared_between_instances(breaker, tmp_path):
+    other = CircuitBreaker('test', str(tmp_path / 'circuit.json'), failure_threshold=3)
+    trip(breaker)
+    assert other.state == OPEN
+    assert not other.allow()
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Shopify API error 429: Throttled', True),
+    ('503 Server Error: Service Unavailable', True),
+    ('Too Many Requests', True),
+    ('Shopify API error 422: title is invalid', False),
+])
+def test_is_congestion_error(message, expected):
+    assert is_congestion_error(Exception(message)) is expected
@@ -0,0 +1,104 @@
+import base64
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from credential_pool import CredentialPool, WalmartCredential, load_private_key
+from rate_limiter import SharedRateLimiter
+
+
+@pytest.fixture
+def make_pool(tmp_path, clock):
+    def make(count, qps=2.0, burst=2):
+        credentials = [
+            WalmartCredential(f'{i}-consumer', private_key=None,
+                              rate_limiter=SharedRateLimiter(qps, burst, str(tmp_path / f'bucket{i}.json')))
+            for i in range(count)
+        ]
+        return CredentialPool(credentials, sideline_seconds=30)
+    return make
+
+
+def test_requests_spread_across_idle_credentials(make_pool):
+    pool = make_pool(3)
+    chosen = [pool.reserve()[0].consumer_id for _ in range(3)]
+    assert sorted(chosen) == ['0-consumer', '1-consumer', '2-consumer']
+
+
+def test_credential_with_a_queued_bucket_is_avoided(make_pool):
+    pool = make_pool(2, burst=1)
+    first, wait = pool.reserve()
+    assert wait == 0.0
+    pool.release(first, 200)
+    # first's bucket is empty; the other one can send now
+    second, wait = pool.reserve()
+    assert second is not first and wait == 0.0
+
+
+def test_throttled_credential_is_sidelined_and_skipped(make_pool, clock):
+    pool = make_pool(2)
+    throttled, _ = pool.reserve()
+    pool.release(throttled, 429, retry_after=10)
+
+    assert throttled.sidelined_until == clock.now + 10
+    for _ in range(3):
+        credential, _ = pool.reserve()
+        assert credential is not throttled
+        pool.release(credential, 200)
+    assert pool.snapshot()[throttled.label]['sidelined'] == 1
+
+
+def test_all_sidelined_callers_wait_for_the_first_to_return(make_pool, clock):
+    pool = make_pool(2)
+    for seconds in (10, 20):
+        credential, _ = pool.reserve()
+        pool.release(credential, 429, retry_after=seconds)
+    assert pool.all_sidelined()
+
+    credential = pool.acquire()
+    assert credential.stats['throttled'] == 1
+    assert clock.sleeps == [pytest.approx(10)]
+
+
+def test_single_credential_429_pauses_its_limiter(make_pool):
+    pool = make_pool(1)
+    credential, _ = pool.reserve()
+    pool.release(credential, 429, retry_after=5)
+    assert credential.sidelined_until == 0.0
+    assert credential.rate_limiter.pending() == pytest.approx(5)
+
+
+def test_cancel_and_release_keep_counters_straight(make_pool):
+    pool = make_pool(1)
+    credential, _ = pool.reserve()
+    pool.cancel(credential)
+    assert (credential.in_flight, credential.stats['requests']) == (0, 0)
+    credential, _ = pool.reserve()
+    pool.release(credential, 503)
+    assert (credential.in_flight, credential.stats['errors']) == (0, 1)
+
+
+def test_from_env_adds_numbered_credentials(monkeypatch, tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    der = base64.b64encode(key.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8,
+                                             serialization.NoEncryption())).decode()
+    monkeypatch.setenv('WALMART_CONSUMER_ID_2', 'second-consumer')
+    monkeypatch.setenv('WALMART_PRIVATE_KEY_2', der)
+    monkeypatch.setenv('WALMART_RATE_LIMIT_QPS_2', '3')
+    monkeypatch.setenv('WALMART_RATE_LIMIT_FILE_2', str(tmp_path / 'second.json'))
+    monkeypatch.delenv('WALMART_CONSUMER_ID_3', raising=False)
+
+    pool = CredentialPool.from_env(WalmartCredential('primary', private_key=None))
+    assert [c.consumer_id for c in pool.credentials] == ['primary', 'second-consumer']
+    assert pool.credentials[1].rate_limiter.qps == 3.0
+    # Parsed once per process
+    assert load_private_key(der) is pool.credentials[1].private_key
+
+
+def test_missing_key_for_a_numbered_credential_is_an_error(monkeypatch):
+    monkeypatch.setenv('WALMART_CONSUMER_ID_2', 'second-consumer')
+    monkeypatch.delenv('WALMART_PRIVATE_KEY_2', raising=False)
+    monkeypatch.delenv('WALMART_PRIVATE_KEY_PATH_2', raising=False)
+    with pytest.raises(ValueError):
+        CredentialPool.from_env(WalmartCredential('primary', private_key=None))
@@ -0,0 +1,83 @@
+from inventory_writer import ACTIVATE_MUTATION, SET_QUANTITIES_MUTATION, InventoryWriter
+from shopify_client import ShopifyAPIError
+
+
+class FakeClient:
+    """Answers inventory mutations; `reject` maps an inventory item id to a userError"""
+
+    def __init__(self, reject=None, fail=False):
+        self.reject = reject or {}
+        self.fail = fail
+        self.sets = []
+        self.activated = []
+        self.idempotent = set()
+
+    def graphql(self, query, variables=None, cost=None, idempotent=None):
+        self.idempotent.add(idempotent)
+        if query == ACTIVATE_MUTATION:
+            self.activated.append((variables['item'], variables['available']))
+            return {'inventoryActivate': {'userErrors': []}}
+        assert query == SET_QUANTITIES_MUTATION
+        if self.fail:
+            raise ShopifyAPIError(502, 'Bad Gateway')
+        quantities = variables['input']['quantities']
+        self.sets.append([q['inventoryItemId'] for q in quantities])
+        errors = []
+        for index, q in enumerate(quantities):
+            error = self.reject.get(q['inventoryItemId'])
+            if error:
+                errors.append(dict(error, field=['input', 'quantities', str(index), 'locationId']))
+        return {'inventorySetQuantities': {'userErrors': errors}}
+
+
+def item(n):
+    return f'gid://shopify/InventoryItem/{n}'
+
+
+def test_changes_are_deduplicated_and_batched():
+    client = FakeClient()
+    writer = InventoryWriter(client, batch_size=2, workers=1)
+    result = writer.set_quantities([(1, 9, 5), (2, 9, 0), (3, 9, 7), (1, 9, 6)])
+
+    assert result == {'updated': 3, 'failures': {}}
+    assert client.sets == [[item(1), item(2)], [item(3)]]
+    # Absolute sets are marked safe to resend
+    assert client.idempotent == {True}
+
+
+def test_rejected_items_are_split_out_and_the_rest_resent():
+    client = FakeClient(reject={item(2): {'message': 'Invalid location', 'code': 'INVALID_LOCATION'}})
+    writer = InventoryWriter(client, workers=1)
+    result = writer.set_quantities([(1, 9, 5), (2, 9, 0), (3, 9, 7)])
+
+    assert result == {'updated': 2, 'failures': {(2, 9): 'Invalid location'}}
+    assert client.sets == [[item(1), item(2), item(3)], [item(1), item(3)]]
+    assert writer.stats['failed'] == 1
+
+
+def test_items_not_stocked_are_activated_with_their_quantity():
+    client = FakeClient(reject={item(2): {'message': 'Not stocked', 'code': 'ITEM_NOT_STOCKED_AT_LOCATION'}})
+    writer = InventoryWriter(client, workers=1)
+    result = writer.set_quantities([(1, 9, 5), (2, 9, 4)])
+
+    assert result == {'updated': 2, 'failures': {}}
+    assert client.activated == [(item(2), 4)]
+    assert writer.stats['activated'] == 1
+
+
+def test_error_not_tied_to_an_item_fails_the_whole_batch():
+    class Unscoped(FakeClient):
+        def graphql(self, query, variables=None, cost=None, idempotent=None):
+            return {'inventorySetQuantities': {'userErrors': [{'field': ['input', 'reason'], 'message': 'Bad reason'}]}}
+
+    writer = InventoryWriter(Unscoped(), workers=1)
+    result = writer.set_quantities([(1, 9, 5), (2, 9, 4)])
+    assert result == {'updated': 0, 'failures': {(1, 9): 'Bad reason', (2, 9): 'Bad reason'}}
+
+
+def test_api_error_fails_the_items_in_its_batch():
+    client = FakeClient(fail=True)
+    writer = InventoryWriter(client, batch_size=1, workers=2)
+    result = writer.set_quantities([(1, 9, 5), (2, 9, 4)])
+    assert result['updated'] == 0
+    assert set(result['failures']) == {(1, 9), (2, 9)}
@@ -0,0 +1,93 @@
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from parked_work import ParkedWork
+from shopify_client import ShopifyAPIError
+
+
+class Item:
+    def __init__(self, item_id):
+        self.item_id = item_id
+
+
+class Throttled(Exception):
+    def __init__(self):
+        super().__init__('Shopify API error 429: Throttled')
+
+
+def recovered_breaker(path, clock):
+    """A breaker that has just closed after a successful probe, so it is ramping"""
+    breaker = CircuitBreaker('walmart', path, failure_threshold=1, open_seconds=5, ramp_seconds=60)
+    breaker.record_failure()
+    clock.advance(5)
+    assert breaker.allow()
+    breaker.record_success()
+    return breaker
+
+
+def test_resume_runs_searches_parked_before_the_circuit_recovered(tmp_path, clock):
+    walmart = recovered_breaker(str(tmp_path / 'walmart.json'), clock)
+    saved = []
+    parked = ParkedWork(search=lambda keyword, category: [Item(keyword)],
+                        save=lambda item, category, keyword: saved.append(item.item_id) or True,
+                        walmart_circuit=walmart)
+    parked.park_search('Toys', 'Lego')
+
+    assert parked.resume() == 1
+    assert saved == ['Lego']
+    # Waited out the ramp rather than spinning on it
+    assert sum(clock.sleeps) <= 61
+
+
+def test_item_is_parked_while_the_shopify_circuit_is_open(tmp_path, clock):
+    shopify = CircuitBreaker('shopify', str(tmp_path / 'shopify.json'), failure_threshold=1, open_seconds=30)
+    shopify.record_failure()
+    saved = []
+    parked = ParkedWork(search=lambda keyword, category: [],
+                        save=lambda item, category, keyword: saved.append(item.item_id) or True,
+                        shopify_circuit=shopify)
+
+    assert parked.import_item(Item(1), 'Toys', 'Lego') == 0
+    assert saved == [] and len(parked.items) == 1
+    assert parked.resume() == 1
+    assert saved == [1]
+
+
+def test_throttled_item_is_dropped_after_max_attempts(clock):
+    calls = []
+
+    def save(item, category, keyword):
+        calls.append(item.item_id)
+        raise Throttled()
+
+    parked = ParkedWork(search=lambda keyword, category: [], save=save, max_attempts=3, max_delay=4)
+    assert parked.import_item(Item(7), 'Toys', 'Lego') == 0
+    assert parked.resume() == 0
+    assert calls == [7, 7, 7]
+    assert not parked
+    # Without a circuit each retry backs off, capped at max_delay
+    assert clock.sleeps == [2.0, 4.0]
+
+
+def test_other_errors_are_not_parked(clock):
+    def save(item, category, keyword):
+        raise ValueError('bad payload')
+
+    parked = ParkedWork(search=lambda keyword, category: [], save=save)
+    assert parked.import_item(Item(1), 'Toys', 'Lego') == 0
+    assert not parked
+
+
+def test_save_that_may_have_been_applied_is_not_resent(tmp_path, clock):
+    shopify = CircuitBreaker('shopify', str(tmp_path / 'shopify.json'), failure_threshold=5)
+    calls = []
+
+    def save(item, category, keyword):
+        calls.append(item.item_id)
+        raise ShopifyAPIError(502, 'Bad Gateway', maybe_applied=True)
+
+    parked = ParkedWork(search=lambda keyword, category: [], save=save, shopify_circuit=shopify)
+    assert parked.import_item(Item(1), 'Toys', 'Lego') == 0
+    assert not parked
+    assert parked.resume() == 0
+    assert calls == [1]
@@ -0,0 +1,88 @@
+import pytest
+
+import product_index
+from catalog_mirror import CatalogMirror
+from product_index import ProductIndex
+from shopify_client import ShopifyAPIError
+
+
+def product(product_id, tags, *variants):
+    return {'id': product_id, 'title': f'Product {product_id}', 'tags': tags,
+            'variants': [{'id': variant_id, 'sku': sku, 'barcode': barcode} for variant_id, sku, barcode in variants]}
+
+
+def test_lookup_by_sku_barcode_and_legacy_sku():
+    index = ProductIndex()
+    index.add_products([
+        product(1, 'Jenni', (11, '0123', None)),
+        product(2, 'Jenni', (21, 'JN_0456', '')),
+        product(3, 'Jenni', (31, 'custom', '0789')),
+    ])
+    assert index.lookup('0123') == (1, 11)
+    assert index.lookup(' 0456 ') == (2, 21)
+    assert index.lookup('0789') == (3, 31)
+    assert index.lookup('0000') is None
+    assert index.lookup('') is None
+
+
+def test_first_variant_seen_wins():
+    index = ProductIndex()
+    index.add(1, 11, sku='0123')
+    index.add(2, 21, sku='0123')
+    assert index.lookup('0123') == (1, 11)
+    assert len(index) == 1
+
+
+def test_from_mirror_filters_by_tag(tmp_path):
+    mirror = CatalogMirror(str(tmp_path / 'mirror.sqlite3'))
+    mirror.upsert_products([product(1, 'Jenni', (11, '0123', None)), product(2, 'Other', (21, '0456', None))])
+
+    index = ProductIndex.from_mirror(mirror, tag='Jenni')
+    assert index.lookup('0123') == (1, 11)
+    assert index.lookup('0456') is None
+
+
+@pytest.fixture
+def unseeded_mirror(tmp_path, monkeypatch):
+    monkeypatch.setenv('SHOPIFY_MIRROR_PATH', str(tmp_path / 'mirror.sqlite3'))
+    monkeypatch.delenv('SHOPIFY_MIRROR_DISABLED', raising=False)
+    exports = []
+
+    def export_products(search=None, client=None, location_id=None):
+        exports.append(search)
+        return [product(1, 'Jenni', (11, '0123', None))]
+
+    monkeypatch.setattr(product_index, 'export_products', export_products)
+    return exports
+
+
+def test_load_uses_a_bulk_export_without_a_seeded_mirror(unseeded_mirror):
+    index = ProductIndex.load(tag='Jenni')
+    assert unseeded_mirror == ["tag:'Jenni'"]
+    assert index.lookup('0123') == (1, 11)
+
+
+def test_load_falls_back_to_an_export_when_the_mirror_sync_fails(unseeded_mirror, monkeypatch):
+    def fail(self, full=False):
+        raise ShopifyAPIError(503, 'Unavailable')
+
+    monkeypatch.setattr(CatalogMirror, 'synced_at', property(lambda self: '2026-01-01T00:00:00+00:00'))
+    monkeypatch.setattr(CatalogMirror, 'sync', fail)
+    assert ProductIndex.load(tag='Jenni').lookup('0123') == (1, 11)
+    assert unseeded_mirror == ["tag:'Jenni'"]
+
+
+def test_load_reads_a_seeded_mirror_after_syncing_it(unseeded_mirror, monkeypatch):
+    synced = []
+
+    def sync(self, full=False):
+        # Stands in for an incremental sync picking up a product created by an earlier run
+        synced.append(self)
+        self.upsert_products([product(5, 'Jenni', (51, '0999', None))])
+
+    monkeypatch.setattr(CatalogMirror, 'synced_at', property(lambda self: '2026-01-01T00:00:00+00:00'))
+    monkeypatch.setattr(CatalogMirror, 'sync', sync)
+
+    index = ProductIndex.load(tag='Jenni')
+    assert len(synced) == 1 and unseeded_mirror == []
+    assert index.lookup('0999') == (5, 51)
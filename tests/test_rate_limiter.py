@@ -0,0 +1,78 @@
+import pytest
+
+from rate_limiter import SharedRateLimiter, parse_retry_after
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return SharedRateLimiter(2.0, 4, str(tmp_path / 'bucket.json'))
+
+
+def test_burst_is_free_then_callers_queue_at_qps(limiter):
+    assert [limiter.reserve() for _ in range(4)] == [0.0] * 4
+    # The bucket goes into debt: each further caller waits one more 1/qps slot
+    assert [limiter.reserve() for _ in range(3)] == [pytest.approx(0.5), pytest.approx(1.0), pytest.approx(1.5)]
+
+
+def test_tokens_refill_at_qps_up_to_the_burst(limiter, clock):
+    for _ in range(4):
+        limiter.reserve()
+    clock.advance(1)
+    assert limiter.pending(2) == 0.0
+    assert limiter.pending(3) == pytest.approx(0.5)
+    clock.advance(100)
+    assert limiter.pending(4) == 0.0
+    assert limiter.pending(5) == pytest.approx(0.5)
+
+
+def test_pending_takes_nothing(limiter):
+    for _ in range(10):
+        assert limiter.pending() == 0.0
+    assert limiter.reserve(4) == 0.0
+
+
+def test_processes_sharing_the_file_share_the_bucket(limiter, tmp_path):
+    other = SharedRateLimiter(2.0, 4, str(tmp_path / 'bucket.json'))
+    limiter.reserve(2)
+    other.reserve(2)
+    assert limiter.reserve() == pytest.approx(0.5)
+
+
+def test_sync_only_lowers_the_bucket(limiter):
+    limiter.sync(1)
+    assert limiter.pending(2) == pytest.approx(0.5)
+    limiter.sync(10)
+    assert limiter.pending(2) == pytest.approx(0.5)
+
+
+def test_penalize_blocks_everyone_and_drains_the_burst(limiter, clock):
+    limiter.penalize(3)
+    assert limiter.pending() == pytest.approx(3)
+    clock.advance(3)
+    # Resumes at the steady rate rather than with a full burst
+    assert limiter.reserve() == pytest.approx(0.0)
+    assert limiter.reserve() == pytest.approx(0.5)
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_callers_queued_during_a_penalty_go_out_at_qps_after_it(limiter):
+    limiter.penalize(3)
+    assert [limiter.reserve() for _ in range(3)] == [pytest.approx(3), pytest.approx(3.5), pytest.approx(4)]
+
+
+def test_acquire_sleeps_for_the_reservation(limiter, clock):
+    for _ in range(5):
+        limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2', 2.0), ('0.5', 0.5), ('-1', 0.0), (None, None), ('', None), ('soon', None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date(clock):
+    clock.now = 1_700_000_000.0
+    assert parse_retry_after('Tue, 14 Nov 2023 22:13:30 GMT') == pytest.approx(10)
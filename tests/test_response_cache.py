@@ -0,0 +1,53 @@
+import pytest
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return ResponseCache(str(tmp_path / 'cache.sqlite3'), volatile_ttl=100, static_ttl=1000, max_entries=10)
+
+
+def accessed_at(cache, key):
+    return cache._connect().execute('SELECT accessed_at FROM entries WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_fresh_entry_is_returned_until_its_ttl(cache, clock):
+    cache.put('item:1', {'itemId': 1, 'salePrice': 9.99})
+    clock.advance(99)
+    assert cache.get('item:1') == {'itemId': 1, 'salePrice': 9.99}
+    clock.advance(2)
+    assert cache.get('item:1') is None
+
+
+def test_static_only_read_strips_stale_volatile_fields(cache, clock):
+    cache.put('page', {'items': [{'itemId': 1, 'name': 'Lego', 'salePrice': 9.99, 'stock': 'Available'}]})
+    clock.advance(500)
+    assert cache.get('page', static_only=True) == {'items': [{'itemId': 1, 'name': 'Lego'}]}
+    clock.advance(501)
+    assert cache.get('page', static_only=True) is None
+
+
+def test_hits_only_write_once_accessed_at_is_a_quarter_ttl_old(cache, clock):
+    cache.put('item:1', {'itemId': 1})
+    written = accessed_at(cache, 'item:1')
+    changes = cache._connect().total_changes
+
+    clock.advance(20)
+    assert cache.get_many(['item:1', 'item:2']) == {'item:1': {'itemId': 1}}
+    # A recent access: the read didn't write
+    assert cache._connect().total_changes == changes
+    assert accessed_at(cache, 'item:1') == written
+
+    clock.advance(10)
+    assert cache.get('item:1') is not None
+    assert accessed_at(cache, 'item:1') == clock.now
+
+
+def test_eviction_drops_the_least_recently_used(cache, clock):
+    cache.put_many({f'item:{i}': {'itemId': i} for i in range(11)})
+    clock.advance(30)
+    cache.get('item:0')
+    cache.evict()
+    assert cache.get('item:0') is not None
+    assert len(cache.get_many([f'item:{i}' for i in range(11)])) == 9
@@ -0,0 +1,45 @@
+import json
+import os
+
+from shared_state import SharedStateFile
+
+
+def counter(path):
+    return SharedStateFile(str(path), lambda now: {'count': 0, 'created': now})
+
+
+def test_missing_fields_come_from_initial(tmp_path, clock):
+    path = tmp_path / 'state.json'
+    path.write_text(json.dumps({'count': 3}))
+    assert counter(path).read() == {'count': 3, 'created': clock.now}
+
+
+def test_update_is_seen_by_every_instance_on_the_file(tmp_path):
+    first, second = counter(tmp_path / 'state.json'), counter(tmp_path / 'state.json')
+
+    def bump(state, now):
+        state['count'] += 1
+        return state['count']
+
+    assert first.update(bump) == 1
+    assert second.update(bump) == 2
+    assert first.read()['count'] == 2
+
+
+def test_unchanged_state_is_not_rewritten(tmp_path):
+    path = tmp_path / 'state.json'
+    state = counter(path)
+    state.update(lambda s, now: s.update(count=1))
+    mtime = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(0, 0))
+
+    assert state.update(lambda s, now: s['count']) == 1
+    assert os.stat(path).st_mtime_ns == 0 != mtime
+    assert not os.path.exists(str(path) + '.tmp')
+
+
+def test_corrupt_or_non_object_file_starts_over(tmp_path, clock):
+    path = tmp_path / 'state.json'
+    for content in ('{not json', '[1, 2]', ''):
+        path.write_text(content)
+        assert counter(path).read() == {'count': 0, 'created': clock.now}
@@ -0,0 +1,73 @@
+from shopify_bulk import BulkOperationError, ShopifyBulkExporter, ShopifyBulkImporter, rest_product
+
+
+def product_lines():
+    """A products export as Shopify writes it: each product followed by its variants"""
+    return [
+        {'id': 'gid://shopify/Product/1', 'title': 'Lego', 'tags': ['Source:Walmart'], 'status': 'ACTIVE'},
+        {'id': 'gid://shopify/ProductVariant/11', 'sku': 'W1', 'price': '9.99',
+         'inventoryItem': {'id': 'gid://shopify/InventoryItem/111'}, '__parentId': 'gid://shopify/Product/1'},
+        {'id': 'gid://shopify/ProductVariant/12', 'sku': 'W2', '__parentId': 'gid://shopify/Product/1'},
+        {'id': 'gid://shopify/Product/2', 'title': 'Puzzle', 'tags': []},
+        {'id': 'gid://shopify/ProductVariant/21', 'sku': 'W3', '__parentId': 'gid://shopify/Product/2'},
+    ]
+
+
+def test_reassemble_attaches_children_to_their_parent():
+    exporter = ShopifyBulkExporter(client=None)
+    products = list(exporter.reassemble(iter(product_lines())))
+
+    assert [p['id'] for p in products] == ['gid://shopify/Product/1', 'gid://shopify/Product/2']
+    assert [v['sku'] for v in products[0]['__children']['ProductVariant']] == ['W1', 'W2']
+    assert [v['sku'] for v in products[1]['__children']['ProductVariant']] == ['W3']
+
+
+def test_reassemble_skips_orphans_outside_their_parents_block():
+    exporter = ShopifyBulkExporter(client=None)
+    lines = product_lines()
+    # A variant of product 1 written after product 2 started
+    lines.append({'id': 'gid://shopify/ProductVariant/13', 'sku': 'W4', '__parentId': 'gid://shopify/Product/1'})
+    products = list(exporter.reassemble(iter(lines)))
+
+    assert [v['sku'] for v in products[1]['__children']['ProductVariant']] == ['W3']
+    assert exporter.stats['orphans'] == 1
+
+
+def test_reassembled_product_has_the_rest_shape():
+    exporter = ShopifyBulkExporter(client=None)
+    product = rest_product(next(exporter.reassemble(iter(product_lines()))))
+
+    assert product['id'] == 1 and product['status'] == 'active'
+    assert product['tags'] == 'Source:Walmart'
+    assert [(v['id'], v['product_id'], v['sku']) for v in product['variants']] == [(11, 1, 'W1'), (12, 1, 'W2')]
+    assert product['variants'][0]['inventory_item_id'] == 111
+
+
+def created_line(line_number, product_id):
+    return {'__lineNumber': line_number, 'data': {'productCreate': {'product': {
+        'id': f'gid://shopify/Product/{product_id}',
+        'variants': {'edges': [{'node': {'id': f'gid://shopify/ProductVariant/{product_id}0',
+                                         'inventoryItem': {'id': f'gid://shopify/InventoryItem/{product_id}00'}}}]},
+    }, 'userErrors': []}}}
+
+
+def test_failed_batch_keeps_the_results_of_earlier_batches(monkeypatch):
+    importer = ShopifyBulkImporter(client=None, max_upload_bytes=40)
+    batches = []
+
+    def run_mutation(mutation, payload):
+        batches.append(payload)
+        if len(batches) == 2:
+            raise BulkOperationError('Bulk operation FAILED: INTERNAL_SERVER_ERROR')
+        return 'https://storage.test/result.jsonl'
+
+    monkeypatch.setattr(importer, 'run_mutation', run_mutation)
+    monkeypatch.setattr(importer, 'download', lambda url: iter([created_line(0, 1)]))
+    inputs = [('W1', {'title': 'Lego'}), ('W2', {'title': 'Puzzle'})]
+    results = importer.import_products(inputs)
+
+    # One product per batch under the 40-byte cap
+    assert len(batches) == 2
+    assert results['W1'] == {'product_id': 1, 'variant_id': 10, 'inventory_item_id': 100, 'errors': []}
+    assert results['W2']['product_id'] is None
+    assert results['W2']['errors'] == ['batch failed: Bulk operation FAILED: INTERNAL_SERVER_ERROR']
@@ -0,0 +1,101 @@
+import pytest
+import requests
+
+from shopify_client import ShopifyAdminClient, ShopifyAPIError
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, text=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.text = text if text is not None else str(body)
+        self.headers = headers or {}
+        self.links = {}
+
+    def json(self):
+        if self._body is None:
+            raise ValueError('No JSON object could be decoded')
+        return self._body
+
+
+class FakeSession:
+    """Replays canned responses (or raises canned exceptions) in order"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, params=None, json=None, timeout=None):
+        self.calls.append((method, url))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def make_client(clock):
+    def make(*outcomes):
+        client = ShopifyAdminClient('test.myshopify.com', 'token', max_retries=3)
+        client.session = FakeSession(*outcomes)
+        return client
+    return make
+
+
+def graphql_body(data):
+    return {'data': data, 'extensions': {'cost': {'actualQueryCost': 10}}}
+
+
+def test_post_read_timeout_is_not_retried_and_may_have_applied(make_client):
+    client = make_client(requests.exceptions.ReadTimeout('read timed out'))
+    with pytest.raises(ShopifyAPIError) as excinfo:
+        client.post('products.json', json={'product': {}})
+    assert excinfo.value.maybe_applied
+    assert len(client.session.calls) == 1
+
+
+def test_post_server_error_is_not_retried_and_may_have_applied(make_client):
+    client = make_client(FakeResponse(502, text='Bad Gateway'), FakeResponse(201, {'product': {}}))
+    with pytest.raises(ShopifyAPIError) as excinfo:
+        client.post('products.json', json={'product': {}})
+    assert excinfo.value.maybe_applied and excinfo.value.status_code == 502
+    assert len(client.session.calls) == 1
+
+
+def test_post_is_retried_after_429_and_failed_connections(make_client):
+    client = make_client(FakeResponse(429, text='Throttled', headers={'Retry-After': '1'}),
+                         requests.exceptions.ConnectionError('refused'),
+                         FakeResponse(201, {'product': {'id': 1}}))
+    assert client.post('products.json', json={'product': {}}).status_code == 201
+    assert len(client.session.calls) == 3
+
+
+def test_get_retries_server_errors(make_client):
+    client = make_client(FakeResponse(503, text='Unavailable'), FakeResponse(200, {'products': []}))
+    assert client.get('products.json').status_code == 200
+
+
+def test_graphql_html_error_page_raises_api_error(make_client):
+    client = make_client(FakeResponse(200, text='<html>Bad Gateway</html>'))
+    with pytest.raises(ShopifyAPIError) as excinfo:
+        client.graphql('{ shop { id } }')
+    assert excinfo.value.status_code == 200
+
+
+def test_graphql_mutation_is_not_resent_after_a_server_error(make_client):
+    client = make_client(FakeResponse(502, text='Bad Gateway'), FakeResponse(200, graphql_body({})))
+    with pytest.raises(ShopifyAPIError) as excinfo:
+        client.graphql('mutation { productCreate { product { id } } }')
+    assert excinfo.value.maybe_applied
+    assert len(client.session.calls) == 1
+
+
+def test_graphql_mutation_marked_idempotent_is_retried(make_client):
+    client = make_client(FakeResponse(502, text='Bad Gateway'),
+                         FakeResponse(200, graphql_body({'inventorySetQuantities': {'userErrors': []}})))
+    data = client.graphql('mutation { inventorySetQuantities { userErrors { message } } }', idempotent=True)
+    assert data == {'inventorySetQuantities': {'userErrors': []}}
+    assert len(client.session.calls) == 2
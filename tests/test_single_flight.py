@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'items': [1]}
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', fetch)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do('k', fetch)))
+    follower.start()
+    # Let the follower block on the in-flight future before the leader finishes
+    deadline = time.monotonic() + 5
+    while not flight._calls['k']._condition._waiters and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [1]
+    assert sorted(results, key=lambda r: r[1]) == [({'items': [1]}, False), ({'items': [1]}, True)]
+    # The key is forgotten once the call is done
+    assert flight.do('k', lambda: 'again') == ('again', False)
+
+
+def test_leader_exception_reaches_the_caller_and_clears_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        flight.do('k', fail)
+    assert flight.do('k', lambda: 1) == (1, False)
+
+
+def test_async_followers_share_the_leaders_result():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'data'
+
+        results = await asyncio.gather(*(flight.do('k', fetch) for _ in range(3)))
+        return calls, results
+
+    calls, results = asyncio.run(main())
+    assert calls == [1]
+    assert results == [('data', False), ('data', True), ('data', True)]
+
+
+def test_async_cancelled_leader_hands_the_call_to_a_follower():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'data'
+
+        leader = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return calls, await follower
+
+    calls, result = asyncio.run(main())
+    # The follower re-ran the call as the new leader instead of being cancelled
+    assert result == ('data', False)
+    assert calls == [1, 1]
+
+
+def test_async_cancelled_follower_leaves_the_leader_running():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'data'
+
+        leader = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('k', fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == ('data', False)
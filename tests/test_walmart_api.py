@@ -0,0 +1,76 @@
+import logging
+import threading
+
+import pytest
+
+from metrics import MetricsRegistry
+from walmart_api import WalmartAPIClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'{"items": []}'):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('utf-8')
+
+
+class FakeState:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+def upc_client(*statuses):
+    """A client whose items endpoint answers with `statuses` in order, without keys or network"""
+    client = WalmartAPIClient.__new__(WalmartAPIClient)
+    client.items_by_ids_url = 'https://example.test/items'
+    client.client_state = FakeState()
+    client.logger = logging.getLogger('test')
+    client.stats = {}
+    client._stats_lock = threading.Lock()
+    client.metrics = MetricsRegistry()
+    client.sent = []
+    responses = [FakeResponse(s) for s in statuses]
+
+    def send_hedged(url, params):
+        client.sent.append(next(iter(params)))
+        return responses.pop(0), {}
+
+    client._send_hedged = send_hedged
+    return client
+
+
+@pytest.mark.parametrize('status', [400, 422])
+def test_rejected_param_form_falls_back_and_is_learned(status):
+    client = upc_client(status, 200)
+    assert client._fetch_items_by_upc_batch(['012345678905'])['success']
+    assert client.sent == ['upc', 'gtin']
+    assert client.stats['upc_param_fallbacks'] == 1
+    assert client.client_state.get('upc_param:https://example.test/items') == 'gtin'
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_throttling_and_server_errors_do_not_switch_the_param_form(status):
+    client = upc_client(status, 200)
+    result = client._fetch_items_by_upc_batch(['012345678905'])
+    assert not result['success'] and result['status_code'] == status
+    assert client.sent == ['upc']
+    assert 'upc_param_fallbacks' not in client.stats
+    assert client.client_state.get('upc_param:https://example.test/items') is None
+
+
+def test_transport_errors_do_not_switch_the_param_form():
+    client = upc_client()
+
+    def send_hedged(url, params):
+        client.sent.append(next(iter(params)))
+        raise ConnectionError('reset by peer')
+
+    client._send_hedged = send_hedged
+    assert not client._fetch_items_by_upc_batch(['012345678905'])['success']
+    assert client.sent == ['upc']
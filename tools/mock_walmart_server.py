@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Walmart Affiliate API, for load and regression testing.
+
+Serves the `paginated/items`, `items` (ids/upc/gtin) and `search` endpoints from
+a deterministic synthetic catalog, so throughput changes can be benchmarked
+offline without burning API quota. Requests are matched on the path suffix,
+so the real URL layout (/api-proxy/service/affil/product/v2/...) works too.
+
+Point the client at it with:
+
+    BASE_URL=http://127.0.0.1:8765/paginated/items
+    ITEMS_BY_IDS_URL=http://127.0.0.1:8765/items
+    SEARCH_URL=http://127.0.0.1:8765/search
+
+With --public-key the WM_SEC.AUTH_SIGNATURE header is verified exactly like the
+real API does (RSA-SHA256 over consumer id, timestamp and key version).
+Latency, page caps, nextPage behaviour, 429/5xx injection and a server-side QPS
+limit (per consumer ID) are configurable; GET /__stats returns request counters as JSON.
+
+Only the standard library is required (plus `cryptography` for --public-key).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlencode, urlparse
+
+CATALOG_BASE_ID = 100000000
+UPC_BASE = 700000000000
+
+BRANDS = ["Onn", "Mainstays", "Great Value", "Equate", "Sony", "Samsung", "LEGO", "Hanes", "Nike", "Ninja",
+          "Shark", "Hamilton Beach", "Better Homes & Gardens", "Ozark Trail", "Hyper Tough", "Parent's Choice"]
+CATEGORIES = [
+    ("3944", "Electronics/TV & Video"), ("3944_1089430", "Electronics/Computers"), ("4044", "Home/Kitchen"),
+    ("4171", "Toys/Building Sets"), ("4125", "Sports & Outdoors/Camping"), ("1085666", "Personal Care/Beauty"),
+    ("5438", "Clothing/Basics"), ("5427", "Pets/Dog Supplies"), ("1072864", "Home Improvement/Tools"),
+]
+NOUNS = ["TV", "Laptop", "Headphones", "Tablet", "Speaker", "Blender", "Air Fryer", "Vacuum", "Lamp", "Towels",
+         "Tent", "Backpack", "Cooler", "Drill Set", "Socks", "T-Shirt", "Dog Food", "Shampoo", "Lego Set", "Puzzle"]
+ADJECTIVES = ["Deluxe", "Compact", "Wireless", "Classic", "Pro", "Essential", "Smart", "Portable", "Family Size"]
+
+
+def _item_index(item_id: int, catalog_size: int) -> int | None:
+    index = item_id - CATALOG_BASE_ID
+    return index if 0 <= index < catalog_size else None
+
+
+@lru_cache(maxsize=100000)
+def _item(index: int, seed: int, description_bytes: int) -> dict[str, Any]:
+    """Deterministic synthetic item for a catalog position"""
+    rng = random.Random(seed * 1000003 + index)
+    item_id = CATALOG_BASE_ID + index
+    brand = BRANDS[index % len(BRANDS)]
+    category_id, category_path = CATEGORIES[index % len(CATEGORIES)]
+    name = f"{brand} {rng.choice(ADJECTIVES)} {NOUNS[index % len(NOUNS)]} {index}"
+    msrp = round(rng.uniform(5, 500), 2)
+    marketplace = rng.random() < 0.3
+    image = f"https://i5.walmartimages.com/asr/{item_id}.jpeg"
+    return {
+        "itemId": item_id,
+        "parentItemId": item_id,
+        "name": name,
+        "msrp": msrp,
+        "salePrice": round(msrp * rng.uniform(0.6, 1.0), 2),
+        "upc": str(UPC_BASE + index),
+        "categoryPath": category_path,
+        "categoryNode": category_id,
+        "shortDescription": f"{name} from {brand}.",
+        "longDescription": ("<p>" + f"{name} ".ljust(60, "x") + "</p>") * max(1, description_bytes // 67),
+        "brandName": brand,
+        "thumbnailImage": image + "?odnWidth=100",
+        "mediumImage": image + "?odnWidth=180",
+        "largeImage": image + "?odnWidth=450",
+        "imageEntities": [
+            {"thumbnailImage": image + "?odnWidth=100", "largeImage": image + "?odnWidth=450", "entityType": "PRIMARY"}
+        ],
+        "productUrl": f"https://www.walmart.com/ip/{item_id}",
+        "customerRating": f"{rng.uniform(3, 5):.1f}",
+        "numReviews": rng.randint(0, 20000),
+        "stock": "Available" if rng.random() < 0.85 else "Not available",
+        "marketplace": marketplace,
+        "sellerInfo": "Third Party Seller LLC" if marketplace else "Walmart.com",
+        "availableOnline": True,
+        "offerType": "ONLINE_AND_STORE",
+        "freeShippingOver35Dollars": True,
+    }
+
+
+class TokenBucket:
+    """Server-side QPS limit: requests beyond it get a 429"""
+
+    def __init__(self, qps: float):
+        self.qps = qps
+        self.tokens = qps
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.qps, self.tokens + (now - self.updated) * self.qps)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class MockWalmartAPI:
+    """Request handling, independent of the HTTP plumbing"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        # One bucket per WM_CONSUMER.ID, like Walmart's per-key quota
+        self.buckets: dict[str, TokenBucket] = {}
+        self.buckets_lock = threading.Lock()
+        self.public_key = self._load_public_key(args.public_key) if args.public_key else None
+        self.stats: dict[str, Any] = {"requests": 0, "by_endpoint": {}, "by_status": {}, "by_consumer": {},
+                                      "items_served": 0}
+        self.stats_lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+
+    @staticmethod
+    def _load_public_key(path: str):
+        from cryptography.hazmat.primitives import serialization
+
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            return serialization.load_pem_public_key(data)
+        except ValueError:
+            # Walmart hands out base64 DER keys
+            return serialization.load_der_public_key(base64.b64decode(data))
+
+    def _bucket(self, consumer_id: str) -> TokenBucket:
+        with self.buckets_lock:
+            bucket = self.buckets.get(consumer_id)
+            if bucket is None:
+                bucket = self.buckets[consumer_id] = TokenBucket(self.args.qps)
+            return bucket
+
+    def _random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _count(self, endpoint: str, status: int, items: int, consumer_id: str | None):
+        with self.stats_lock:
+            consumer = self.stats["by_consumer"].setdefault(consumer_id or "-", {})
+            consumer[str(status)] = consumer.get(str(status), 0) + 1
+            self.stats["requests"] += 1
+            self.stats["by_endpoint"][endpoint] = self.stats["by_endpoint"].get(endpoint, 0) + 1
+            self.stats["by_status"][str(status)] = self.stats["by_status"].get(str(status), 0) + 1
+            self.stats["items_served"] += items
+
+    def latency(self, items: int) -> float:
+        kind, _, spec = self.args.latency.partition(":")
+        values = [float(v) for v in spec.split(",") if v]
+        with self.rng_lock:
+            if kind == "uniform":
+                base = self.rng.uniform(values[0], values[1])
+            elif kind == "lognormal":
+                # median, sigma
+                base = self.rng.lognormvariate(0, values[1]) * values[0]
+            else:
+                base = values[0] if values else 0.0
+        return base + items * self.args.latency_per_item
+
+    def verify_signature(self, headers) -> str | None:
+        """Return an error message when the auth headers are missing or invalid"""
+        consumer_id = headers.get("WM_CONSUMER.ID")
+        timestamp = headers.get("WM_CONSUMER.INTIMESTAMP")
+        key_version = headers.get("WM_SEC.KEY_VERSION")
+        signature = headers.get("WM_SEC.AUTH_SIGNATURE")
+        if not all((consumer_id, timestamp, key_version, signature)):
+            return "missing WM_CONSUMER.ID / WM_CONSUMER.INTIMESTAMP / WM_SEC.KEY_VERSION / WM_SEC.AUTH_SIGNATURE"
+        if self.args.consumer_id and consumer_id != self.args.consumer_id:
+            return "unknown consumer id"
+        try:
+            age = abs(time.time() - int(timestamp) / 1000)
+        except ValueError:
+            return "malformed timestamp"
+        if age > self.args.max_signature_age:
+            return f"timestamp is {age:.0f}s old"
+        if self.public_key is None:
+            return None
+
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        canonical = f"{consumer_id}\n{timestamp}\n{key_version}\n"
+        try:
+            self.public_key.verify(base64.b64decode(signature), canonical.encode("utf-8"),
+                                   padding.PKCS1v15(), hashes.SHA256())
+        except (InvalidSignature, ValueError):
+            return "signature does not verify"
+        return None
+
+    def handle(self, path: str, query: dict[str, list[str]], headers) -> tuple[int, dict[str, str], Any]:
+        """Return (status, extra headers, JSON body)"""
+        endpoint = next((e for e in ("paginated/items", "items", "search", "__stats") if path.rstrip("/").endswith(e)), None)
+        if endpoint == "__stats":
+            with self.stats_lock:
+                return 200, {}, json.loads(json.dumps(self.stats))
+        if endpoint is None:
+            return 404, {}, {"errors": [{"code": 404, "message": f"no such endpoint: {path}"}]}
+
+        error = self.verify_signature(headers)
+        if error:
+            status, body = 401, {"errors": [{"code": 401, "message": error}]}
+        elif self.args.qps > 0 and not self._bucket(headers.get("WM_CONSUMER.ID")).take():
+            status, body = 429, {"errors": [{"code": 429, "message": "Too Many Requests"}]}
+        elif self._random() < self.args.rate_429:
+            status, body = 429, {"errors": [{"code": 429, "message": "Too Many Requests"}]}
+        elif self._random() < self.args.rate_5xx:
+            status, body = 503, {"errors": [{"code": 503, "message": "Service Unavailable"}]}
+        else:
+            params = {k: v[0] for k, v in query.items()}
+            try:
+                if endpoint == "paginated/items":
+                    status, body = self.paginated_items(params)
+                elif endpoint == "items":
+                    status, body = self.items(params)
+                else:
+                    status, body = self.search(params)
+            except ValueError as e:
+                status, body = 400, {"errors": [{"code": 400, "message": str(e)}]}
+
+        items = len(body.get("items", [])) if isinstance(body, dict) else 0
+        time.sleep(self.latency(items))
+        self._count(endpoint, status, items, headers.get("WM_CONSUMER.ID"))
+        extra = {"Retry-After": str(self.args.retry_after)} if status == 429 else {}
+        return status, extra, body
+
+    def _get(self, index: int) -> dict[str, Any]:
+        return _item(index, self.args.seed, self.args.description_bytes)
+
+    def paginated_items(self, params: dict[str, str]) -> tuple[int, dict[str, Any]]:
+        count = min(int(params.get("count", 25)), self.args.page_cap)
+        last_doc = int(params.get("lastDoc", 0))
+        page_number = last_doc // max(1, count) if count else 0
+        category = params.get("category")
+        brand = params.get("brand")
+
+        items = []
+        index = last_doc
+        while index < self.args.catalog_size and len(items) < count:
+            item = self._get(index)
+            index += 1
+            if category and not item["categoryNode"].startswith(category):
+                continue
+            if brand and item["brandName"].lower() != brand.lower():
+                continue
+            items.append(item)
+
+        body: dict[str, Any] = {"category": category, "format": "json", "items": items}
+        more = index < self.args.catalog_size and not self.args.no_next_page
+        if self.args.max_pages and page_number + 1 >= self.args.max_pages:
+            more = False
+        if more and items:
+            next_params = {k: v for k, v in params.items() if k != "lastDoc"}
+            next_params["lastDoc"] = str(index)
+            body["nextPage"] = "/api-proxy/service/affil/product/v2/paginated/items?" + urlencode(next_params)
+        body["totalPages"] = -(-self.args.catalog_size // max(1, count))
+        return 200, body
+
+    def items(self, params: dict[str, str]) -> tuple[int, dict[str, Any]]:
+        key = next((k for k in ("ids", "upc", "gtin") if k in params), None)
+        if key is None:
+            raise ValueError("one of ids, upc or gtin is required")
+        if key != "ids" and self.args.upc_param != "both" and key != self.args.upc_param:
+            raise ValueError(f"unsupported parameter: {key}")
+        values = [v.strip() for v in params[key].split(",") if v.strip()]
+        if len(values) > self.args.ids_cap:
+            raise ValueError(f"at most {self.args.ids_cap} {key} per request")
+
+        items = []
+        for value in values:
+            if not value.isdigit():
+                continue
+            index = _item_index(int(value), self.args.catalog_size) if key == "ids" else int(value) - UPC_BASE
+            if index is not None and 0 <= index < self.args.catalog_size:
+                items.append(self._get(index))
+        return 200, {"items": items}
+
+    @lru_cache(maxsize=256)
+    def _search_hits(self, query: str) -> tuple[int, ...]:
+        """Catalog positions whose name, brand or category matches any query word"""
+        words = [w for w in query.lower().split() if w]
+        hits = []
+        for index in range(self.args.catalog_size):
+            item = self._get(index)
+            haystack = f"{item['name']} {item['brandName']} {item['categoryPath']}".lower()
+            if any(w in haystack for w in words):
+                hits.append(index)
+                if len(hits) >= self.args.search_results_cap:
+                    break
+        return tuple(hits)
+
+    def search(self, params: dict[str, str]) -> tuple[int, dict[str, Any]]:
+        query = params.get("query")
+        if not query:
+            raise ValueError("query is required")
+        start = max(1, int(params.get("start", 1)))
+        num_items = min(int(params.get("numItems", 10)), self.args.search_page_cap)
+        hits = self._search_hits(query)
+        page = hits[start - 1:start - 1 + num_items]
+        return 200, {
+            "query": query,
+            "sort": "relevance",
+            "responseGroup": "base",
+            "totalResults": len(hits),
+            "start": start,
+            "numItems": len(page),
+            "items": [self._get(index) for index in page],
+        }
+
+
+def _make_handler(api: MockWalmartAPI, compress: bool):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002 - quiet by default
+            if api.args.verbose:
+                super().log_message(format, *args)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, extra_headers, body = api.handle(url.path, parse_qs(url.query), self.headers)
+            payload = json.dumps(body).encode("utf-8")
+            accept = self.headers.get("Accept-Encoding", "")
+            encoding = None
+            if compress and "gzip" in accept:
+                payload, encoding = gzip.compress(payload, compresslevel=5), "gzip"
+            elif compress and "deflate" in accept:
+                payload, encoding = zlib.compress(payload), "deflate"
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            for name, value in extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local Walmart Affiliate API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--public-key", help="PEM (or base64 DER) public key; verifies request signatures")
+    parser.add_argument("--consumer-id", help="Reject requests from any other WM_CONSUMER.ID")
+    parser.add_argument("--max-signature-age", type=float, default=180, help="Seconds a signed timestamp stays valid")
+    parser.add_argument("--catalog-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--description-bytes", type=int, default=2000, help="Approximate longDescription size")
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="fixed:SECONDS | uniform:MIN,MAX | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--latency-per-item", type=float, default=0.0005, help="Extra seconds per item returned")
+    parser.add_argument("--page-cap", type=int, default=1000, help="Largest count honoured on paginated/items")
+    parser.add_argument("--max-pages", type=int, default=0, help="Stop emitting nextPage after this many pages (0 = never)")
+    parser.add_argument("--no-next-page", action="store_true", help="Never emit nextPage cursors")
+    parser.add_argument("--ids-cap", type=int, default=20, help="Most ids/upcs accepted per items request")
+    parser.add_argument("--upc-param", choices=("both", "upc", "gtin"), default="both",
+                        help="Which UPC parameter form the items endpoint accepts")
+    parser.add_argument("--search-page-cap", type=int, default=25, help="Largest numItems honoured on search")
+    parser.add_argument("--search-results-cap", type=int, default=1000, help="Most results any search returns")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--qps", type=float, default=0, help="Server-side QPS limit per consumer ID; excess gets 429 (0 = none)")
+    parser.add_argument("--no-compress", action="store_true", help="Ignore Accept-Encoding")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    api = MockWalmartAPI(args)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(api, not args.no_compress))
+    server.daemon_threads = True
+    print(f"Mock Walmart API on http://{args.host}:{args.port} "
+          f"(catalog {args.catalog_size}, signatures {'verified' if api.public_key else 'not verified'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,29 +1,30 @@
 import os
-import requests
-import time
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from shopify_bulk import BulkOperationError, export_products
+from shopify_client import ShopifyAPIError, get_shopify_client
+from inventory_writer import InventoryWriter
+
 # Load environment variables
 load_dotenv()
 
 SHOPIFY_STORE_URL = os.getenv('SHOPIFY_STORE_URL')
 SHOPIFY_ACCESS_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-API_VERSION = "2024-01"
 
 if not SHOPIFY_STORE_URL or not SHOPIFY_ACCESS_TOKEN:
     print("❌ Error: Missing Shopify credentials in .env file")
     exit(1)
 
-BASE_URL = f"https://{SHOPIFY_STORE_URL}/admin/api/{API_VERSION}"
-HEADERS = {
-    "X-Shopify-Access-Token": SHOPIFY_ACCESS_TOKEN,
-    "Content-Type": "application/json"
-}
+shopify_client = get_shopify_client()
 
 def get_locations():
     """Fetch all active locations (warehouses)"""
-    url = f"{BASE_URL}/locations.json"
-    response = requests.get(url, headers=HEADERS)
+    response = shopify_client.get("locations.json")
     if response.status_code == 200:
         return response.json().get('locations', [])
     else:
@@ -31,85 +32,29 @@ def get_locations():
         return []
 
 def get_all_products():
-    """Fetch all products using pagination"""
-    products = []
-    url = f"{BASE_URL}/products.json?limit=250&fields=id,title,tags,variants"
-    
+    """Fetch all products with one bulk export (see src/shopify_bulk.py)"""
     print("📥 Fetching all products...")
-    while url:
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code != 200:
-            print(f"❌ Error fetching products: {response.text}")
-            break
-            
-        data = response.json()
-        products.extend(data.get('products', []))
-        
-        # Handle pagination
-        link = response.headers.get('Link')
-        url = None
-        if link:
-            links = link.split(',')
-            for l in links:
-                if 'rel="next"' in l:
-                    url = l.split(';')[0].strip('<> ')
-    
-    return products
+    try:
+        return list(export_products())
+    except (BulkOperationError, ShopifyAPIError) as e:
+        print(f"❌ Error fetching products: {e}")
+        return []
 
 def enable_inventory_tracking(variant_id):
     """Enable Shopify inventory tracking for a variant"""
-    url = f"{BASE_URL}/variants/{variant_id}.json"
     payload = {
         "variant": {
             "id": variant_id,
             "inventory_management": "shopify"
         }
     }
-    response = requests.put(url, headers=HEADERS, json=payload)
+    response = shopify_client.put(f"variants/{variant_id}.json", json=payload)
     if response.status_code == 200:
         return True
     else:
         print(f"   ⚠️ Failed to enable tracking: {response.text}")
         return False
 
-def connect_inventory_to_location(inventory_item_id, location_id):
-    """Connect an inventory item to a location"""
-    url = f"{BASE_URL}/inventory_levels/connect.json"
-    payload = {
-        "location_id": location_id,
-        "inventory_item_id": inventory_item_id
-    }
-    response = requests.post(url, headers=HEADERS, json=payload)
-    if response.status_code == 201 or response.status_code == 200:
-        return True
-    else:
-        # It might already be connected, which is fine
-        if "already connected" in response.text:
-            return True
-        if "fulfillment service location" in response.text:
-            return False
-        print(f"   ⚠️ Failed to connect to location: {response.text}")
-        return False
-
-def set_inventory(inventory_item_id, location_id, quantity):
-    """Set inventory level for a specific item at a specific location"""
-    url = f"{BASE_URL}/inventory_levels/set.json"
-    payload = {
-        "location_id": location_id,
-        "inventory_item_id": inventory_item_id,
-        "available": quantity
-    }
-    
-    response = requests.post(url, headers=HEADERS, json=payload)
-    if response.status_code == 200:
-        return True
-    else:
-        # Ignore the specific error about multiple locations
-        if "fulfillment service location" in response.text:
-            return False
-        print(f"   ⚠️ Failed to set inventory: {response.text}")
-        return False
-
 def main():
     print(f"🔌 Connecting to {SHOPIFY_STORE_URL}...")
     
@@ -134,9 +79,10 @@ def main():
     all_products = get_all_products()
     print(f"📦 Total products found: {len(all_products)}")
     
-    # 3. Filter and Update
+    # 3. Filter and collect stock changes
     updated_count = 0
     skipped_count = 0
+    changes = []
     
     print("🚀 Starting Bulk Update (This may take a while)...")
     
@@ -163,28 +109,21 @@ def main():
             # STEP 1: Ensure Inventory Tracking is ON
             if variant.get('inventory_management') != 'shopify':
                 enable_inventory_tracking(variant_id)
-                time.sleep(0.6) # Rate limit prevention
             
-            # STEP 2: Update for EACH location
-            for loc in locations:
-                # Try to set inventory
-                success = set_inventory(inventory_item_id, loc['id'], 50)
-                
-                if not success:
-                    # If failed, try connecting first, then set again
-                    print(f"   🔄 Attempting to connect item to {loc['name']}...")
-                    if connect_inventory_to_location(inventory_item_id, loc['id']):
-                        success = set_inventory(inventory_item_id, loc['id'], 50)
-                
-                if success:
-                    print(f"   ✅ Set 50 at {loc['name']}")
-                else:
-                    # Check for the specific conflict error
-                    print(f"   ⚠️ Could not set at {loc['name']} (likely due to conflict with other locations)")
-                
-                time.sleep(0.6) # Rate limit prevention
+            # STEP 2: Queue 50 for EACH location
+            changes.extend((inventory_item_id, loc['id'], 50) for loc in locations)
         
         updated_count += 1
+    
+    # 4. Write all stock levels in batched mutations; items not yet stocked at a
+    #    location are connected there first
+    print(f"\n📦 Setting 50 units for {len(changes)} item/location pairs...")
+    result = InventoryWriter.from_env(shopify_client).set_quantities(changes)
+    location_names = {loc['id']: loc['name'] for loc in locations}
+    for (inventory_item_id, location_id), message in result['failures'].items():
+        # Usually a conflict with other locations (fulfillment service items)
+        print(f"   ⚠️ Could not set {inventory_item_id} at {location_names.get(location_id, location_id)}: {message}")
+    print(f"   ✅ Set 50 for {result['updated']} item/location pairs")
         
     print("\n📊 Summary:")
     print(f"   - Total Products Scanned: {len(all_products)}")
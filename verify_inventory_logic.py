@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 load_dotenv()
 
@@ -65,7 +65,7 @@ def check_product_status(client, item_id, markup_percentage=20):
     print(f"   Your Price: ${final_price:.2f}")
 
 def main():
-    client = WalmartAPIClient()
+    client = get_client()
     
     # 1. The Hanes Socks (Item 656) - Currently 3rd Party
     check_product_status(client, "656")
@@ -1,10 +1,10 @@
 import os
 import sys
 import json
-from src.walmart_api import WalmartAPIClient
+from src.walmart_api import get_client
 
 def verify_pickup():
-    client = WalmartAPIClient()
+    client = get_client()
     
     # UPCs from the previous "Top 10" list (Wipes, Toothpaste, Batteries)
     upcs = [
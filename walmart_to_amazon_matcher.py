@@ -15,7 +15,7 @@ import hashlib
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from walmart_api import WalmartAPIClient
+from walmart_api import get_client
 
 class WalmartToAmazonMatcher:
     """
@@ -23,7 +23,7 @@ class WalmartToAmazonMatcher:
     """
     
     def __init__(self):
-        self.walmart_client = WalmartAPIClient()
+        self.walmart_client = get_client()
         # Note: You'd need Amazon Product Advertising API credentials for full implementation
         # For demo purposes, we'll simulate the matching process
     